@@ -2,22 +2,13 @@
 Simplified Flask Application Entry Point
 """
 import os
-import sys
 import logging
-from pathlib import Path
-from dotenv import load_dotenv
-from sqlalchemy import event
-from sqlalchemy.engine import Engine
-import sqlite3
 from sqlalchemy.exc import SQLAlchemyError
 from flask_migrate import Migrate
 
-# Load environment variables from project root .env file
-_project_root = Path(__file__).parent.parent
-_env_file = _project_root / '.env'
-load_dotenv(dotenv_path=_env_file, override=True)
+# app_core loads the project root .env file before config is imported
+from app_core import create_base_app
 
-from flask import Flask
 from flask_cors import CORS
 from werkzeug.middleware.proxy_fix import ProxyFix
 from models import db
@@ -35,49 +26,16 @@ from controllers.payment_callback_controller import payment_callback_bp
 from controllers.notification_controller import notification_bp
 from controllers import project_bp, page_bp, template_bp, user_template_bp, export_bp, file_bp
 from controllers import admin_preset_template_bp, admin_user_template_bp
-
-
-# Enable SQLite WAL mode for all connections
-@event.listens_for(Engine, "connect")
-def set_sqlite_pragma(dbapi_conn, connection_record):
-    """
-    Enable WAL mode and related PRAGMAs for each SQLite connection.
-    Registered once at import time to avoid duplicate handlers when
-    create_app() is called multiple times.
-    """
-    # Only apply to SQLite connections
-    if not isinstance(dbapi_conn, sqlite3.Connection):
-        return
-
-    cursor = dbapi_conn.cursor()
-    try:
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.execute("PRAGMA busy_timeout=30000")  # 30 seconds timeout
-    finally:
-        cursor.close()
+from services.ai_providers.http_client import get_http_client_stats
+from services.ai_providers.rate_limiter import get_rate_controller_stats
+from services.ai_providers.image.ref_image_cache import get_ref_image_cache_stats
+from services.ai_scheduler import ai_scheduler
+from services.text_cache import get_text_cache_stats
 
 
 def create_app():
     """Application factory"""
-    app = Flask(__name__)
-    
-    # Load configuration from Config class
-    app.config.from_object(Config)
-    
-    # Override with environment-specific paths (use absolute path)
-    backend_dir = os.path.dirname(os.path.abspath(__file__))
-    instance_dir = os.path.join(backend_dir, 'instance')
-    os.makedirs(instance_dir, exist_ok=True)
-    
-    db_path = os.path.join(instance_dir, 'database.db')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-    
-    # Ensure upload folder exists
-    project_root = os.path.dirname(backend_dir)
-    upload_folder = os.path.join(project_root, 'uploads')
-    os.makedirs(upload_folder, exist_ok=True)
-    app.config['UPLOAD_FOLDER'] = upload_folder
+    app = create_base_app(__name__)
     
     # CORS configuration (parse from environment)
     raw_cors = os.getenv('CORS_ORIGINS', 'http://localhost:3000')
@@ -88,29 +46,7 @@ def create_app():
         cors_origins = [o.strip() for o in raw_cors.split(',') if o.strip()]
     app.config['CORS_ORIGINS'] = cors_origins
     
-    # Initialize logging (log to stdout so Docker can capture it)
-    log_level = getattr(logging, app.config['LOG_LEVEL'], logging.INFO)
-
-    # 强制重新配置 root logger（解决 Flask reloader 子进程日志问题）
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
-
-    # 清除现有 handlers 并添加新的
-    if not root_logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(log_level)
-        handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s - %(message)s"))
-        root_logger.addHandler(handler)
-    
-    # 设置第三方库的日志级别，避免过多的DEBUG日志
-    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
-    logging.getLogger('httpcore').setLevel(logging.WARNING)
-    logging.getLogger('httpx').setLevel(logging.WARNING)
-    logging.getLogger('urllib3').setLevel(logging.WARNING)
-    logging.getLogger('werkzeug').setLevel(logging.INFO)  # Flask开发服务器日志保持INFO
-
     # Initialize extensions
-    db.init_app(app)
     CORS(app, origins=cors_origins)
 
     # 支持反向代理（Cloudflare/Nginx），正确处理 X-Forwarded-Proto 等头
@@ -142,19 +78,29 @@ def create_app():
     app.register_blueprint(notification_bp)
 
     with app.app_context():
-        # Load settings from database and sync to app.config
-        _load_settings_to_config(app)
-
         # 根据数据库配置重新初始化 TaskManager
         from services.task_manager import task_manager
         max_task_workers = app.config.get('MAX_TASK_WORKERS', 4)
         if task_manager.max_workers != max_task_workers:
             task_manager.reconfigure(max_task_workers)
 
+        # 初始化持久化任务队列，并在 Web 进程内启动消费线程（可通过配置关闭）
+        task_manager.configure_queue(app)
+        if app.config.get('TASK_QUEUE_EMBEDDED_WORKER', True):
+            task_manager.start_queue_consumer(app)
+
     # Health check endpoint
     @app.route('/health')
     def health_check():
-        return {'status': 'ok', 'message': 'Banana Slides API is running'}
+        return {
+            'status': 'ok',
+            'message': 'Banana Slides API is running',
+            'http_pools': get_http_client_stats(),
+            'ai_rate_limits': get_rate_controller_stats(),
+            'ai_scheduler': ai_scheduler.stats(),
+            'text_cache': get_text_cache_stats(),
+            'ref_image_cache': get_ref_image_cache_stats()
+        }
     
     # Output language endpoint
     @app.route('/api/output-language', methods=['GET'])
@@ -188,72 +134,6 @@ def create_app():
     return app
 
 
-def _load_settings_to_config(app):
-    """Load settings from database and apply to app.config on startup"""
-    from models import Settings
-    try:
-        settings = Settings.get_settings()
-        
-        # Load AI provider format (always sync, has default value)
-        if settings.ai_provider_format:
-            app.config['AI_PROVIDER_FORMAT'] = settings.ai_provider_format
-            logging.info(f"Loaded AI_PROVIDER_FORMAT from settings: {settings.ai_provider_format}")
-        
-        # Load API configuration
-        # Note: We load even if value is None/empty to allow clearing settings
-        # But we only log if there's an actual value
-        if settings.api_base_url is not None:
-            # 将数据库中的统一 API Base 同步到 Google/OpenAI 两个配置，确保覆盖环境变量
-            app.config['GOOGLE_API_BASE'] = settings.api_base_url
-            app.config['OPENAI_API_BASE'] = settings.api_base_url
-            if settings.api_base_url:
-                logging.info(f"Loaded API_BASE from settings: {settings.api_base_url}")
-            else:
-                logging.info("API_BASE is empty in settings, using env var or default")
-
-        if settings.api_key is not None:
-            # 同步到两个提供商的 key，数据库优先于环境变量
-            app.config['GOOGLE_API_KEY'] = settings.api_key
-            app.config['OPENAI_API_KEY'] = settings.api_key
-            if settings.api_key:
-                logging.info("Loaded API key from settings")
-            else:
-                logging.info("API key is empty in settings, using env var or default")
-
-        # Load model settings
-        if settings.text_model:
-            app.config['TEXT_MODEL'] = settings.text_model
-            logging.info(f"Loaded TEXT_MODEL from settings: {settings.text_model}")
-        if settings.image_model:
-            app.config['IMAGE_MODEL'] = settings.image_model
-            logging.info(f"Loaded IMAGE_MODEL from settings: {settings.image_model}")
-        if settings.image_caption_model:
-            app.config['IMAGE_CAPTION_MODEL'] = settings.image_caption_model
-            logging.info(f"Loaded IMAGE_CAPTION_MODEL from settings: {settings.image_caption_model}")
-
-        # Load Docling settings
-        if settings.docling_api_base:
-            app.config['DOCLING_API_BASE'] = settings.docling_api_base
-            logging.info(f"Loaded DOCLING_API_BASE from settings: {settings.docling_api_base}")
-        if settings.docling_ocr_engine:
-            app.config['DOCLING_OCR_ENGINE'] = settings.docling_ocr_engine
-            logging.info(f"Loaded DOCLING_OCR_ENGINE from settings: {settings.docling_ocr_engine}")
-
-        # Load image generation settings
-        app.config['DEFAULT_RESOLUTION'] = settings.image_resolution
-        app.config['DEFAULT_ASPECT_RATIO'] = settings.image_aspect_ratio
-        logging.info(f"Loaded image settings: {settings.image_resolution}, {settings.image_aspect_ratio}")
-
-        # Load worker settings
-        app.config['MAX_DESCRIPTION_WORKERS'] = settings.max_description_workers
-        app.config['MAX_IMAGE_WORKERS'] = settings.max_image_workers
-        app.config['MAX_TASK_WORKERS'] = settings.max_task_workers
-        logging.info(f"Loaded worker settings: desc={settings.max_description_workers}, img={settings.max_image_workers}, task={settings.max_task_workers}")
-
-    except Exception as e:
-        logging.warning(f"Could not load settings from database: {e}")
-
-
 # Create app instance
 app = create_app()
 
@@ -0,0 +1,171 @@
+"""
+Application core - shared bootstrap for the web server and background worker
+
+加载环境变量、配置、数据库和日志，不注册任何 blueprint。
+Web 入口（app.py）和后台工作进程入口（worker.py）都基于 create_base_app() 构建。
+"""
+import os
+import sys
+import logging
+from pathlib import Path
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import sqlite3
+
+# Load environment variables from project root .env file
+_project_root = Path(__file__).parent.parent
+_env_file = _project_root / '.env'
+load_dotenv(dotenv_path=_env_file, override=True)
+
+from flask import Flask
+from models import db
+from config import Config
+
+
+# Enable SQLite WAL mode for all connections
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragma(dbapi_conn, connection_record):
+    """
+    Enable WAL mode and related PRAGMAs for each SQLite connection.
+    Registered once at import time to avoid duplicate handlers when
+    create_base_app() is called multiple times.
+    """
+    # Only apply to SQLite connections
+    if not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=30000")  # 30 seconds timeout
+    finally:
+        cursor.close()
+
+
+def create_base_app(import_name: str = __name__):
+    """
+    Create a Flask app with configuration, logging and database initialized
+
+    Args:
+        import_name: Flask import name (the web entry point passes its own module name)
+    """
+    app = Flask(import_name)
+    
+    # Load configuration from Config class
+    app.config.from_object(Config)
+    
+    # Override with environment-specific paths (use absolute path)
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    instance_dir = os.path.join(backend_dir, 'instance')
+    os.makedirs(instance_dir, exist_ok=True)
+    
+    db_path = os.path.join(instance_dir, 'database.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    
+    # Ensure upload folder exists
+    project_root = os.path.dirname(backend_dir)
+    upload_folder = os.path.join(project_root, 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    app.config['UPLOAD_FOLDER'] = upload_folder
+    
+    # Initialize logging (log to stdout so Docker can capture it)
+    log_level = getattr(logging, app.config['LOG_LEVEL'], logging.INFO)
+
+    # 强制重新配置 root logger（解决 Flask reloader 子进程日志问题）
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level)
+
+    # 清除现有 handlers 并添加新的
+    if not root_logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setLevel(log_level)
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s - %(message)s"))
+        root_logger.addHandler(handler)
+    
+    # 设置第三方库的日志级别，避免过多的DEBUG日志
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+    logging.getLogger('httpcore').setLevel(logging.WARNING)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.INFO)  # Flask开发服务器日志保持INFO
+
+    # Initialize database
+    db.init_app(app)
+
+    with app.app_context():
+        # Load settings from database and sync to app.config
+        load_settings_to_config(app)
+
+    # 页面级 AI 调用的全局公平调度器（进程内共享）
+    from services.ai_scheduler import configure_ai_scheduler
+    configure_ai_scheduler(app)
+
+    return app
+
+
+def load_settings_to_config(app):
+    """Load settings from database and apply to app.config on startup"""
+    from models import Settings
+    try:
+        settings = Settings.get_settings()
+        
+        # Load AI provider format (always sync, has default value)
+        if settings.ai_provider_format:
+            app.config['AI_PROVIDER_FORMAT'] = settings.ai_provider_format
+            logging.info(f"Loaded AI_PROVIDER_FORMAT from settings: {settings.ai_provider_format}")
+        
+        # Load API configuration
+        # Note: We load even if value is None/empty to allow clearing settings
+        # But we only log if there's an actual value
+        if settings.api_base_url is not None:
+            # 将数据库中的统一 API Base 同步到 Google/OpenAI 两个配置，确保覆盖环境变量
+            app.config['GOOGLE_API_BASE'] = settings.api_base_url
+            app.config['OPENAI_API_BASE'] = settings.api_base_url
+            if settings.api_base_url:
+                logging.info(f"Loaded API_BASE from settings: {settings.api_base_url}")
+            else:
+                logging.info("API_BASE is empty in settings, using env var or default")
+
+        if settings.api_key is not None:
+            # 同步到两个提供商的 key，数据库优先于环境变量
+            app.config['GOOGLE_API_KEY'] = settings.api_key
+            app.config['OPENAI_API_KEY'] = settings.api_key
+            if settings.api_key:
+                logging.info("Loaded API key from settings")
+            else:
+                logging.info("API key is empty in settings, using env var or default")
+
+        # Load model settings
+        if settings.text_model:
+            app.config['TEXT_MODEL'] = settings.text_model
+            logging.info(f"Loaded TEXT_MODEL from settings: {settings.text_model}")
+        if settings.image_model:
+            app.config['IMAGE_MODEL'] = settings.image_model
+            logging.info(f"Loaded IMAGE_MODEL from settings: {settings.image_model}")
+        if settings.image_caption_model:
+            app.config['IMAGE_CAPTION_MODEL'] = settings.image_caption_model
+            logging.info(f"Loaded IMAGE_CAPTION_MODEL from settings: {settings.image_caption_model}")
+
+        # Load Docling settings
+        if settings.docling_api_base:
+            app.config['DOCLING_API_BASE'] = settings.docling_api_base
+            logging.info(f"Loaded DOCLING_API_BASE from settings: {settings.docling_api_base}")
+        if settings.docling_ocr_engine:
+            app.config['DOCLING_OCR_ENGINE'] = settings.docling_ocr_engine
+            logging.info(f"Loaded DOCLING_OCR_ENGINE from settings: {settings.docling_ocr_engine}")
+
+        # Load image generation settings
+        app.config['DEFAULT_RESOLUTION'] = settings.image_resolution
+        app.config['DEFAULT_ASPECT_RATIO'] = settings.image_aspect_ratio
+        logging.info(f"Loaded image settings: {settings.image_resolution}, {settings.image_aspect_ratio}")
+
+        # Load worker settings
+        app.config['MAX_DESCRIPTION_WORKERS'] = settings.max_description_workers
+        app.config['MAX_IMAGE_WORKERS'] = settings.max_image_workers
+        app.config['MAX_TASK_WORKERS'] = settings.max_task_workers
+        logging.info(f"Loaded worker settings: desc={settings.max_description_workers}, img={settings.max_image_workers}, task={settings.max_task_workers}")
+
+    except Exception as e:
+        logging.warning(f"Could not load settings from database: {e}")
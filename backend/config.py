@@ -40,6 +40,17 @@ class Config:
     MAX_CONTENT_LENGTH = 200 * 1024 * 1024  # 200MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     ALLOWED_REFERENCE_FILE_EXTENSIONS = {'pdf', 'docx', 'pptx', 'doc', 'ppt', 'xlsx', 'xls', 'csv', 'txt', 'md'}
+
+    # 文件存储后端：local（仅上传目录）或 s3（S3 兼容对象存储，上传目录作为本地工作副本）
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local').lower()
+    S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL', '')  # 如 http://minio:9000，留空使用 AWS S3
+    S3_BUCKET = os.getenv('S3_BUCKET', '')
+    S3_ACCESS_KEY_ID = os.getenv('S3_ACCESS_KEY_ID', '')
+    S3_SECRET_ACCESS_KEY = os.getenv('S3_SECRET_ACCESS_KEY', '')
+    S3_REGION = os.getenv('S3_REGION', 'us-east-1')
+    S3_KEY_PREFIX = os.getenv('S3_KEY_PREFIX', '')  # 桶内的对象键前缀
+    S3_ADDRESSING_STYLE = os.getenv('S3_ADDRESSING_STYLE', 'path').lower()  # path: endpoint/bucket/key（MinIO）；virtual: bucket.endpoint/key
+    S3_PRESIGN_EXPIRES = int(os.getenv('S3_PRESIGN_EXPIRES', '3600'))  # 文件访问预签名 URL 有效期（秒）
     
     # AI服务配置
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY', '')
@@ -53,6 +64,13 @@ class Config:
     OPENAI_API_BASE = os.getenv('OPENAI_API_BASE', 'https://aihubmix.com/v1')
     OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '60.0'))
     OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '3'))
+
+    # AI Provider 共享 HTTP 连接池配置（按 API 地址复用 keep-alive 连接）
+    HTTP_POOL_MAX_CONNECTIONS = int(os.getenv('HTTP_POOL_MAX_CONNECTIONS', '20'))  # 每个 API 地址的最大连接数
+    HTTP_POOL_MAX_KEEPALIVE = int(os.getenv('HTTP_POOL_MAX_KEEPALIVE', '10'))  # 每个 API 地址保留的空闲连接数
+    HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_POOL_KEEPALIVE_EXPIRY', '30.0'))  # 空闲连接保留时间（秒）
+    # 启用 HTTP/2：默认关闭，h2 不在默认依赖中，需额外安装 pip install "httpx[http2]"
+    HTTP_CLIENT_HTTP2 = os.getenv('HTTP_CLIENT_HTTP2', 'false').lower() == 'true'
     
     # AI 模型配置
     TEXT_MODEL = os.getenv('TEXT_MODEL', 'gemini-3-flash-preview')
@@ -66,6 +84,13 @@ class Config:
     # 百度 OCR 配置（用于可编辑 PPT 导出）
     BAIDU_OCR_API_KEY = os.getenv('BAIDU_OCR_API_KEY', '')
     BAIDU_OCR_SECRET_KEY = os.getenv('BAIDU_OCR_SECRET_KEY', '')
+    PPT_CONVERT_WORKERS = int(os.getenv('PPT_CONVERT_WORKERS', '4'))  # 可编辑 PPT 转换时并行处理的页数（OCR / LLM 请求并发数）
+    CPU_POOL_WORKERS = int(os.getenv('CPU_POOL_WORKERS', '2'))  # 文字擦除等 CPU 密集型计算的进程池大小，0 表示在线程中直接执行
+    BAIDU_OCR_MAX_CONCURRENCY = int(os.getenv('BAIDU_OCR_MAX_CONCURRENCY', '4'))  # 进程内同时进行的百度 OCR 识别请求数（注意账户 QPS 限额）
+    OCR_CACHE_ENABLED = os.getenv('OCR_CACHE_ENABLED', 'true').lower() == 'true'  # 按图片内容哈希缓存 OCR 结果，图片未变化时重新导出不再识别
+    OCR_CACHE_PATH = os.getenv('OCR_CACHE_PATH', '')  # 留空时使用 backend/instance/ocr_cache/ 目录
+    OCR_CACHE_TTL = int(os.getenv('OCR_CACHE_TTL', str(30 * 24 * 3600)))  # 缓存条目有效期（秒）
+    OCR_CACHE_MAX_ENTRIES = int(os.getenv('OCR_CACHE_MAX_ENTRIES', '20000'))  # 最大条目数（每页图片一个条目）
     
     # 图片识别模型配置
     IMAGE_CAPTION_MODEL = os.getenv('IMAGE_CAPTION_MODEL', 'gemini-3-flash-preview')
@@ -73,6 +98,52 @@ class Config:
     # 并发配置
     MAX_DESCRIPTION_WORKERS = int(os.getenv('MAX_DESCRIPTION_WORKERS', '5'))
     MAX_IMAGE_WORKERS = int(os.getenv('MAX_IMAGE_WORKERS', '8'))
+
+    # AI 调用自适应限流配置（按 provider + 模型在进程内共享）
+    AI_RATE_LIMIT_ENABLED = os.getenv('AI_RATE_LIMIT_ENABLED', 'true').lower() == 'true'  # 是否启用限流与自适应并发
+    AI_TEXT_RPM = int(os.getenv('AI_TEXT_RPM', '0'))  # 文本生成每分钟请求数上限，0 表示不限制
+    AI_IMAGE_RPM = int(os.getenv('AI_IMAGE_RPM', '0'))  # 图片生成每分钟请求数上限，0 表示不限制
+    AI_TEXT_MAX_CONCURRENCY = int(os.getenv('AI_TEXT_MAX_CONCURRENCY', '16'))  # 文本生成并发上限（AIMD 增长的最大值）
+    AI_IMAGE_MAX_CONCURRENCY = int(os.getenv('AI_IMAGE_MAX_CONCURRENCY', '32'))  # 图片生成并发上限（AIMD 增长的最大值）
+    AI_CONCURRENCY_INITIAL = int(os.getenv('AI_CONCURRENCY_INITIAL', '0'))  # 初始并发数，0 表示沿用 MAX_DESCRIPTION_WORKERS / MAX_IMAGE_WORKERS
+    AI_CONCURRENCY_MIN = int(os.getenv('AI_CONCURRENCY_MIN', '1'))  # 遇到 429/5xx 限流时最低收缩到的并发数
+
+    # 页面级 AI 任务全局公平调度配置
+    AI_SCHEDULER_MAX_CONCURRENCY = int(os.getenv('AI_SCHEDULER_MAX_CONCURRENCY', '16'))  # 进程内同时执行的页面级 AI 调用总数
+    AI_SCHEDULER_LEVEL_WEIGHTS = os.getenv('AI_SCHEDULER_LEVEL_WEIGHTS', 'free:1,basic:2,premium:4')  # 各会员等级的调度权重
+
+    # 批量图片生成调度配置
+    IMAGE_PIPELINE_MODE = os.getenv('IMAGE_PIPELINE_MODE', 'async').lower()  # async: 事件循环并发调度；thread: 线程池（MAX_IMAGE_WORKERS）
+    IMAGE_ASYNC_MAX_IN_FLIGHT = int(os.getenv('IMAGE_ASYNC_MAX_IN_FLIGHT', '32'))  # async 模式下同时进行的图片生成数
+    REF_IMAGE_CACHE_MAX_MB = float(os.getenv('REF_IMAGE_CACHE_MAX_MB', '64'))  # 参考图（模板）编码结果缓存上限（MB），0 表示不缓存
+    IMAGE_DERIVATIVES_ON_SAVE = os.getenv('IMAGE_DERIVATIVES_ON_SAVE', 'true').lower() == 'true'  # 保存页面图片时同时生成缩略图/预览图（否则首次请求时生成）
+
+    # 文本生成结果缓存（默认关闭：开启后相同提示词直接返回缓存结果，不再调用模型）
+    TEXT_CACHE_ENABLED = os.getenv('TEXT_CACHE_ENABLED', 'false').lower() == 'true'
+    TEXT_CACHE_BACKEND = os.getenv('TEXT_CACHE_BACKEND', 'sqlite').lower()  # sqlite: 独立缓存数据库；disk: 每个条目一个文件
+    TEXT_CACHE_PATH = os.getenv('TEXT_CACHE_PATH', '')  # 留空时使用 backend/instance/text_cache.db（或 text_cache/ 目录）
+    TEXT_CACHE_TTL = int(os.getenv('TEXT_CACHE_TTL', str(7 * 24 * 3600)))  # 缓存条目有效期（秒）
+    TEXT_CACHE_MAX_ENTRIES = int(os.getenv('TEXT_CACHE_MAX_ENTRIES', '5000'))  # 最大条目数，超出后淘汰最久未访问的条目
+
+    # 导出配置
+    EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '4'))  # 导出 PDF/PPTX 时并行处理页面图片的线程数
+    EXPORT_CACHE_MAX_PER_PROJECT = int(os.getenv('EXPORT_CACHE_MAX_PER_PROJECT', '4'))  # 每个项目每种格式保留的导出缓存文件数，0 表示不缓存
+    EXPORT_PRERENDER_ENABLED = os.getenv('EXPORT_PRERENDER_ENABLED', 'false').lower() == 'true'  # 图片全部生成后在后台预渲染 PPTX/PDF
+
+    # 持久化任务队列配置
+    TASK_QUEUE_BACKEND = os.getenv('TASK_QUEUE_BACKEND', 'sqlite')  # 队列后端，目前支持 sqlite
+    TASK_QUEUE_VISIBILITY_TIMEOUT = int(os.getenv('TASK_QUEUE_VISIBILITY_TIMEOUT', '120'))  # 租约超时（秒），超时未续约视为进程崩溃
+    TASK_QUEUE_POLL_INTERVAL = float(os.getenv('TASK_QUEUE_POLL_INTERVAL', '1.0'))  # 消费线程轮询间隔（秒）
+    TASK_QUEUE_MAX_ATTEMPTS = int(os.getenv('TASK_QUEUE_MAX_ATTEMPTS', '3'))  # 崩溃恢复时的最大领取次数
+    TASK_QUEUE_EMBEDDED_WORKER = os.getenv('TASK_QUEUE_EMBEDDED_WORKER', 'true').lower() == 'true'  # Web 进程内是否同时消费队列
+
+    # 任务进度合并写入配置
+    TASK_PROGRESS_FLUSH_INTERVAL = float(os.getenv('TASK_PROGRESS_FLUSH_INTERVAL', '1.0'))  # 任务进度合并写入间隔（秒）
+    TASK_PROGRESS_BATCH_SIZE = int(os.getenv('TASK_PROGRESS_BATCH_SIZE', '5'))  # 缓冲页面数达到该值时立即写入
+
+    # 任务进度推送（SSE）配置
+    TASK_EVENTS_FALLBACK_INTERVAL = float(os.getenv('TASK_EVENTS_FALLBACK_INTERVAL', '3.0'))  # 无进程内事件时回退查询数据库的间隔（秒）
+    TASK_EVENTS_KEEPALIVE_INTERVAL = float(os.getenv('TASK_EVENTS_KEEPALIVE_INTERVAL', '15.0'))  # 空闲保活间隔（秒）
     
     # 图片生成配置
     DEFAULT_ASPECT_RATIO = "16:9"
@@ -1,12 +1,14 @@
 """
 Export Controller - handles file export endpoints
 """
-from flask import Blueprint, request, current_app
+from flask import Blueprint, request, current_app, g
 from models import db, Project, Page, Task
 from utils import error_response, not_found, bad_request, success_response
-from utils.auth import login_required, feature_required
+from utils.auth import login_required, feature_required, check_project_permission
 from services import ExportService, FileService, AIService
-from services.task_manager import task_manager, export_editable_ppt_task
+from services.task_manager import task_manager
+from services.task_events import task_event_stream_response
+from services.export_cache import EXPORT_BUILDERS, collect_export_images, export_with_cache
 import os
 import io
 import uuid
@@ -166,20 +168,14 @@ def export_pptx(project_id):
         if not project:
             return not_found('Project')
         
-        # Get all completed pages
-        pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        # Get all pages and their image paths
+        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        pages, page_image_paths = collect_export_images(project_id, file_service)
         
         if not pages:
             return bad_request("No pages found for project")
         
-        # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        
-        image_paths = []
-        for page in pages:
-            if page.generated_image_path:
-                abs_path = file_service.get_absolute_path(page.generated_image_path)
-                image_paths.append(abs_path)
+        image_paths = [page_image_paths[page.id] for page in pages if page.id in page_image_paths]
         
         if not image_paths:
             return bad_request("No generated images found for project")
@@ -196,8 +192,12 @@ def export_pptx(project_id):
 
         output_path = os.path.join(exports_dir, filename)
 
-        # Generate PPTX file on disk
-        ExportService.create_pptx_from_images(image_paths, output_file=output_path)
+        # Generate PPTX file on disk (reuse the cached export if no page image changed)
+        export_with_cache(
+            exports_dir, pages, page_image_paths, 'pptx', output_path,
+            lambda path: EXPORT_BUILDERS['pptx'](image_paths, path, None)
+        )
+        file_service.publish_file(output_path)
 
         # Build download URLs
         download_path = f"/files/{project_id}/exports/{filename}"
@@ -239,20 +239,14 @@ def export_pdf(project_id):
         if not project:
             return not_found('Project')
         
-        # Get all completed pages
-        pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        # Get all pages and their image paths
+        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+        pages, page_image_paths = collect_export_images(project_id, file_service)
         
         if not pages:
             return bad_request("No pages found for project")
         
-        # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        
-        image_paths = []
-        for page in pages:
-            if page.generated_image_path:
-                abs_path = file_service.get_absolute_path(page.generated_image_path)
-                image_paths.append(abs_path)
+        image_paths = [page_image_paths[page.id] for page in pages if page.id in page_image_paths]
         
         if not image_paths:
             return bad_request("No generated images found for project")
@@ -269,8 +263,12 @@ def export_pdf(project_id):
 
         output_path = os.path.join(exports_dir, filename)
 
-        # Generate PDF file on disk
-        ExportService.create_pdf_from_images(image_paths, output_file=output_path)
+        # Generate PDF file on disk (reuse the cached export if no page image changed)
+        export_with_cache(
+            exports_dir, pages, page_image_paths, 'pdf', output_path,
+            lambda path: EXPORT_BUILDERS['pdf'](image_paths, path, None)
+        )
+        file_service.publish_file(output_path)
 
         # Build download URLs
         download_path = f"/files/{project_id}/exports/{filename}"
@@ -379,20 +377,16 @@ def export_editable_pptx(project_id):
             status='PENDING'
         )
         db.session.add(task)
-        db.session.commit()
 
-        # 提交后台任务
-        task_manager.submit_task(
-            task_id,
-            export_editable_ppt_task,
-            project_id=project_id,
-            image_paths=image_paths,
-            output_path=output_path,
-            api_key=api_key,
-            secret_key=secret_key,
-            reference_text=reference_text,
-            app=current_app._get_current_object()
-        )
+        # 提交持久化后台任务（OCR 密钥由工作进程从配置读取）
+        # 队列条目与 Task 在同一事务中提交，入队失败时一起回滚
+        task_manager.enqueue_task(task_id, 'EXPORT_EDITABLE_PPTX', {
+            'project_id': project_id,
+            'image_paths': image_paths,
+            'output_path': output_path,
+            'reference_text': reference_text
+        }, commit=False)
+        db.session.commit()
 
         return success_response(
             data={
@@ -403,6 +397,7 @@ def export_editable_pptx(project_id):
         )
 
     except Exception as e:
+        db.session.rollback()
         return error_response('SERVER_ERROR', str(e), 500)
 
 
@@ -420,30 +415,78 @@ def get_editable_pptx_status(project_id, task_id):
         if not task or task.project_id != project_id:
             return not_found('Task')
 
-        progress = task.get_progress() or {}
+        response_data = _build_editable_pptx_status(
+            project_id, task_id, task.status,
+            task.get_progress() or {}, task.error_message
+        )
 
-        response_data = {
-            "task_id": task_id,
-            "status": task.status,
-            "progress": progress
-        }
+        return success_response(data=response_data)
 
-        if task.status == 'COMPLETED':
-            output_path = progress.get('output_path', '')
-            if output_path:
-                filename = os.path.basename(output_path)
-                download_path = f"/files/{project_id}/exports/{filename}"
-                base_url = request.url_root.rstrip("/")
-                response_data["download_url"] = download_path
-                response_data["download_url_absolute"] = (
-                    f"{base_url}{download_path}"
-                )
+    except Exception as e:
+        return error_response('SERVER_ERROR', str(e), 500)
 
-        elif task.status == 'FAILED':
-            response_data["error"] = task.error_message
 
-        return success_response(data=response_data)
+@export_bp.route('/<project_id>/export/editable-pptx/<task_id>/events', methods=['GET'])
+@login_required
+def stream_editable_pptx_status(project_id, task_id):
+    """
+    GET /api/projects/{project_id}/export/editable-pptx/{task_id}/events - 推送导出任务进度（SSE）
+
+    每个 `progress` 事件的 data 与 get_editable_pptx_status 返回的数据格式一致，
+    完成或失败后服务端关闭连接。
+    EventSource 无法设置请求头，可通过 ?token= 传递认证令牌。
+    """
+    try:
+        task = Task.query.get(task_id)
+
+        if not task or task.project_id != project_id:
+            return not_found('Task')
+
+        # 权限检查（通过项目）
+        project = Project.query.get(project_id)
+        if not project:
+            return not_found('Project')
+        if not check_project_permission(project, g.current_user):
+            return error_response('无权访问此任务', 403)
+
+        base_url = request.url_root.rstrip("/")
+
+        def transform(event):
+            return _build_editable_pptx_status(
+                project_id, task_id, event.get('status'),
+                event.get('progress') or {}, event.get('error_message'),
+                base_url=base_url
+            )
+
+        return task_event_stream_response(task_id, transform=transform)
 
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
 
+
+def _build_editable_pptx_status(project_id: str, task_id: str, status: str,
+                                progress: dict, error_message: str = None,
+                                base_url: str = None) -> dict:
+    """构建可编辑 PPT 导出任务的状态数据（完成时附带下载链接）"""
+    response_data = {
+        "task_id": task_id,
+        "status": status,
+        "progress": progress
+    }
+
+    if status == 'COMPLETED':
+        output_path = progress.get('output_path', '')
+        if output_path:
+            filename = os.path.basename(output_path)
+            download_path = f"/files/{project_id}/exports/{filename}"
+            base_url = base_url if base_url is not None else request.url_root.rstrip("/")
+            response_data["download_url"] = download_path
+            response_data["download_url_absolute"] = (
+                f"{base_url}{download_path}"
+            )
+
+    elif status == 'FAILED':
+        response_data["error"] = error_message
+
+    return response_data
+
@@ -1,17 +1,51 @@
 """
 File Controller - handles static file serving
 """
-from flask import Blueprint, send_from_directory, current_app, g
-from utils import error_response, not_found
+from flask import Blueprint, current_app, g, request, redirect
+from utils import error_response, not_found, bad_request
 from utils.path_utils import find_file_with_prefix
 from utils.auth import login_required, feature_required
 import os
 from pathlib import Path
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
+from services.file_service import FileService
+from services.image_derivatives import DERIVATIVE_SIZES, ensure_derivative
+from utils.http_cache import send_cached_file, is_versioned_filename
 
 file_bp = Blueprint('files', __name__, url_prefix='/files')
 
 
+def _remote_file_service():
+    """使用远程存储时返回 FileService，本地存储返回 None"""
+    file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+    return file_service if file_service.storage.is_remote else None
+
+
+def _storage_key(*parts: str):
+    """拼接对象存储键，拒绝 .. 等越界路径（返回 None）"""
+    joined = safe_join('.', *parts)
+    return joined[2:] if joined else None
+
+
+def _redirect_to_storage(file_service: FileService, *parts: str, download: bool = False):
+    """
+    重定向到对象存储的预签名 URL，文件由对象存储直接提供（不经过应用进程）
+
+    Args:
+        parts: Key components (joined safely, rejecting path traversal)
+        download: Ask the browser to download the file (Content-Disposition: attachment)
+    """
+    key = _storage_key(*parts)
+    if key is None:
+        return not_found('File')
+    url = file_service.storage.presigned_url(key, download_name=os.path.basename(key) if download else None)
+    response = redirect(url, code=302)
+    # 预签名 URL 会过期，重定向本身不缓存（对象内容的缓存由对象存储的 Cache-Control / ETag 控制）
+    response.cache_control.no_cache = True
+    return response
+
+
 @file_bp.route('/<project_id>/<file_type>/<filename>', methods=['GET'])
 def serve_file(project_id, file_type, filename):
     """
@@ -22,6 +56,9 @@ def serve_file(project_id, file_type, filename):
         file_type: 'template', 'pages', 'materials' or 'exports'
         filename: File name
 
+    Query params:
+        size: 仅 pages 类型，'thumb' / 'preview' 返回对应尺寸的 WebP 衍生图（不存在时按需生成）
+
     Note:
         - template/pages/materials: 公开访问（URL使用UUID，不可猜测）
         - exports: 需要高级会员权限（download）
@@ -41,6 +78,24 @@ def serve_file(project_id, file_type, filename):
             has_permission, error_msg = MembershipService.check_feature_permission(user, 'download')
             if not has_permission:
                 return error_response('PERMISSION_DENIED', error_msg or '需要高级会员才能下载导出文件', 403)
+
+        size = request.args.get('size')
+        if size and size != 'original' and file_type == 'pages' and size not in DERIVATIVE_SIZES:
+            return bad_request(f"Invalid size, expected one of: {', '.join(DERIVATIVE_SIZES)}")
+
+        file_service = _remote_file_service()
+        if file_service:
+            if file_type == 'pages' and size and size != 'original':
+                relative_path = _storage_key(project_id, file_type, filename)
+                if relative_path is None:
+                    return not_found('File')
+                try:
+                    derivative = file_service.get_derivative(relative_path, size)
+                except FileNotFoundError:
+                    return not_found('File')
+                return _redirect_to_storage(file_service, derivative)
+            return _redirect_to_storage(file_service, project_id, file_type, filename,
+                                        download=file_type == 'exports')
         
         # Construct file path
         file_dir = os.path.join(
@@ -57,9 +112,18 @@ def serve_file(project_id, file_type, filename):
         file_path = os.path.join(file_dir, filename)
         if not os.path.exists(file_path):
             return not_found('File')
+
+        # 页面图片的缩略图 / 预览图
+        if file_type == 'pages' and size and size != 'original':
+            derivative = ensure_derivative(Path(file_path), size)
+            return send_cached_file(file_dir, derivative.name, immutable=is_versioned_filename(filename))
         
-        # Serve file
-        return send_from_directory(file_dir, filename)
+        # Serve file（带版本号的页面图片、素材永不改变；模板、导出文件可能被覆盖，需要验证）
+        return send_cached_file(
+            file_dir, filename,
+            immutable=file_type in ('pages', 'materials') and is_versioned_filename(filename),
+            private=file_type == 'exports'
+        )
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -75,6 +139,10 @@ def serve_user_template(template_id, filename):
         filename: File name
     """
     try:
+        file_service = _remote_file_service()
+        if file_service:
+            return _redirect_to_storage(file_service, 'user-templates', template_id, filename)
+
         # Construct file path
         file_dir = os.path.join(
             current_app.config['UPLOAD_FOLDER'],
@@ -91,8 +159,8 @@ def serve_user_template(template_id, filename):
         if not os.path.exists(file_path):
             return not_found('File')
         
-        # Serve file
-        return send_from_directory(file_dir, filename)
+        # Serve file（模板图片可被替换，使用 ETag 验证）
+        return send_cached_file(file_dir, filename)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -108,6 +176,10 @@ def serve_global_material(filename):
     """
     try:
         safe_filename = secure_filename(filename)
+        file_service = _remote_file_service()
+        if file_service:
+            return _redirect_to_storage(file_service, 'materials', safe_filename)
+
         # Construct file path
         file_dir = os.path.join(
             current_app.config['UPLOAD_FOLDER'],
@@ -124,7 +196,7 @@ def serve_global_material(filename):
             return not_found('File')
         
         # Serve file
-        return send_from_directory(file_dir, safe_filename)
+        return send_cached_file(file_dir, safe_filename, immutable=is_versioned_filename(safe_filename))
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -171,7 +243,8 @@ def serve_mineru_file(extract_id, filepath):
             except Exception:
                 return error_response('INVALID_PATH', 'Invalid file path', 403)
 
-            return send_from_directory(str(matched_path.parent), matched_path.name)
+            # 解析结果按 extract_id 存放，生成后不再改变
+            return send_cached_file(str(matched_path.parent), matched_path.name, immutable=True)
 
         return not_found('File')
     except Exception as e:
@@ -205,7 +278,8 @@ def serve_docling_file(extract_id, filepath):
 
         # Check if file exists
         if full_path.exists():
-            return send_from_directory(str(full_path.parent), full_path.name)
+            # 解析结果按 extract_id 存放，生成后不再改变
+            return send_cached_file(str(full_path.parent), full_path.name, immutable=True)
 
         return not_found('File')
     except Exception as e:
@@ -227,6 +301,10 @@ def serve_tools_export(filename):
     """
     try:
         safe_filename = secure_filename(filename)
+        file_service = _remote_file_service()
+        if file_service:
+            return _redirect_to_storage(file_service, 'tools', 'exports', safe_filename, download=True)
+
         file_dir = os.path.join(
             current_app.config['UPLOAD_FOLDER'],
             'tools',
@@ -240,7 +318,7 @@ def serve_tools_export(filename):
         if not os.path.exists(file_path):
             return not_found('File')
 
-        return send_from_directory(file_dir, safe_filename)
+        return send_cached_file(file_dir, safe_filename, private=True)
 
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
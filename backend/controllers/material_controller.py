@@ -117,6 +117,7 @@ def _save_material_file(file, target_project_id: Optional[str]):
 
     filepath = materials_dir / unique_filename
     file.save(str(filepath))
+    file_service.publish_file(filepath)
 
     relative_path = str(filepath.relative_to(file_service.upload_folder))
     if target_project_id:
@@ -364,7 +365,7 @@ def delete_material(material_id):
             return not_found('Material')
 
         file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        material_path = Path(file_service.get_absolute_path(material.relative_path))
+        relative_path = material.relative_path
 
         # First, delete the database record to ensure data consistency
         db.session.delete(material)
@@ -373,10 +374,9 @@ def delete_material(material_id):
         # Then, attempt to delete the file. If this fails, log the error
         # but still return a success response. This leaves an orphan file,
         try:
-            if material_path.exists():
-                material_path.unlink(missing_ok=True)
-        except OSError as e:
-            current_app.logger.warning(f"Failed to delete file for material {material_id} at {material_path}: {e}")
+            file_service.delete_file(relative_path)
+        except Exception as e:
+            current_app.logger.warning(f"Failed to delete file for material {material_id} at {relative_path}: {e}")
 
         return success_response({"id": material_id})
     except Exception as e:
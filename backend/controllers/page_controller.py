@@ -5,7 +5,7 @@ import logging
 from flask import Blueprint, request, current_app, g
 from models import db, Project, Page, PageImageVersion, Task
 from utils import success_response, error_response, not_found, bad_request, login_required
-from utils.auth import feature_required
+from utils.auth import feature_required, check_project_permission
 from services import AIService, FileService, ProjectContext
 from services.task_manager import task_manager, generate_single_page_image_task, edit_page_image_task
 from datetime import datetime
@@ -20,13 +20,6 @@ logger = logging.getLogger(__name__)
 page_bp = Blueprint('pages', __name__, url_prefix='/api/projects')
 
 
-def _check_project_permission(project: Project, user) -> bool:
-    """检查用户是否有权限访问项目"""
-    if user.role == 'admin':
-        return True
-    return project.user_id == user.id
-
-
 @page_bp.route('/<project_id>/pages', methods=['POST'])
 @login_required
 def create_page(project_id):
@@ -47,7 +40,7 @@ def create_page(project_id):
             return not_found('Project')
 
         # 权限检查
-        if not _check_project_permission(project, g.current_user):
+        if not check_project_permission(project, g.current_user):
             return error_response('无权操作此项目', 403)
 
         data = request.get_json()
@@ -102,7 +95,7 @@ def delete_page(project_id, page_id):
 
         # 权限检查
         project = Project.query.get(project_id)
-        if project and not _check_project_permission(project, g.current_user):
+        if project and not check_project_permission(project, g.current_user):
             return error_response('无权操作此项目', 403)
 
         # Delete page image if exists
@@ -145,7 +138,7 @@ def update_page_outline(project_id, page_id):
 
         # 权限检查
         project = Project.query.get(project_id)
-        if project and not _check_project_permission(project, g.current_user):
+        if project and not check_project_permission(project, g.current_user):
             return error_response('无权操作此项目', 403)
 
         data = request.get_json()
@@ -193,7 +186,7 @@ def update_page_description(project_id, page_id):
 
         # 权限检查
         project = Project.query.get(project_id)
-        if project and not _check_project_permission(project, g.current_user):
+        if project and not check_project_permission(project, g.current_user):
             return error_response('无权操作此项目', 403)
 
         data = request.get_json()
@@ -240,7 +233,7 @@ def generate_page_description(project_id, page_id):
             return not_found('Project')
 
         # 权限检查
-        if not _check_project_permission(project, g.current_user):
+        if not check_project_permission(project, g.current_user):
             return error_response('无权操作此项目', 403)
 
         data = request.get_json() or {}
@@ -331,7 +324,7 @@ def generate_page_image(project_id, page_id):
             return not_found('Project')
 
         # 权限检查
-        if not _check_project_permission(project, g.current_user):
+        if not check_project_permission(project, g.current_user):
             return error_response('无权操作此项目', 403)
 
         data = request.get_json() or {}
@@ -518,7 +511,7 @@ def edit_page_image(project_id, page_id):
             return not_found('Project')
 
         # 权限检查
-        if not _check_project_permission(project, g.current_user):
+        if not check_project_permission(project, g.current_user):
             return error_response('无权操作此项目', 403)
 
         # Initialize services
@@ -675,7 +668,7 @@ def get_page_image_versions(project_id, page_id):
 
         # 权限检查
         project = Project.query.get(project_id)
-        if project and not _check_project_permission(project, g.current_user):
+        if project and not check_project_permission(project, g.current_user):
             return error_response('无权访问此项目', 403)
 
         versions = PageImageVersion.query.filter_by(page_id=page_id)\
@@ -704,7 +697,7 @@ def set_current_image_version(project_id, page_id, version_id):
 
         # 权限检查
         project = Project.query.get(project_id)
-        if project and not _check_project_permission(project, g.current_user):
+        if project and not check_project_permission(project, g.current_user):
             return error_response('无权操作此项目', 403)
 
         version = PageImageVersion.query.get(version_id)
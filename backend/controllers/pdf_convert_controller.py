@@ -58,6 +58,7 @@ def _pdf_to_pptx_task(
             )
 
             if result.success:
+                FileService(app.config['UPLOAD_FOLDER']).publish_file(result.output_path)
                 task.status = 'COMPLETED'
                 task.set_progress({
                     'output_path': str(result.output_path),
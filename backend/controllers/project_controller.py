@@ -5,9 +5,10 @@ import logging
 from flask import Blueprint, request, jsonify, current_app, g
 from models import db, Project, Page, Task, ReferenceFile
 from utils import success_response, error_response, not_found, bad_request, login_required
-from utils.auth import feature_required
+from utils.auth import feature_required, check_project_permission
 from services import AIService, ProjectContext
-from services.task_manager import task_manager, generate_descriptions_task, generate_images_task
+from services.task_manager import task_manager
+from services.task_events import task_event_stream_response
 from services.membership_service import MembershipService
 import json
 import traceback
@@ -18,37 +19,6 @@ logger = logging.getLogger(__name__)
 project_bp = Blueprint('projects', __name__, url_prefix='/api/projects')
 
 
-def _check_project_permission(project: Project, user, write_access: bool = False) -> bool:
-    """
-    检查用户是否有权限访问项目
-
-    Args:
-        project: 项目对象
-        user: 当前用户
-        write_access: 是否需要写权限（修改项目内容）
-
-    Returns:
-        bool: 是否有权限
-
-    权限规则：
-    - 管理员可以查看和删除所有项目，但不能修改其他用户的项目
-    - 普通用户只能访问自己的项目
-    """
-    # 项目所有者拥有所有权限
-    if project.user_id == user.id:
-        return True
-
-    # 管理员权限检查
-    if user.role == 'admin':
-        # 管理员需要写权限时，只能操作自己的项目
-        if write_access:
-            return False
-        # 管理员可以查看和删除其他用户的项目
-        return True
-
-    return False
-
-
 def _get_project_reference_files_content(project_id: str) -> list:
     """
     Get reference files content for a project
@@ -248,7 +218,7 @@ def get_project(project_id):
             return not_found('Project')
 
         # 权限检查
-        if not _check_project_permission(project, g.current_user):
+        if not check_project_permission(project, g.current_user):
             return error_response('无权访问此项目', 403)
 
         return success_response(project.to_dict(include_pages=True))
@@ -276,7 +246,7 @@ def update_project(project_id):
             return not_found('Project')
 
         # 权限检查（需要写权限）
-        if not _check_project_permission(project, g.current_user, write_access=True):
+        if not check_project_permission(project, g.current_user, write_access=True):
             return error_response('无权修改此项目', 403)
 
         data = request.get_json()
@@ -320,7 +290,7 @@ def delete_project(project_id):
             return not_found('Project')
 
         # 权限检查
-        if not _check_project_permission(project, g.current_user):
+        if not check_project_permission(project, g.current_user):
             return error_response('无权删除此项目', 403)
 
         # Delete project files
@@ -361,7 +331,7 @@ def generate_outline(project_id):
             return not_found('Project')
 
         # 权限检查（需要写权限）
-        if not _check_project_permission(project, g.current_user, write_access=True):
+        if not check_project_permission(project, g.current_user, write_access=True):
             return error_response('无权操作此项目', 403)
 
         # Initialize AI service
@@ -487,7 +457,7 @@ def generate_from_description(project_id):
             return not_found('Project')
 
         # 权限检查（需要写权限）
-        if not _check_project_permission(project, g.current_user, write_access=True):
+        if not check_project_permission(project, g.current_user, write_access=True):
             return error_response('无权操作此项目', 403)
 
         if project.creation_type != 'descriptions':
@@ -614,7 +584,7 @@ def generate_descriptions(project_id):
             return not_found('Project')
 
         # 权限检查（需要写权限）
-        if not _check_project_permission(project, g.current_user, write_access=True):
+        if not check_project_permission(project, g.current_user, write_access=True):
             return error_response('无权操作此项目', 403)
 
         if project.status not in ['OUTLINE_GENERATED', 'DRAFT', 'DESCRIPTIONS_GENERATED']:
@@ -650,33 +620,24 @@ def generate_descriptions(project_id):
         })
         
         db.session.add(task)
-        db.session.commit()
-        
-        # Initialize AI service
-        ai_service = AIService()
         
         # Get reference files content and create project context
         reference_files_content = _get_project_reference_files_content(project_id)
         project_context = ProjectContext(project, reference_files_content)
         
-        # Get app instance for background task
-        app = current_app._get_current_object()
-        
-        # Submit background task
-        task_manager.submit_task(
-            task.id,
-            generate_descriptions_task,
-            project_id,
-            ai_service,
-            project_context,
-            outline,
-            max_workers,
-            app,
-            language
-        )
-        
         # Update project status
         project.status = 'GENERATING_DESCRIPTIONS'
+        db.session.flush()
+        
+        # Submit durable background task (AI service is rebuilt by the worker)
+        # 队列条目与 Task、项目状态在同一事务中提交，入队失败时一起回滚
+        task_manager.enqueue_task(task.id, 'GENERATE_DESCRIPTIONS', {
+            'project_id': project_id,
+            'project_context': project_context.to_dict(),
+            'outline': outline,
+            'max_workers': max_workers,
+            'language': language
+        }, commit=False)
         db.session.commit()
         
         return success_response({
@@ -710,7 +671,7 @@ def generate_images(project_id):
             return not_found('Project')
 
         # 权限检查（需要写权限）
-        if not _check_project_permission(project, g.current_user, write_access=True):
+        if not check_project_permission(project, g.current_user, write_access=True):
             return error_response('无权操作此项目', 403)
 
         # if project.status not in ['DESCRIPTIONS_GENERATED', 'OUTLINE_GENERATED']:
@@ -756,36 +717,23 @@ def generate_images(project_id):
         })
         
         db.session.add(task)
-        db.session.commit()
-        
-        # Initialize services
-        ai_service = AIService()
-        
-        from services import FileService
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        
-        # Get app instance for background task
-        app = current_app._get_current_object()
-        
-        # Submit background task
-        task_manager.submit_task(
-            task.id,
-            generate_images_task,
-            project_id,
-            ai_service,
-            file_service,
-            outline,
-            use_template,
-            max_workers,
-            current_app.config['DEFAULT_ASPECT_RATIO'],
-            current_app.config['DEFAULT_RESOLUTION'],
-            app,
-            project.extra_requirements,
-            language
-        )
         
         # Update project status
         project.status = 'GENERATING_IMAGES'
+        db.session.flush()
+        
+        # Submit durable background task (AI/file services are rebuilt by the worker)
+        # 队列条目与 Task、项目状态在同一事务中提交，入队失败时一起回滚
+        task_manager.enqueue_task(task.id, 'GENERATE_IMAGES', {
+            'project_id': project_id,
+            'outline': outline,
+            'use_template': use_template,
+            'max_workers': max_workers,
+            'aspect_ratio': current_app.config['DEFAULT_ASPECT_RATIO'],
+            'resolution': current_app.config['DEFAULT_RESOLUTION'],
+            'extra_requirements': project.extra_requirements,
+            'language': language
+        }, commit=False)
         db.session.commit()
         
         return success_response({
@@ -813,7 +761,7 @@ def get_task_status(project_id, task_id):
 
         # 权限检查（通过项目）
         project = Project.query.get(project_id)
-        if project and not _check_project_permission(project, g.current_user):
+        if project and not check_project_permission(project, g.current_user):
             return error_response('无权访问此任务', 403)
 
         return success_response(task.to_dict())
@@ -822,6 +770,33 @@ def get_task_status(project_id, task_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+@project_bp.route('/<project_id>/tasks/<task_id>/events', methods=['GET'])
+@login_required
+def stream_task_status(project_id, task_id):
+    """
+    GET /api/projects/{project_id}/tasks/{task_id}/events - Stream task progress (Server-Sent Events)
+
+    每个 `progress` 事件的 data 与 get_task_status 返回的任务数据格式一致，
+    任务进入 COMPLETED/FAILED 后服务端关闭连接。
+    EventSource 无法设置请求头，可通过 ?token= 传递认证令牌。
+    """
+    try:
+        task = Task.query.get(task_id)
+
+        if not task or task.project_id != project_id:
+            return not_found('Task')
+
+        # 权限检查（通过项目）
+        project = Project.query.get(project_id)
+        if project and not check_project_permission(project, g.current_user):
+            return error_response('无权访问此任务', 403)
+
+        return task_event_stream_response(task_id)
+
+    except Exception as e:
+        return error_response('SERVER_ERROR', str(e), 500)
+
+
 @project_bp.route('/<project_id>/refine/outline', methods=['POST'])
 @login_required
 def refine_outline(project_id):
@@ -841,7 +816,7 @@ def refine_outline(project_id):
             return not_found('Project')
 
         # 权限检查（需要写权限）
-        if not _check_project_permission(project, g.current_user, write_access=True):
+        if not check_project_permission(project, g.current_user, write_access=True):
             return error_response('无权操作此项目', 403)
 
         data = request.get_json()
@@ -1000,7 +975,7 @@ def refine_descriptions(project_id):
             return not_found('Project')
 
         # 权限检查（需要写权限）
-        if not _check_project_permission(project, g.current_user, write_access=True):
+        if not check_project_permission(project, g.current_user, write_access=True):
             return error_response('无权操作此项目', 403)
 
         data = request.get_json()
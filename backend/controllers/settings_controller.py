@@ -248,6 +248,10 @@ def _sync_settings_to_config(settings: Settings):
         current_app.config.pop("GOOGLE_API_KEY", None)
         current_app.config.pop("OPENAI_API_KEY", None)
 
+    # API 配置可能已变更，丢弃按旧配置创建的 provider 实例
+    from services.ai_providers import clear_provider_cache
+    clear_provider_cache()
+
     # Sync image generation settings
     current_app.config["DEFAULT_RESOLUTION"] = settings.image_resolution
     current_app.config["DEFAULT_ASPECT_RATIO"] = settings.image_aspect_ratio
@@ -9,6 +9,7 @@ from utils import success_response, error_response, not_found, bad_request, allo
 from utils.auth import login_required, admin_required
 from services import FileService
 from datetime import datetime
+from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
@@ -101,7 +102,7 @@ def set_template_from_id(project_id):
 
         # 获取源文件路径
         file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        source_path = file_service.upload_folder / template.file_path
+        source_path = Path(file_service.get_absolute_path(template.file_path))
 
         if not source_path.exists():
             return error_response('FILE_NOT_FOUND', '模板文件不存在', 404)
@@ -113,6 +114,7 @@ def set_template_from_id(project_id):
         dest_path = template_dir / dest_filename
 
         shutil.copy2(str(source_path), str(dest_path))
+        file_service.publish_file(dest_path)
 
         # 更新项目
         project.template_image_path = dest_path.relative_to(file_service.upload_folder).as_posix()
@@ -562,6 +564,10 @@ def admin_copy_user_template_to_preset(template_id):
 
         new_template_id = str(uuid.uuid4())
         upload_folder = current_app.config['UPLOAD_FOLDER']
+        file_service = FileService(upload_folder)
+        if source_template.file_path:
+            # 远程存储时确保源文件在本地
+            file_service.get_absolute_path(source_template.file_path)
 
         # 复制文件
         source_dir = os.path.join(upload_folder, 'user-templates', template_id)
@@ -585,6 +591,7 @@ def admin_copy_user_template_to_preset(template_id):
             os.path.join(source_dir, source_file),
             os.path.join(target_dir, new_filename)
         )
+        file_service.publish_file(os.path.join(target_dir, new_filename))
 
         # 创建新的预设模板记录
         new_file_path = f"user-templates/{new_template_id}/{new_filename}"
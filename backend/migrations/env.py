@@ -8,6 +8,9 @@ from sqlalchemy import engine_from_config, pool
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# 迁移过程中不需要启动任务队列消费线程（queue_jobs 表可能尚未创建）
+os.environ.setdefault('TASK_QUEUE_EMBEDDED_WORKER', 'false')
+
 from app import create_app
 from models import db
 
@@ -0,0 +1,50 @@
+"""add queue_jobs table for durable task queue
+
+Revision ID: 009_add_queue_jobs
+Revises: 83e81f229eea
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_queue_jobs'
+down_revision = '83e81f229eea'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """创建 queue_jobs 表（持久化任务队列）"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    if 'queue_jobs' not in inspector.get_table_names():
+        op.create_table(
+            'queue_jobs',
+            sa.Column('id', sa.String(36), primary_key=True),
+            sa.Column('task_id', sa.String(36), nullable=True, index=True),
+            sa.Column('job_type', sa.String(50), nullable=False),
+            sa.Column('payload', sa.Text, nullable=True),
+            sa.Column('status', sa.String(20), nullable=False, server_default='QUEUED', index=True),
+            sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('max_attempts', sa.Integer, nullable=False, server_default='3'),
+            sa.Column('lease_owner', sa.String(100), nullable=True),
+            sa.Column('lease_expires_at', sa.DateTime, nullable=True, index=True),
+            sa.Column('available_at', sa.DateTime, nullable=False),
+            sa.Column('last_error', sa.Text, nullable=True),
+            sa.Column('created_at', sa.DateTime, nullable=False),
+            sa.Column('updated_at', sa.DateTime, nullable=False)
+        )
+
+
+def downgrade() -> None:
+    """删除 queue_jobs 表"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    if 'queue_jobs' in inspector.get_table_names():
+        op.drop_table('queue_jobs')
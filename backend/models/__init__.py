@@ -28,6 +28,7 @@ from .order import Order
 from .project import Project
 from .page import Page
 from .task import Task
+from .queue_job import QueueJob
 from .user_template import UserTemplate
 from .page_image_version import PageImageVersion
 from .material import Material
@@ -39,7 +40,7 @@ __all__ = [
     'db',
     'User', 'AuditLog', 'SystemConfig', 'VerificationCode',
     'MembershipPlan', 'FeaturePermission', 'Order',
-    'Project', 'Page', 'Task', 'UserTemplate',
+    'Project', 'Page', 'Task', 'QueueJob', 'UserTemplate',
     'PageImageVersion', 'Material', 'ReferenceFile', 'Settings',
     'Notification'
 ]
@@ -0,0 +1,63 @@
+"""
+QueueJob model - 持久化任务队列条目
+"""
+import uuid
+import json
+from datetime import datetime
+from . import db
+
+
+class QueueJob(db.Model):
+    """
+    持久化任务队列模型 - 后台任务的可恢复执行记录
+
+    状态流转: QUEUED -> LEASED -> DONE | FAILED
+    LEASED 状态的条目在租约过期后会被重新放回 QUEUED（崩溃恢复）
+    """
+    __tablename__ = 'queue_jobs'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    task_id = db.Column(db.String(36), nullable=True, index=True)  # 关联的 Task（不加外键，避免删除项目时级联冲突）
+    job_type = db.Column(db.String(50), nullable=False)  # GENERATE_DESCRIPTIONS|GENERATE_IMAGES|EXPORT_EDITABLE_PPTX
+    payload = db.Column(db.Text, nullable=True)  # JSON string，任务参数（必须可序列化）
+    status = db.Column(db.String(20), nullable=False, default='QUEUED', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # 已被领取的次数
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    lease_owner = db.Column(db.String(100), nullable=True)  # 持有租约的工作进程标识
+    lease_expires_at = db.Column(db.DateTime, nullable=True, index=True)  # 租约（可见性超时）到期时间
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # 最早可被领取的时间
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def get_payload(self):
+        """Parse payload from JSON string"""
+        if self.payload:
+            try:
+                return json.loads(self.payload)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+
+    def set_payload(self, data):
+        """Set payload as JSON string"""
+        self.payload = json.dumps(data, ensure_ascii=False) if data else None
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'task_id': self.task_id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'lease_owner': self.lease_owner,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __repr__(self):
+        return f'<QueueJob {self.id}: {self.job_type} - {self.status}>'
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+基准测试：图片型 PDF 转换的页面栅格化阶段
+
+对比旧流程与当前流程（不含 OCR 网络请求）：
+- 旧流程：逐页串行渲染并保存 PNG 到临时目录，OCR 前重新读取 PNG 编码为 JPEG，CPU 阶段再次读取 PNG
+- 新流程：页面区间在共享进程池中并行渲染，BGR 数组直接编码为 OCR 所需的 JPEG 并交给 CPU 阶段
+同时对比图片型 PDF 检测（前 3 页）：parse_page（提取图片数据）与 is_image_page（只读取图片位置）。
+
+测试 PDF 为合成的扫描件：每页一张全页 JPEG 图片。
+
+用法：
+    python scripts/benchmark_pdf_rasterize.py [--pages 40] [--workers 4]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_scanned_pdf(path: Path, pages: int, seed: int = 0):
+    """每页一张 2400x1350 的全页 JPEG（渐变 + 噪声 + 文字），模拟扫描 / 导出的图片型 PDF"""
+    import fitz
+
+    rng = np.random.default_rng(seed)
+    doc = fitz.open()
+    for i in range(pages):
+        image = np.linspace(40, 230, 2400, dtype=np.float32)[None, :, None].repeat(1350, axis=0).repeat(3, axis=2)
+        image += rng.normal(0, 12, image.shape)
+        image = np.clip(image, 0, 255).astype(np.uint8)
+        for line in range(8):
+            cv2.putText(image, f'Scanned page {i + 1} line {line + 1}', (120, 200 + line * 130),
+                        cv2.FONT_HERSHEY_SIMPLEX, 2.2, (20, 20, 20), 4)
+        ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        page = doc.new_page(width=960, height=540)
+        page.insert_image(page.rect, stream=data.tobytes())
+    doc.save(str(path))
+    doc.close()
+
+
+def detect_with_parse_page(pdf_path: Path) -> bool:
+    """旧实现：完整解析前 3 页（提取文本与图片数据）"""
+    from services.pdf_converter.parser import PDFParser
+
+    with PDFParser(pdf_path) as parser:
+        check_pages = min(3, parser.get_page_count())
+        image_pages = 0
+        for i in range(check_pages):
+            page_data = parser.parse_page(i)
+            if len(page_data.text_blocks) == 0 and len(page_data.images) > 0:
+                for img in page_data.images:
+                    x0, y0, x1, y1 = img.bbox
+                    if (x1 - x0) * (y1 - y0) > page_data.width * page_data.height * 0.5:
+                        image_pages += 1
+                        break
+        return image_pages >= check_pages * 0.5
+
+
+def old_pipeline(pdf_path: Path, ocr_client, dpi: int):
+    """旧流程：串行渲染 PNG -> OCR 前读取 PNG 编码 JPEG -> CPU 阶段读取 PNG"""
+    from services.pdf_converter.parser import PDFParser
+    from services.ppt_converter.utils.image_utils import load_image
+
+    temp_dir = Path(tempfile.mkdtemp(prefix='bench_old_'))
+    try:
+        with PDFParser(pdf_path) as parser:
+            paths = []
+            for page_num in range(parser.get_page_count()):
+                path = temp_dir / f"page_{page_num + 1:03d}.png"
+                parser.render_page_to_image(page_num, path, dpi=dpi)
+                paths.append(path)
+        payloads = [ocr_client._prepare_image(path) for path in paths]
+        images = [load_image(path) for path in paths]
+        return payloads, images
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def new_pipeline(pdf_path: Path, ocr_client, dpi: int, page_count: int):
+    """新流程：进程池并行渲染 -> 内存中编码 JPEG，数组直接用于 CPU 阶段"""
+    from services.pdf_converter.rasterizer import rasterize_pdf
+
+    pages = rasterize_pdf(pdf_path, page_count, dpi=dpi)
+    images = [page.load() for page in pages]
+    payloads = [ocr_client._prepare_image(image) for image in images]
+    return payloads, images
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图片型 PDF 栅格化基准测试')
+    parser.add_argument('--pages', type=int, default=40, help='PDF 页数')
+    parser.add_argument('--workers', type=int, default=4, help='进程池大小（CPU_POOL_WORKERS）')
+    parser.add_argument('--dpi', type=int, default=100, help='渲染分辨率')
+    args = parser.parse_args()
+
+    os.environ['CPU_POOL_WORKERS'] = str(args.workers)
+    from services.cpu_pool import get_cpu_pool
+    from services.pdf_converter.parser import PDFParser
+    from services.ppt_converter.baidu_ocr import BaiduOCRClient
+
+    ocr_client = BaiduOCRClient('benchmark', 'benchmark')
+    work_dir = Path(tempfile.mkdtemp(prefix='bench_pdf_'))
+    try:
+        pdf_path = work_dir / 'scanned.pdf'
+        make_scanned_pdf(pdf_path, args.pages)
+        print(f"测试 PDF: {args.pages} 页, {pdf_path.stat().st_size / 1024 / 1024:.1f} MB, "
+              f"进程池 {args.workers} 个进程, CPU {os.cpu_count()} 核")
+
+        # 启动进程池（不计入耗时）
+        if get_cpu_pool() is not None:
+            get_cpu_pool().submit(int).result()
+
+        start = time.perf_counter()
+        old_detect = detect_with_parse_page(pdf_path)
+        old_detect_time = time.perf_counter() - start
+        start = time.perf_counter()
+        with PDFParser(pdf_path) as pdf:
+            new_detect = sum(pdf.is_image_page(i) for i in range(min(3, pdf.get_page_count()))) >= 1.5
+        new_detect_time = time.perf_counter() - start
+        print(f"图片型检测: parse_page {old_detect_time * 1000:7.1f} ms | "
+              f"is_image_page {new_detect_time * 1000:6.1f} ms | 结果一致: {'是' if old_detect == new_detect else '否'}")
+
+        start = time.perf_counter()
+        old_payloads, old_images = old_pipeline(pdf_path, ocr_client, args.dpi)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_payloads, new_images = new_pipeline(pdf_path, ocr_client, args.dpi, args.pages)
+        new_time = time.perf_counter() - start
+
+        identical = all(np.array_equal(a, b) for a, b in zip(old_images, new_images))
+        same_ocr_input = all(a == b for a, b in zip(old_payloads, new_payloads))
+        print(f"栅格化 + OCR 输入准备: 旧流程 {old_time:6.2f} s | 新流程 {new_time:6.2f} s | "
+              f"加速 {old_time / new_time:5.1f}x")
+        print(f"页面像素一致: {'是' if identical else '否'} | OCR 输入一致: {'是' if same_ocr_input else '否'}")
+        if not identical:
+            sys.exit(1)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+基准测试：可编辑 PPT 导出的文字颜色提取（extract_text_colors）
+
+对比旧实现（每个文字块单独调用 sklearn KMeans，n_init=10）与当前的批量向量化实现：
+- 合成已知文字色 / 背景色的文字块（cv2.putText + 噪声，尺寸与字号随机）
+- 输出每页（--blocks 个文字块）耗时与加速比
+- 输出准确度：新旧实现之间、以及各自与真实文字色之间的 RGB 欧氏距离（均值 / P95 / 最大值）
+
+旧实现依赖 scikit-learn，仅在本脚本中导入。
+
+用法：
+    python scripts/benchmark_text_color.py [--blocks 40] [--pages 5] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ppt_converter.utils.color_utils import extract_text_colors
+
+
+def extract_text_color_kmeans(text_image, n_colors=2):
+    """旧实现：sklearn KMeans 聚类（作为对照）"""
+    from sklearn.cluster import KMeans
+
+    if text_image is None or text_image.size == 0:
+        return (0, 0, 0)
+
+    rgb_image = cv2.cvtColor(text_image, cv2.COLOR_BGR2RGB)
+    pixels = rgb_image.reshape(-1, 3).astype(np.float64)
+
+    if len(pixels) < n_colors:
+        avg = pixels.mean(axis=0).astype(int)
+        return (int(avg[0]), int(avg[1]), int(avg[2]))
+
+    kmeans = KMeans(n_clusters=n_colors, random_state=42, n_init=10)
+    labels = kmeans.fit_predict(pixels)
+    colors = kmeans.cluster_centers_.astype(int)
+    text_color = colors[np.argmin(np.bincount(labels, minlength=n_colors))]
+    return (int(text_color[0]), int(text_color[1]), int(text_color[2]))
+
+
+def make_blocks(n_blocks: int, seed: int = 0):
+    """合成文字块（BGR），返回 (文字块列表, 真实文字色列表（RGB）)"""
+    rng = np.random.default_rng(seed)
+    blocks, truths = [], []
+    for _ in range(n_blocks):
+        bh = int(rng.integers(18, 120))
+        bw = int(rng.integers(bh * 2, bh * 16))
+        bg = rng.integers(0, 256, 3)
+        fg = rng.integers(0, 256, 3)
+        # 保证文字与背景有足够对比度
+        while np.abs(fg.astype(int) - bg.astype(int)).sum() < 150:
+            fg = rng.integers(0, 256, 3)
+
+        block = np.empty((bh, bw, 3), dtype=np.uint8)
+        block[:] = bg
+        cv2.putText(block, 'Sample text', (2, bh - max(3, bh // 5)), cv2.FONT_HERSHEY_SIMPLEX,
+                    bh / 45, tuple(int(c) for c in fg), max(1, bh // 15), cv2.LINE_AA)
+        noise = rng.normal(0, 6, block.shape)
+        block = np.clip(block.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+        blocks.append(block)
+        truths.append(tuple(int(c) for c in fg[::-1]))
+    return blocks, truths
+
+
+def _distances(colors_a, colors_b) -> np.ndarray:
+    return np.linalg.norm(np.asarray(colors_a, float) - np.asarray(colors_b, float), axis=1)
+
+
+def _describe(distances: np.ndarray) -> str:
+    return (f"均值 {distances.mean():6.2f} | P95 {np.percentile(distances, 95):6.2f} | "
+            f"最大 {distances.max():6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文字颜色提取基准测试')
+    parser.add_argument('--blocks', type=int, default=40, help='每页文字块数量')
+    parser.add_argument('--pages', type=int, default=5, help='测试页数')
+    parser.add_argument('--repeat', type=int, default=3, help='每种实现重复次数（取最快一次）')
+    args = parser.parse_args()
+
+    old_colors, new_colors, truths = [], [], []
+    old_total = new_total = 0.0
+    for page in range(args.pages):
+        blocks, page_truths = make_blocks(args.blocks, seed=page)
+
+        old_time = new_time = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            page_old = [extract_text_color_kmeans(block) for block in blocks]
+            old_time = min(old_time, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            page_new = extract_text_colors(blocks)
+            new_time = min(new_time, time.perf_counter() - start)
+
+        print(f"第 {page + 1} 页 {args.blocks:>3} 个文字块: "
+              f"KMeans {old_time * 1000:8.1f} ms | 批量 {new_time * 1000:7.1f} ms | "
+              f"加速 {old_time / new_time:6.1f}x")
+        old_total += old_time
+        new_total += new_time
+        old_colors += page_old
+        new_colors += page_new
+        truths += page_truths
+
+    print(f"\n合计: KMeans {old_total * 1000:.1f} ms | 批量 {new_total * 1000:.1f} ms | "
+          f"加速 {old_total / new_total:.1f}x")
+    print(f"批量 vs KMeans  : {_describe(_distances(new_colors, old_colors))}")
+    print(f"KMeans vs 真实色: {_describe(_distances(old_colors, truths))}")
+    print(f"批量 vs 真实色  : {_describe(_distances(new_colors, truths))}")
+
+
+if __name__ == '__main__':
+    main()
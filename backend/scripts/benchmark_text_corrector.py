@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+基准测试：OCR 文本校正（TextCorrector）
+
+对比旧实现（每个 OCR 文本块与本页所有行、再与全部文本片段逐一做 SequenceMatcher 比较）
+与当前的 n-gram 索引实现：
+- 合成多页参考文本（##第N页 分隔），从中截取文本并模拟 OCR 错误（漏字、错字、截断），
+  另加入一部分与参考文本无关的 OCR 文本
+- 校验两者对每个文本块的校正结果一致，并输出总耗时与加速比
+
+用法：
+    python scripts/benchmark_text_corrector.py [--pages 60] [--lines 25] [--blocks 20]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ppt_converter.text_corrector import TextCorrector
+
+CHARSET = (
+    '人工智能时代的数据平台与模型训练推理服务架构设计方案市场分析用户增长产品规划'
+    '技术创新团队协作效率提升成本优化安全合规生态建设战略目标核心能力行业趋势'
+)
+
+
+def find_best_match_brute_force(corrector: TextCorrector, ocr_text: str, page_num=None):
+    """旧实现：逐一比较本页所有行与全部文本片段（作为对照）"""
+    if not ocr_text or len(ocr_text) < 2:
+        return None, 0.0
+
+    best_match = None
+    best_score = 0.0
+
+    def scan(refs):
+        nonlocal best_match, best_score
+        for ref_text in refs:
+            if ocr_text in ref_text:
+                return ref_text
+            if corrector._is_partial_match(ocr_text, ref_text):
+                score = len(ocr_text) / len(ref_text) + 0.3
+                if score > best_score:
+                    best_score = min(score, 0.95)
+                    best_match = ref_text
+            score = corrector._similarity(ocr_text, ref_text)
+            if score > best_score:
+                best_score = score
+                best_match = ref_text
+        return None
+
+    if page_num and page_num in corrector.pages_text:
+        exact = scan(corrector.pages_text[page_num])
+        if exact is not None:
+            return exact, 1.0
+    if best_score < corrector.similarity_threshold:
+        exact = scan(corrector.all_segments)
+        if exact is not None:
+            return exact, 1.0
+    return best_match, best_score
+
+
+def make_deck(pages: int, lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    for page in range(1, pages + 1):
+        parts.append(f'##第{page}页')
+        parts.append(f'页面标题：{"".join(rng.choices(CHARSET, k=rng.randint(4, 12)))}')
+        for _ in range(lines):
+            words = [''.join(rng.choices(CHARSET, k=rng.randint(4, 10))) for _ in range(rng.randint(1, 5))]
+            parts.append('- ' + '，'.join(words))
+    return '\n'.join(parts)
+
+
+def make_ocr_texts(corrector: TextCorrector, pages: int, blocks: int, seed: int = 0):
+    """返回 [(页码, OCR 文本)]"""
+    rng = random.Random(seed)
+    samples = []
+    for page in range(1, pages + 1):
+        lines = corrector.pages_text.get(page, [])
+        for _ in range(blocks):
+            if not lines or rng.random() < 0.15:
+                text = ''.join(rng.choices(CHARSET + 'ABCDEFG0123456789', k=rng.randint(3, 20)))
+            else:
+                chars = list(rng.choice(lines))
+                mode = rng.random()
+                if mode < 0.3 and len(chars) > 3:
+                    del chars[rng.randrange(len(chars))]  # 漏字
+                elif mode < 0.6:
+                    chars[rng.randrange(len(chars))] = rng.choice(CHARSET)  # 错字
+                elif mode < 0.8 and len(chars) > 6:
+                    start = rng.randrange(len(chars) // 2)
+                    chars = chars[start:start + rng.randint(3, len(chars) - start)]  # 截断
+                text = ''.join(chars)
+            # 少量文本块使用相邻页的页码（内容在本页找不到）
+            samples.append((page if rng.random() > 0.1 else page % pages + 1, text))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TextCorrector 基准测试')
+    parser.add_argument('--pages', type=int, default=60, help='参考文本页数')
+    parser.add_argument('--lines', type=int, default=25, help='每页参考文本行数')
+    parser.add_argument('--blocks', type=int, default=20, help='每页 OCR 文本块数量')
+    args = parser.parse_args()
+
+    reference_text = make_deck(args.pages, args.lines)
+    start = time.perf_counter()
+    corrector = TextCorrector(reference_text)
+    build_time = time.perf_counter() - start
+    samples = make_ocr_texts(corrector, args.pages, args.blocks)
+    print(f"参考文本 {args.pages} 页 / {len(corrector.all_segments)} 个片段，"
+          f"OCR 文本块 {len(samples)} 个，索引构建 {build_time * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    old_results = [find_best_match_brute_force(corrector, text, page) for page, text in samples]
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_results = [corrector._find_best_match(text, page) for page, text in samples]
+    new_time = time.perf_counter() - start
+
+    # 只比较会被采用的校正结果（低于阈值时不替换文本）
+    threshold = corrector.similarity_threshold
+    mismatches = sum(
+        1 for (old_match, old_score), (new_match, new_score) in zip(old_results, new_results)
+        if (old_score >= threshold or new_score >= threshold)
+        and (old_match, old_score) != (new_match, new_score)
+    )
+    corrected = sum(1 for _, score in new_results if score >= threshold)
+
+    print(f"逐一比较 {old_time * 1000:9.1f} ms | 索引 {new_time * 1000:7.1f} ms | "
+          f"加速 {old_time / new_time:6.1f}x | 校正 {corrected} 个 | 结果不一致 {mismatches} 个")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+基准测试：可编辑 PPT 导出的文字区域擦除（remove_text_regions）
+
+对比旧实现（每个文字框分配整图掩码并做整图 inpaint）与当前的局部修复实现：
+- 在渐变 + 噪声背景的合成幻灯片上放置若干文字框（部分贴边、相互重叠）
+- 默认把所有文字框视为非纯色背景，测量 inpaint 分支（--natural 使用实际的背景检测结果）
+- 校验两者输出逐像素一致，并输出每页耗时与加速比
+
+用法：
+    python scripts/benchmark_text_removal.py [--blocks 40] [--repeat 3] [--natural]
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ppt_converter.utils import image_utils
+from services.ppt_converter.utils.image_utils import remove_text_regions
+
+RESOLUTIONS = {
+    '1080p': (1920, 1080),
+    '2K': (2560, 1440),
+    '4K': (3840, 2160),
+}
+
+
+def remove_text_regions_full_frame(image, bboxes, padding=5, dynamic_padding=True):
+    """旧实现：每个非纯色文字框都对整张图片执行一次 inpaint（作为对照）"""
+    if not bboxes:
+        return image.copy()
+
+    result = image.copy()
+    h, w = image.shape[:2]
+
+    for bbox in bboxes:
+        x, y, bw, bh = bbox
+        actual_padding = max(3, min(15, int(bh * 0.15))) if dynamic_padding else padding
+
+        x1 = max(0, x - actual_padding)
+        y1 = max(0, y - actual_padding)
+        x2 = min(w, x + bw + actual_padding)
+        y2 = min(h, y + bh + actual_padding)
+
+        bg_color, is_solid = image_utils._detect_background_color(image, bbox)
+
+        if is_solid:
+            result[y1:y2, x1:x2] = bg_color
+        else:
+            cx1, cy1, cx2, cy2 = x1 + 2, y1 + 2, x2 - 2, y2 - 2
+            if cx2 > cx1 and cy2 > cy1:
+                result[cy1:cy2, cx1:cx2] = bg_color
+
+            edge_mask = np.zeros((h, w), dtype=np.uint8)
+            edge_mask[y1:y2, x1:x2] = 255
+            if cx2 > cx1 and cy2 > cy1:
+                edge_mask[cy1:cy2, cx1:cx2] = 0
+
+            if np.any(edge_mask):
+                result = cv2.inpaint(result, edge_mask, 3, cv2.INPAINT_TELEA)
+
+    return result
+
+
+def make_slide(width: int, height: int, n_blocks: int, seed: int = 0):
+    """合成非纯色背景的幻灯片与文字框（部分文字框贴边、相互重叠）"""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    vertical = np.linspace(0, 120, height, dtype=np.float32)[:, None, None]
+    image = gradient * np.array([0.6, 0.3, 0.9]) + vertical
+    image += rng.normal(0, 25, (height, width, 3))
+    image = np.clip(image, 0, 255).astype(np.uint8)
+
+    bboxes = []
+    for i in range(n_blocks):
+        bh = int(rng.integers(18, 90))
+        bw = int(rng.integers(80, width // 2))
+        x = int(rng.integers(0, width - bw)) if i % 7 else 0
+        y = int(rng.integers(0, height - bh)) if i % 9 else height - bh
+        cv2.putText(image, 'Sample text', (x, y + bh - 4), cv2.FONT_HERSHEY_SIMPLEX,
+                    bh / 40, (20, 20, 20), 2)
+        bboxes.append((x, y, bw, bh))
+    return image, bboxes
+
+
+def benchmark(name: str, width: int, height: int, n_blocks: int, repeat: int):
+    image, bboxes = make_slide(width, height, n_blocks)
+
+    def timed(func):
+        best, output = float('inf'), None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = func(image, bboxes)
+            best = min(best, time.perf_counter() - start)
+        return best, output
+
+    old_time, old_output = timed(remove_text_regions_full_frame)
+    new_time, new_output = timed(remove_text_regions)
+    identical = np.array_equal(old_output, new_output)
+
+    print(f"{name:>6} {width}x{height} {n_blocks:>3} 个文字框: "
+          f"整图 {old_time * 1000:8.1f} ms | 局部 {new_time * 1000:7.1f} ms | "
+          f"加速 {old_time / new_time:6.1f}x | 逐像素一致: {'是' if identical else '否'}")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description='remove_text_regions 基准测试')
+    parser.add_argument('--blocks', type=int, default=40, help='每页文字框数量')
+    parser.add_argument('--repeat', type=int, default=3, help='每种实现重复次数（取最快一次）')
+    parser.add_argument('--natural', action='store_true', help='使用实际的纯色背景检测（默认全部走 inpaint 分支）')
+    args = parser.parse_args()
+
+    if not args.natural:
+        detect = image_utils._detect_background_color
+        image_utils._detect_background_color = lambda image, bbox: (detect(image, bbox)[0], False)
+
+    all_identical = True
+    for name, (width, height) in RESOLUTIONS.items():
+        all_identical &= benchmark(name, width, height, args.blocks, args.repeat)
+
+    if not all_identical:
+        print("输出不一致！")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,20 +21,30 @@ Environment Variables:
         OPENAI_API_BASE: API base URL (e.g., https://aihubmix.com/v1)
 """
 import os
+import hashlib
 import logging
-from typing import Tuple, Type
+import threading
+from typing import Callable, Dict, Tuple, Type, TypeVar
 
 from .text import TextProvider, GenAITextProvider, OpenAITextProvider
 from .image import ImageProvider, GenAIImageProvider, OpenAIImageProvider, GrsaiImageProvider
+from .rate_limiter import with_rate_limit
 
 logger = logging.getLogger(__name__)
 
 __all__ = [
     'TextProvider', 'GenAITextProvider', 'OpenAITextProvider',
     'ImageProvider', 'GenAIImageProvider', 'OpenAIImageProvider', 'GrsaiImageProvider',
-    'get_text_provider', 'get_image_provider', 'get_provider_format'
+    'get_text_provider', 'get_image_provider', 'get_provider_format', 'clear_provider_cache'
 ]
 
+# Provider 实例缓存：键为 (类型, 格式, api_key 哈希, api_base, 模型)，
+# 同一配置下复用已创建的 SDK 客户端；设置变更时由 settings_controller 清空
+_provider_cache: Dict[Tuple[str, str, str, str, str], object] = {}
+_provider_cache_lock = threading.Lock()
+
+P = TypeVar('P')
+
 
 def get_provider_format() -> str:
     """
@@ -131,9 +141,41 @@ def _get_provider_config() -> Tuple[str, str, str]:
     return provider_format, api_key, api_base
 
 
+def _provider_cache_key(kind: str, provider_format: str, api_key: str,
+                        api_base: str, model: str) -> Tuple[str, str, str, str, str]:
+    """构造缓存键（api_key 只保存哈希，避免明文留在内存结构中）"""
+    key_hash = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+    return (kind, provider_format, key_hash, api_base or '', model)
+
+
+def _get_or_create_provider(key: Tuple[str, str, str, str, str], factory: Callable[[], P]) -> P:
+    """从缓存获取 provider，不存在时调用 factory 创建"""
+    provider = _provider_cache.get(key)
+    if provider is not None:
+        return provider
+
+    with _provider_cache_lock:
+        provider = _provider_cache.get(key)
+        if provider is None:
+            provider = factory()
+            _provider_cache[key] = provider
+        return provider
+
+
+def clear_provider_cache():
+    """清空 provider 缓存（API 格式、密钥、地址等设置变更后调用）"""
+    with _provider_cache_lock:
+        count = len(_provider_cache)
+        _provider_cache.clear()
+    if count:
+        logger.info(f"Cleared {count} cached AI provider(s)")
+
+
 def get_text_provider(model: str = "gemini-3-flash-preview") -> TextProvider:
     """
     Factory function to get text generation provider based on configuration
+
+    相同配置（格式、密钥、地址、模型）下返回缓存的实例，避免每次请求重建 SDK 客户端
     
     Args:
         model: Model name to use
@@ -142,19 +184,26 @@ def get_text_provider(model: str = "gemini-3-flash-preview") -> TextProvider:
         TextProvider instance (GenAITextProvider or OpenAITextProvider)
     """
     provider_format, api_key, api_base = _get_provider_config()
-    
-    if provider_format == 'openai':
-        logger.info(f"Using OpenAI format for text generation, model: {model}")
-        return OpenAITextProvider(api_key=api_key, api_base=api_base, model=model)
-    else:
-        logger.info(f"Using Gemini format for text generation, model: {model}")
-        return GenAITextProvider(api_key=api_key, api_base=api_base, model=model)
+
+    def _create() -> TextProvider:
+        if provider_format == 'openai':
+            logger.info(f"Using OpenAI format for text generation, model: {model}")
+            return OpenAITextProvider(api_key=api_key, api_base=api_base, model=model)
+        else:
+            logger.info(f"Using Gemini format for text generation, model: {model}")
+            return GenAITextProvider(api_key=api_key, api_base=api_base, model=model)
+
+    key = _provider_cache_key('text', provider_format, api_key, api_base, model)
+    # 包装共享的自适应限流控制器（按 provider + 模型，进程内所有任务共用）
+    return _get_or_create_provider(key, lambda: with_rate_limit(_create(), 'text', api_base, model))
 
 
 def get_image_provider(model: str = "gemini-3-pro-image-preview") -> ImageProvider:
     """
     Factory function to get image generation provider based on configuration
 
+    相同配置（格式、密钥、地址、模型）下返回缓存的实例，避免每次请求重建 SDK 客户端
+
     Provider selection logic:
         1. If model starts with "nano-banana-" → GrsaiImageProvider (custom SDK)
         2. If provider_format == "openai" → OpenAIImageProvider
@@ -173,18 +222,23 @@ def get_image_provider(model: str = "gemini-3-pro-image-preview") -> ImageProvid
     """
     provider_format, api_key, api_base = _get_provider_config()
 
-    # 检查是否使用 Grsai 自定义 SDK（nano-banana 系列模型）
-    if model.startswith("nano-banana"):
-        logger.info(
-            f"Using Grsai custom SDK for image generation, "
-            f"model: {model}, api_base: {api_base}"
-        )
-        return GrsaiImageProvider(api_key=api_key, api_base=api_base, model=model)
-
-    if provider_format == 'openai':
-        logger.info(f"Using OpenAI format for image generation, model: {model}")
-        logger.warning("OpenAI format only supports 1K resolution, 4K is not available")
-        return OpenAIImageProvider(api_key=api_key, api_base=api_base, model=model)
-    else:
-        logger.info(f"Using Gemini format for image generation, model: {model}")
-        return GenAIImageProvider(api_key=api_key, api_base=api_base, model=model)
+    def _create() -> ImageProvider:
+        # 检查是否使用 Grsai 自定义 SDK（nano-banana 系列模型）
+        if model.startswith("nano-banana"):
+            logger.info(
+                f"Using Grsai custom SDK for image generation, "
+                f"model: {model}, api_base: {api_base}"
+            )
+            return GrsaiImageProvider(api_key=api_key, api_base=api_base, model=model)
+
+        if provider_format == 'openai':
+            logger.info(f"Using OpenAI format for image generation, model: {model}")
+            logger.warning("OpenAI format only supports 1K resolution, 4K is not available")
+            return OpenAIImageProvider(api_key=api_key, api_base=api_base, model=model)
+        else:
+            logger.info(f"Using Gemini format for image generation, model: {model}")
+            return GenAIImageProvider(api_key=api_key, api_base=api_base, model=model)
+
+    key = _provider_cache_key('image', provider_format, api_key, api_base, model)
+    # 包装共享的自适应限流控制器（按 provider + 模型，进程内所有任务共用）
+    return _get_or_create_provider(key, lambda: with_rate_limit(_create(), 'image', api_base, model))
@@ -0,0 +1,265 @@
+"""
+Shared HTTP client pool for AI providers
+
+每个 API 地址（scheme + host + port）在进程内共享一个 keep-alive 的 httpx.Client，
+避免每次生成都重新建立 TCP/TLS 连接。安装了 h2 时自动启用 HTTP/2。
+
+连接池参数来自配置：
+    HTTP_POOL_MAX_CONNECTIONS: 每个 API 地址的最大连接数
+    HTTP_POOL_MAX_KEEPALIVE: 每个 API 地址保留的空闲连接数
+    HTTP_POOL_KEEPALIVE_EXPIRY: 空闲连接保留时间（秒）
+    HTTP_CLIENT_HTTP2: 是否启用 HTTP/2（默认关闭，需要额外安装 httpx[http2]）
+
+异步调用使用 get_async_http_client()：httpx.AsyncClient 的连接绑定在事件循环上，
+因此按 (事件循环, 地址) 缓存，事件循环结束前应调用 aclose_async_http_clients() 释放。
+
+get_http_client_stats() 返回各地址的请求数与新建连接数（同步与异步合并统计），用于观察连接复用情况。
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 120.0
+
+# 未配置 api_base 时各 SDK 使用的默认地址
+GOOGLE_API_DEFAULT_BASE = 'https://generativelanguage.googleapis.com'
+OPENAI_API_DEFAULT_BASE = 'https://api.openai.com/v1'
+
+
+class _PoolStats:
+    """Request / new-connection counters for one pooled client"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.server_errors = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def record_server_error(self):
+        with self._lock:
+            self.server_errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            requests, opened, errors = self.requests, self.connections_opened, self.server_errors
+        reused = max(0, requests - opened)
+        return {
+            'requests': requests,
+            'connections_opened': opened,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / requests, 3) if requests else 0.0,
+            'server_errors': errors,
+        }
+
+
+class HttpClientPool:
+    """Process-wide registry of keep-alive httpx clients keyed by API origin"""
+
+    def __init__(self, max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0, http2: bool = False):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning('HTTP_CLIENT_HTTP2 is enabled but h2 is not installed '
+                           '(pip install "httpx[http2]"), shared HTTP clients will use HTTP/1.1')
+
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]' = \
+            weakref.WeakKeyDictionary()
+        self._stats: Dict[str, _PoolStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'HttpClientPool':
+        """根据 config 中的 HTTP_POOL_* 配置创建"""
+        from config import get_config
+        config = get_config()
+        return cls(
+            max_connections=getattr(config, 'HTTP_POOL_MAX_CONNECTIONS', 20),
+            max_keepalive_connections=getattr(config, 'HTTP_POOL_MAX_KEEPALIVE', 10),
+            keepalive_expiry=getattr(config, 'HTTP_POOL_KEEPALIVE_EXPIRY', 30.0),
+            http2=getattr(config, 'HTTP_CLIENT_HTTP2', False)
+        )
+
+    @staticmethod
+    def pool_key(url: str) -> str:
+        """取 URL 的 scheme://host[:port] 作为连接池键"""
+        parts = urlsplit(url)
+        if not parts.scheme or not parts.netloc:
+            raise ValueError(f"Invalid API base URL: {url}")
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def get_client(self, url: str) -> httpx.Client:
+        """
+        Get the shared client for the origin of `url`
+
+        返回的客户端是线程安全的，调用方不要关闭它；请求超时通过 timeout 参数按次传入。
+        """
+        key = self.pool_key(url)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._create_client(key)
+                self._clients[key] = client
+                logger.info(f"Created shared HTTP client for {key} (http2={self.http2})")
+            return client
+
+    def get_async_client(self, url: str) -> httpx.AsyncClient:
+        """
+        Get the shared async client for the origin of `url` in the running event loop
+
+        必须在事件循环中调用；调用方不要关闭它，由 aclose_async_clients() 统一释放。
+        """
+        loop = asyncio.get_running_loop()
+        key = self.pool_key(url)
+        with self._lock:
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                clients = self._async_clients[loop] = {}
+            client = clients.get(key)
+            if client is None:
+                stats = self._stats.setdefault(key, _PoolStats())
+                on_request, on_response = self._make_hooks(stats, is_async=True)
+
+                async def _on_request(request: httpx.Request):
+                    on_request(request)
+
+                async def _on_response(response: httpx.Response):
+                    on_response(response)
+
+                client = clients[key] = httpx.AsyncClient(
+                    http2=self.http2,
+                    timeout=DEFAULT_TIMEOUT,
+                    limits=self._limits(),
+                    event_hooks={'request': [_on_request], 'response': [_on_response]}
+                )
+                logger.debug(f"Created async HTTP client for {key} (http2={self.http2})")
+            return client
+
+    async def aclose_async_clients(self):
+        """关闭当前事件循环中创建的所有异步客户端"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.pop(loop, {})
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close async HTTP client: {e}")
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    @staticmethod
+    def _make_hooks(stats: '_PoolStats', is_async: bool = False):
+        """构造统计请求数 / 新建连接数的事件钩子"""
+
+        def _trace(event_name: str, info: Dict[str, Any]):
+            # 只有新建连接时才会触发 connect_tcp 事件，复用连接则不会
+            if event_name == 'connection.connect_tcp.complete':
+                stats.record_connection()
+
+        async def _atrace(event_name: str, info: Dict[str, Any]):
+            _trace(event_name, info)
+
+        def _on_request(request: httpx.Request):
+            stats.record_request()
+            # 异步传输层要求 trace 回调为协程函数
+            request.extensions['trace'] = _atrace if is_async else _trace
+
+        def _on_response(response: httpx.Response):
+            if response.status_code >= 500:
+                stats.record_server_error()
+
+        return _on_request, _on_response
+
+    def _create_client(self, key: str) -> httpx.Client:
+        stats = self._stats.setdefault(key, _PoolStats())
+        on_request, on_response = self._make_hooks(stats)
+        return httpx.Client(
+            http2=self.http2,
+            timeout=DEFAULT_TIMEOUT,
+            limits=self._limits(),
+            event_hooks={'request': [on_request], 'response': [on_response]}
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各 API 地址的连接复用统计"""
+        with self._lock:
+            items = list(self._stats.items())
+        return {key: stats.to_dict() for key, stats in items}
+
+    def close_all(self):
+        """关闭所有共享客户端（进程退出时调用）"""
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Failed to close shared HTTP client: {e}")
+
+
+_pool: Optional[HttpClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_client_pool() -> HttpClientPool:
+    """获取全局连接池（首次调用时按配置创建）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HttpClientPool.from_config()
+    return _pool
+
+
+def get_http_client(url: str) -> httpx.Client:
+    """获取 url 所在地址的共享 httpx.Client"""
+    return get_http_client_pool().get_client(url)
+
+
+def get_http_client_stats() -> Dict[str, Dict[str, Any]]:
+    """获取共享 HTTP 客户端的连接复用统计"""
+    return get_http_client_pool().stats()
+
+
+def get_async_http_client(url: str) -> httpx.AsyncClient:
+    """获取当前事件循环中 url 所在地址的共享 httpx.AsyncClient"""
+    return get_http_client_pool().get_async_client(url)
+
+
+async def aclose_async_http_clients():
+    """关闭当前事件循环中的共享异步客户端（事件循环结束前调用）"""
+    await get_http_client_pool().aclose_async_clients()
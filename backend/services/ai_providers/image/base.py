@@ -1,6 +1,7 @@
 """
 Abstract base class for image generation providers
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Optional, List
 from PIL import Image
@@ -30,3 +31,20 @@ class ImageProvider(ABC):
             Generated PIL Image object, or None if failed
         """
         pass
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image
+
+        默认实现在线程中调用同步的 generate_image；
+        支持原生异步请求的 provider 应覆盖此方法，避免等待期间占用线程。
+        """
+        return await asyncio.to_thread(
+            self.generate_image, prompt, ref_images, aspect_ratio, resolution
+        )
@@ -2,15 +2,17 @@
 Google GenAI implementation for image generation
 Supports both SDK mode (for Google official API) and HTTP mode (for third-party APIs)
 """
+import asyncio
 import logging
 import base64
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from io import BytesIO
-import httpx
 from google import genai
 from google.genai import types
 from PIL import Image
+from ..http_client import get_http_client, get_async_http_client, GOOGLE_API_DEFAULT_BASE
 from .base import ImageProvider
+from .ref_image_cache import cached_encode
 
 logger = logging.getLogger(__name__)
 
@@ -37,10 +39,13 @@ class GenAIImageProvider(ImageProvider):
 
         if self._use_sdk:
             # 使用 Google SDK
+            # SDK 请求同样复用共享连接池
+            http_client = get_http_client(api_base or GOOGLE_API_DEFAULT_BASE)
             http_options = types.HttpOptions(
                 base_url=api_base,
                 timeout=300000,  # 5分钟超时（毫秒）
-            ) if api_base else types.HttpOptions(timeout=300000)
+                httpx_client=http_client,
+            ) if api_base else types.HttpOptions(timeout=300000, httpx_client=http_client)
 
             self.client = genai.Client(
                 http_options=http_options,
@@ -86,7 +91,10 @@ class GenAIImageProvider(ImageProvider):
         return compressed
 
     def _image_to_base64(self, img: Image.Image) -> str:
-        """Convert PIL Image to base64 string with compression"""
+        """Convert PIL Image to base64 string with compression (cached per source file)"""
+        return cached_encode(img, "jpeg:1024:85", self._encode_image_base64)
+
+    def _encode_image_base64(self, img: Image.Image) -> str:
         # 先压缩图片
         compressed = self._compress_image(img)
         
@@ -128,6 +136,103 @@ class GenAIImageProvider(ImageProvider):
         else:
             return self._generate_with_http(prompt, ref_images, aspect_ratio, resolution)
 
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image
+
+        HTTP 模式使用共享的异步连接池；SDK 模式仍在线程中执行：
+        SDK 内部的异步客户端绑定在首次使用的事件循环上，而 provider 实例会跨任务缓存复用。
+        """
+        if self._use_sdk:
+            return await super().agenerate_image(prompt, ref_images, aspect_ratio, resolution)
+        else:
+            return await self._agenerate_with_http(prompt, ref_images, aspect_ratio, resolution)
+
+    @staticmethod
+    def _image_to_sdk_part(img: Image.Image) -> types.Part:
+        """
+        按 SDK 对 PIL 图片的默认方式编码（文件来源的 JPEG 保持原样，其余为 PNG），
+        并缓存编码结果，避免同一模板图每页重复编码
+        """
+        if (img.format == 'JPEG' and getattr(img, 'filename', '')
+                and img.mode in ('1', 'L', 'RGB', 'RGBX', 'CMYK')):
+            image_format, save_params = 'JPEG', {'quality': 'keep'}
+        else:
+            image_format, save_params = 'PNG', {}
+
+        def _encode(image: Image.Image) -> bytes:
+            buffer = BytesIO()
+            image.save(buffer, image_format, **save_params)
+            return buffer.getvalue()
+
+        data = cached_encode(img, f"sdk:{image_format.lower()}", _encode)
+        return types.Part.from_bytes(data=data, mime_type=f"image/{image_format.lower()}")
+
+    def _build_sdk_request(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]],
+        aspect_ratio: str,
+        resolution: str
+    ) -> Tuple[list, types.GenerateContentConfig]:
+        """构建 SDK 请求的 contents 和 config"""
+        contents = []
+
+        # 添加参考图片（如果有）
+        if ref_images:
+            logger.info(f"📷 Adding {len(ref_images)} reference image(s) to SDK request")
+            for i, ref_img in enumerate(ref_images):
+                logger.info(f"  - Ref image {i+1}: size={ref_img.size}, mode={ref_img.mode}")
+                contents.append(self._image_to_sdk_part(ref_img))
+        else:
+            logger.warning("⚠️ No reference images provided to generate_image")
+
+        # 添加文本提示
+        contents.append(prompt)
+
+        logger.info(f"SDK config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
+        config = types.GenerateContentConfig(
+            response_modalities=["TEXT", "IMAGE"],
+            image_config=types.ImageConfig(
+                aspect_ratio=aspect_ratio,
+                image_size=resolution,
+            ),
+        )
+        return contents, config
+
+    @staticmethod
+    def _extract_sdk_image(response) -> Image.Image:
+        """从 SDK 响应中提取最大的图片"""
+        # 注意：SDK 返回的 inline_data.data 可能是 bytes（原始二进制）或 str（base64 编码）
+        images = []
+        for part in response.candidates[0].content.parts:
+            if part.inline_data is not None:
+                data = part.inline_data.data
+                if isinstance(data, str):
+                    img_data = base64.b64decode(data)
+                elif isinstance(data, bytes):
+                    img_data = data
+                else:
+                    logger.warning(f"Unexpected inline_data.data type: {type(data)}")
+                    continue
+                img = Image.open(BytesIO(img_data))
+                images.append((img, img.size[0] * img.size[1]))
+                logger.debug(f"SDK response: IMAGE - {img.size[0]}x{img.size[1]}")
+
+        if not images:
+            raise ValueError("No valid images found in SDK response")
+
+        # 返回最大的图片
+        images.sort(key=lambda x: x[1], reverse=True)
+        logger.info(f"Successfully generated image with SDK: {images[0][0].size[0]}x{images[0][0].size[1]}")
+        return images[0][0]
+
     def _generate_with_sdk(
         self,
         prompt: str,
@@ -137,121 +242,135 @@ class GenAIImageProvider(ImageProvider):
     ) -> Optional[Image.Image]:
         """使用 Google SDK 生成图片"""
         try:
-            # 构建内容列表
-            contents = []
-
-            # 添加参考图片（如果有）
-            if ref_images:
-                logger.info(f"📷 Adding {len(ref_images)} reference image(s) to SDK request")
-                for i, ref_img in enumerate(ref_images):
-                    logger.info(f"  - Ref image {i+1}: size={ref_img.size}, mode={ref_img.mode}")
-                    contents.append(ref_img)
-            else:
-                logger.warning("⚠️ No reference images provided to generate_image")
-
-            # 添加文本提示
-            contents.append(prompt)
-
-            # 调用 SDK
-            logger.info(f"SDK config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
+            contents, config = self._build_sdk_request(prompt, ref_images, aspect_ratio, resolution)
             response = self.client.models.generate_content(
                 model=self.model,
                 contents=contents,
-                config=types.GenerateContentConfig(
-                    response_modalities=["TEXT", "IMAGE"],
-                    image_config=types.ImageConfig(
-                        aspect_ratio=aspect_ratio,
-                        image_size=resolution,
-                    ),
-                ),
+                config=config,
             )
-
-            # 从响应中提取图片
-            # 注意：SDK 返回的 inline_data.data 可能是 bytes（原始二进制）或 str（base64 编码）
-            images = []
-            for part in response.candidates[0].content.parts:
-                if part.inline_data is not None:
-                    data = part.inline_data.data
-                    if isinstance(data, str):
-                        img_data = base64.b64decode(data)
-                    elif isinstance(data, bytes):
-                        img_data = data
-                    else:
-                        logger.warning(f"Unexpected inline_data.data type: {type(data)}")
-                        continue
-                    img = Image.open(BytesIO(img_data))
-                    images.append((img, img.size[0] * img.size[1]))
-                    logger.debug(f"SDK response: IMAGE - {img.size[0]}x{img.size[1]}")
-
-            if not images:
-                raise ValueError("No valid images found in SDK response")
-
-            # 返回最大的图片
-            images.sort(key=lambda x: x[1], reverse=True)
-            logger.info(f"Successfully generated image with SDK: {images[0][0].size[0]}x{images[0][0].size[1]}")
-            return images[0][0]
+            return self._extract_sdk_image(response)
 
         except Exception as e:
             error_detail = f"Error generating image with GenAI SDK: {type(e).__name__}: {str(e)}"
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
 
-    def _generate_with_http(
+    def _build_http_request(
         self,
         prompt: str,
         ref_images: Optional[List[Image.Image]],
         aspect_ratio: str,
         resolution: str
-    ) -> Optional[Image.Image]:
-        """使用 HTTP 直接请求生成图片（用于第三方 API）"""
-        try:
-            # 构建 parts 列表
-            parts = []
-
-            # 添加参考图片（如果有）
-            if ref_images:
-                logger.info(f"📷 Adding {len(ref_images)} reference image(s) to HTTP request")
-                for i, ref_img in enumerate(ref_images):
-                    logger.info(f"  - Ref image {i+1}: size={ref_img.size}, mode={ref_img.mode}")
-                    parts.append({
-                        "inlineData": {
-                            "mimeType": "image/png",
-                            "data": self._image_to_base64(ref_img)
-                        }
-                    })
-            else:
-                logger.warning("⚠️ No reference images provided to generate_image")
-
-            # 添加文本提示
-            parts.append({"text": prompt})
-
-            # 构建请求 payload
-            payload = {
-                "contents": [{"role": "user", "parts": parts}],
-                "generationConfig": {
-                    "maxOutputTokens": 4096,
-                    "response_modalities": ["TEXT", "IMAGE"],
-                    "image_config": {
-                        "aspect_ratio": aspect_ratio,
-                        "image_size": resolution
+    ) -> Tuple[str, dict, dict]:
+        """构建 HTTP 请求的 URL、请求头和请求体（参考图片在此压缩编码）"""
+        parts = []
+
+        # 添加参考图片（如果有）
+        if ref_images:
+            logger.info(f"📷 Adding {len(ref_images)} reference image(s) to HTTP request")
+            for i, ref_img in enumerate(ref_images):
+                logger.info(f"  - Ref image {i+1}: size={ref_img.size}, mode={ref_img.mode}")
+                parts.append({
+                    "inlineData": {
+                        "mimeType": "image/png",
+                        "data": self._image_to_base64(ref_img)
                     }
+                })
+        else:
+            logger.warning("⚠️ No reference images provided to generate_image")
+
+        # 添加文本提示
+        parts.append({"text": prompt})
+
+        payload = {
+            "contents": [{"role": "user", "parts": parts}],
+            "generationConfig": {
+                "maxOutputTokens": 4096,
+                "response_modalities": ["TEXT", "IMAGE"],
+                "image_config": {
+                    "aspect_ratio": aspect_ratio,
+                    "image_size": resolution
                 }
             }
+        }
+
+        # 第三方 API 使用 Bearer token
+        api_base = self.api_base or GOOGLE_API_DEFAULT_BASE
+        url = f"{api_base}/v1beta/models/{self.model}:generateContent"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+
+        logger.info(f"Calling GenAI API (HTTP): {url}")
+        logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
+        return url, headers, payload
+
+    @staticmethod
+    def _parse_http_response(data: dict) -> Image.Image:
+        """解析 HTTP 响应 JSON，返回最大的图片"""
+        # 调试：记录完整响应结构
+        logger.info(f"API Response keys: {data.keys()}")
+
+        # 兼容第三方 API 的包装格式 {"code": ..., "data": ..., "msg": ...}
+        if "code" in data and "data" in data:
+            logger.info(f"Third-party API format detected - code: {data.get('code')}, msg: {data.get('msg')}")
+            if data.get("code") != 0:
+                raise ValueError(f"Third-party API error: code={data.get('code')}, msg={data.get('msg')}")
+            # 从 data 字段中提取实际内容
+            actual_data = data.get("data", {})
+            logger.info(f"Actual data keys: {actual_data.keys() if isinstance(actual_data, dict) else type(actual_data)}")
+            candidates = actual_data.get("candidates", []) if isinstance(actual_data, dict) else []
+        else:
+            # Google 原生格式
+            if "candidates" in data:
+                logger.info(f"Google format - Candidates count: {len(data['candidates'])}")
+            candidates = data.get("candidates", [])
+        if not candidates:
+            raise ValueError("API response has no candidates")
+
+        content = candidates[0].get("content", {})
+        response_parts = content.get("parts", [])
+
+        if not response_parts:
+            raise ValueError("API response has no parts")
+
+        # 查找并返回最大的图片
+        images = []
+        for i, part in enumerate(response_parts):
+            if "text" in part:
+                text_preview = part['text'][:100] if len(part['text']) > 100 else part['text']
+                logger.debug(f"Part {i}: TEXT - {text_preview}")
+            elif "inlineData" in part:
+                try:
+                    img_data = base64.b64decode(part["inlineData"]["data"])
+                    img = Image.open(BytesIO(img_data))
+                    images.append((img, img.size[0] * img.size[1]))
+                    logger.debug(f"Part {i}: IMAGE - {img.size[0]}x{img.size[1]}")
+                except Exception as e:
+                    logger.warning(f"Part {i}: Failed to decode image - {str(e)}")
 
-            # 第三方 API 使用 Bearer token
-            api_base = self.api_base or "https://generativelanguage.googleapis.com"
-            url = f"{api_base}/v1beta/models/{self.model}:generateContent"
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
+        if not images:
+            raise ValueError("No valid images found in API response")
 
-            logger.info(f"Calling GenAI API (HTTP): {url}")
-            logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
+        # 返回最大的图片
+        images.sort(key=lambda x: x[1], reverse=True)
+        logger.info(f"Successfully generated image with HTTP: {images[0][0].size[0]}x{images[0][0].size[1]}")
+        return images[0][0]
+
+    def _generate_with_http(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]],
+        aspect_ratio: str,
+        resolution: str
+    ) -> Optional[Image.Image]:
+        """使用 HTTP 直接请求生成图片（用于第三方 API）"""
+        try:
+            url, headers, payload = self._build_http_request(prompt, ref_images, aspect_ratio, resolution)
 
             # 发送 HTTP 请求
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(url, json=payload, headers=headers)
+            response = get_http_client(url).post(url, json=payload, headers=headers, timeout=self.timeout)
 
             logger.debug(f"HTTP Status: {response.status_code}")
 
@@ -259,59 +378,40 @@ class GenAIImageProvider(ImageProvider):
                 error_text = response.text[:500]
                 raise ValueError(f"API returned status {response.status_code}: {error_text}")
 
-            # 解析响应
-            data = response.json()
-
-            # 调试：记录完整响应结构
-            logger.info(f"API Response keys: {data.keys()}")
-
-            # 兼容第三方 API 的包装格式 {"code": ..., "data": ..., "msg": ...}
-            if "code" in data and "data" in data:
-                logger.info(f"Third-party API format detected - code: {data.get('code')}, msg: {data.get('msg')}")
-                if data.get("code") != 0:
-                    raise ValueError(f"Third-party API error: code={data.get('code')}, msg={data.get('msg')}")
-                # 从 data 字段中提取实际内容
-                actual_data = data.get("data", {})
-                logger.info(f"Actual data keys: {actual_data.keys() if isinstance(actual_data, dict) else type(actual_data)}")
-                candidates = actual_data.get("candidates", []) if isinstance(actual_data, dict) else []
-            else:
-                # Google 原生格式
-                if "candidates" in data:
-                    logger.info(f"Google format - Candidates count: {len(data['candidates'])}")
-                candidates = data.get("candidates", [])
-            if not candidates:
-                raise ValueError("API response has no candidates")
-
-            content = candidates[0].get("content", {})
-            response_parts = content.get("parts", [])
-
-            if not response_parts:
-                raise ValueError("API response has no parts")
-
-            # 查找并返回最大的图片
-            images = []
-            for i, part in enumerate(response_parts):
-                if "text" in part:
-                    text_preview = part['text'][:100] if len(part['text']) > 100 else part['text']
-                    logger.debug(f"Part {i}: TEXT - {text_preview}")
-                elif "inlineData" in part:
-                    try:
-                        img_data = base64.b64decode(part["inlineData"]["data"])
-                        img = Image.open(BytesIO(img_data))
-                        images.append((img, img.size[0] * img.size[1]))
-                        logger.debug(f"Part {i}: IMAGE - {img.size[0]}x{img.size[1]}")
-                    except Exception as e:
-                        logger.warning(f"Part {i}: Failed to decode image - {str(e)}")
-
-            if not images:
-                raise ValueError("No valid images found in API response")
-
-            # 返回最大的图片
-            images.sort(key=lambda x: x[1], reverse=True)
-            logger.info(f"Successfully generated image with HTTP: {images[0][0].size[0]}x{images[0][0].size[1]}")
-            return images[0][0]
+            return self._parse_http_response(response.json())
 
         except Exception as e:
             error_detail = f"Error generating image with GenAI HTTP: {type(e).__name__}: {str(e)}"
             logger.error(error_detail, exc_info=True)
-            raise Exception(error_detail) from e
\ No newline at end of file
+            raise Exception(error_detail) from e
+
+    async def _agenerate_with_http(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]],
+        aspect_ratio: str,
+        resolution: str
+    ) -> Optional[Image.Image]:
+        """使用异步 HTTP 请求生成图片（用于第三方 API）"""
+        try:
+            # 参考图片压缩编码与响应解码是 CPU 操作，放到线程中执行，避免阻塞事件循环
+            url, headers, payload = await asyncio.to_thread(
+                self._build_http_request, prompt, ref_images, aspect_ratio, resolution
+            )
+
+            response = await get_async_http_client(url).post(
+                url, json=payload, headers=headers, timeout=self.timeout
+            )
+
+            logger.debug(f"HTTP Status: {response.status_code}")
+
+            if response.status_code != 200:
+                error_text = response.text[:500]
+                raise ValueError(f"API returned status {response.status_code}: {error_text}")
+
+            return await asyncio.to_thread(lambda: self._parse_http_response(response.json()))
+
+        except Exception as e:
+            error_detail = f"Error generating image with GenAI HTTP: {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
@@ -2,13 +2,16 @@
 Grsai (grsai.dakka.com.cn) 自定义 SDK 图片生成 Provider
 支持 nano-banana 系列模型，支持 1K/2K/4K 分辨率
 """
+import json
+import asyncio
 import logging
 import base64
-import httpx
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from io import BytesIO
 from PIL import Image
 from .base import ImageProvider
+from .ref_image_cache import cached_encode
+from ..http_client import get_http_client, get_async_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -87,37 +90,109 @@ class GrsaiImageProvider(ImageProvider):
 
         urls = []
         for img in images:
-            # 先压缩图片
-            compressed = _compress_image(img)
+            # 同一模板图的编码结果在各页面之间复用
+            b64 = cached_encode(img, "jpeg:1024:85", self._encode_image)
+            urls.append(f"data:image/jpeg;base64,{b64}")
 
-            # 转换为 RGB 模式（JPEG 不支持透明）
-            if compressed.mode in ("RGBA", "P", "LA"):
-                compressed = compressed.convert("RGB")
+        return urls
 
-            # 使用 JPEG 格式，比 PNG 小很多
-            buffer = BytesIO()
-            compressed.save(buffer, format="JPEG", quality=85, optimize=True)
+    @staticmethod
+    def _encode_image(img: Image.Image) -> str:
+        """压缩并编码为 JPEG base64"""
+        # 先压缩图片
+        compressed = _compress_image(img)
 
-            # 记录压缩效果
-            size_kb = len(buffer.getvalue()) / 1024
-            logger.info(f"图片 base64 大小: {size_kb:.1f}KB")
+        # 转换为 RGB 模式（JPEG 不支持透明）
+        if compressed.mode in ("RGBA", "P", "LA"):
+            compressed = compressed.convert("RGB")
 
-            b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-            urls.append(f"data:image/jpeg;base64,{b64}")
+        # 使用 JPEG 格式，比 PNG 小很多
+        buffer = BytesIO()
+        compressed.save(buffer, format="JPEG", quality=85, optimize=True)
 
-        return urls
+        # 记录压缩效果
+        size_kb = len(buffer.getvalue()) / 1024
+        logger.info(f"图片 base64 大小: {size_kb:.1f}KB")
+
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
 
     def _download_image(self, url: str) -> Optional[Image.Image]:
         """从 URL 下载图片并转换为 PIL Image"""
         try:
-            with httpx.Client(timeout=60.0) as client:
-                response = client.get(url)
-                response.raise_for_status()
-                return Image.open(BytesIO(response.content))
+            response = get_http_client(url).get(url, timeout=60.0)
+            response.raise_for_status()
+            return Image.open(BytesIO(response.content))
+        except Exception as e:
+            logger.error(f"Failed to download image from {url}: {e}")
+            return None
+
+    async def _adownload_image(self, url: str) -> Optional[Image.Image]:
+        """异步下载图片并转换为 PIL Image"""
+        try:
+            response = await get_async_http_client(url).get(url, timeout=60.0)
+            response.raise_for_status()
+            return Image.open(BytesIO(response.content))
         except Exception as e:
             logger.error(f"Failed to download image from {url}: {e}")
             return None
 
+    def _build_request(
+        self,
+        prompt: str,
+        image_urls: List[str],
+        aspect_ratio: str,
+        resolution: str
+    ) -> Tuple[str, dict, dict]:
+        """构建请求 URL、请求头和请求体"""
+        url = f"{self.api_base}{self.endpoint}"
+
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "aspectRatio": aspect_ratio,
+            "imageSize": resolution,
+            "shutProgress": True,  # 关闭进度，直接返回最终结果
+        }
+
+        # 只有在有参考图片时才添加 urls 字段
+        if image_urls:
+            payload["urls"] = image_urls
+            logger.info(f"📷 Adding {len(image_urls)} reference image(s)")
+
+        logger.info(
+            f"Calling Grsai API: {url}, "
+            f"model: {self.model}, "
+            f"aspectRatio: {aspect_ratio}, "
+            f"imageSize: {resolution}"
+        )
+        return url, headers, payload
+
+    @staticmethod
+    def _extract_image_url(result: dict) -> str:
+        """检查最终结果并取出生成图片的 URL"""
+        if result.get("status") == "failed":
+            failure_reason = result.get("failure_reason", "unknown")
+            error_msg = result.get("error", "")
+            raise ValueError(
+                f"Image generation failed: {failure_reason} - {error_msg}"
+            )
+
+        results = result.get("results", [])
+        if not results:
+            raise ValueError("No results in API response")
+
+        image_url = results[0].get("url")
+        if not image_url:
+            raise ValueError("No image URL in API response")
+
+        logger.info(f"Image generated, downloading from: {image_url[:50]}...")
+        return image_url
+
     def generate_image(
         self,
         prompt: str,
@@ -138,78 +213,84 @@ class GrsaiImageProvider(ImageProvider):
             生成的 PIL Image 对象，失败返回 None
         """
         try:
-            # 构建请求 URL
-            url = f"{self.api_base}{self.endpoint}"
-
-            # 构建请求头
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
-
             # 转换参考图片为 base64 URL
             image_urls = self._convert_images_to_base64_urls(ref_images)
-
-            # 构建请求体
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "aspectRatio": aspect_ratio,
-                "imageSize": resolution,
-                "shutProgress": True,  # 关闭进度，直接返回最终结果
-            }
-
-            # 只有在有参考图片时才添加 urls 字段
-            if image_urls:
-                payload["urls"] = image_urls
-                logger.info(f"📷 Adding {len(image_urls)} reference image(s)")
-
-            logger.info(
-                f"Calling Grsai API: {url}, "
-                f"model: {self.model}, "
-                f"aspectRatio: {aspect_ratio}, "
-                f"imageSize: {resolution}"
+            url, headers, payload = self._build_request(
+                prompt, image_urls, aspect_ratio, resolution
             )
 
-            # 发送请求（处理流式响应）
-            with httpx.Client(timeout=self.timeout) as client:
-                with client.stream(
-                    "POST", url, json=payload, headers=headers
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = response.read().decode()[:500]
-                        raise ValueError(
-                            f"API returned status {response.status_code}: "
-                            f"{error_text}"
-                        )
-
-                    # 读取流式响应，获取最终结果
-                    result = self._parse_stream_response(response)
-
-            # 检查响应状态
-            if result.get("status") == "failed":
-                failure_reason = result.get("failure_reason", "unknown")
-                error_msg = result.get("error", "")
-                raise ValueError(
-                    f"Image generation failed: {failure_reason} - {error_msg}"
+            # 发送请求（处理流式响应，复用共享连接池）
+            client = get_http_client(url)
+            with client.stream(
+                "POST", url, json=payload, headers=headers, timeout=self.timeout
+            ) as response:
+                if response.status_code != 200:
+                    error_text = response.read().decode()[:500]
+                    raise ValueError(
+                        f"API returned status {response.status_code}: "
+                        f"{error_text}"
+                    )
+
+                # 读取流式响应，获取最终结果
+                result = self._parse_stream_response(response)
+
+            # 下载图片
+            image = self._download_image(self._extract_image_url(result))
+            if image:
+                logger.info(
+                    f"Successfully generated image with Grsai: "
+                    f"{image.size[0]}x{image.size[1]}"
                 )
+            return image
 
-            # 获取图片 URL
-            results = result.get("results", [])
-            if not results:
-                raise ValueError("No results in API response")
+        except Exception as e:
+            error_detail = (
+                f"Error generating image with Grsai: "
+                f"{type(e).__name__}: {str(e)}"
+            )
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
 
-            image_url = results[0].get("url")
-            if not image_url:
-                raise ValueError("No image URL in API response")
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        """
+        异步生成图片：等待 API 返回期间不占用线程
 
-            logger.info(f"Image generated, downloading from: {image_url[:50]}...")
+        参数与返回值同 generate_image
+        """
+        try:
+            # 图片压缩/编码是 CPU 操作，放到线程中执行，避免阻塞事件循环
+            image_urls = await asyncio.to_thread(
+                self._convert_images_to_base64_urls, ref_images
+            )
+            url, headers, payload = self._build_request(
+                prompt, image_urls, aspect_ratio, resolution
+            )
 
-            # 下载图片
-            image = self._download_image(image_url)
+            client = get_async_http_client(url)
+            async with client.stream(
+                "POST", url, json=payload, headers=headers, timeout=self.timeout
+            ) as response:
+                if response.status_code != 200:
+                    error_text = (await response.aread()).decode()[:500]
+                    raise ValueError(
+                        f"API returned status {response.status_code}: "
+                        f"{error_text}"
+                    )
+
+                raw_content = "".join([chunk async for chunk in response.aiter_text()])
+
+            result = self._parse_stream_text(raw_content)
+
+            image = await self._adownload_image(self._extract_image_url(result))
             if image:
                 logger.info(
-                    f"Successfully generated image with Grsai: "
+                    f"Successfully generated image with Grsai (async): "
                     f"{image.size[0]}x{image.size[1]}"
                 )
             return image
@@ -236,22 +317,19 @@ class GrsaiImageProvider(ImageProvider):
         Returns:
             解析后的最终结果字典
         """
-        import json
+        raw_content = "".join(response.iter_text())
+        return self._parse_stream_text(raw_content)
 
+    def _parse_stream_text(self, raw_content: str) -> dict:
+        """解析完整的流式响应文本，返回最后一个有效的 JSON 结果"""
         last_result = {}
-        buffer = ""
-        raw_content = ""
-
-        for chunk in response.iter_text():
-            buffer += chunk
-            raw_content += chunk
 
         # 记录原始响应内容（用于调试）
         logger.info(f"Raw stream response length: {len(raw_content)} chars")
         logger.info(f"Raw stream response content: {raw_content[:500]}")
 
         # 按行解析
-        lines = buffer.split("\n")
+        lines = raw_content.split("\n")
         for line in lines:
             line = line.strip()
 
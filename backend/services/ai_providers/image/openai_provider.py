@@ -4,12 +4,13 @@ OpenAI SDK implementation for image generation
 import logging
 import base64
 import re
-import requests
 from io import BytesIO
 from typing import Optional, List
 from openai import OpenAI
 from PIL import Image
+from ..http_client import get_http_client, OPENAI_API_DEFAULT_BASE
 from .base import ImageProvider
+from .ref_image_cache import cached_encode
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -31,13 +32,14 @@ class OpenAIImageProvider(ImageProvider):
             api_key=api_key,
             base_url=api_base,
             timeout=get_config().OPENAI_TIMEOUT,  # set timeout from config
-            max_retries=get_config().OPENAI_MAX_RETRIES  # set max retries from config
+            max_retries=get_config().OPENAI_MAX_RETRIES,  # set max retries from config
+            http_client=get_http_client(api_base or OPENAI_API_DEFAULT_BASE)  # shared keep-alive pool
         )
         self.model = model
     
     def _encode_image_to_base64(self, image: Image.Image) -> str:
         """
-        Encode PIL Image to base64 string
+        Encode PIL Image to base64 string (cached per source file)
         
         Args:
             image: PIL Image object
@@ -45,6 +47,10 @@ class OpenAIImageProvider(ImageProvider):
         Returns:
             Base64 encoded string
         """
+        return cached_encode(image, "jpeg:full:95", self._encode_jpeg)
+
+    @staticmethod
+    def _encode_jpeg(image: Image.Image) -> str:
         buffered = BytesIO()
         # Convert to RGB if necessary (e.g., RGBA images)
         if image.mode in ('RGBA', 'LA', 'P'):
@@ -171,7 +177,7 @@ class OpenAIImageProvider(ImageProvider):
                         image_url = markdown_matches[0]  # Use the first image URL found
                         logger.debug(f"Found Markdown image URL: {image_url}")
                         try:
-                            response = requests.get(image_url, timeout=30, stream=True)
+                            response = get_http_client(image_url).get(image_url, timeout=30)
                             response.raise_for_status()
                             image = Image.open(BytesIO(response.content))
                             image.load()  # Ensure image is fully loaded
@@ -187,7 +193,7 @@ class OpenAIImageProvider(ImageProvider):
                         image_url = url_matches[0]
                         logger.debug(f"Found plain image URL: {image_url}")
                         try:
-                            response = requests.get(image_url, timeout=30, stream=True)
+                            response = get_http_client(image_url).get(image_url, timeout=30)
                             response.raise_for_status()
                             image = Image.open(BytesIO(response.content))
                             image.load()
@@ -0,0 +1,128 @@
+"""
+Reference image payload cache
+
+批量生成时每一页都会使用同一张模板图作为参考图，各 provider 每次都要解码、缩放、重新编码为 JPEG/base64。
+这里按 (文件路径, mtime, 文件大小, 编码参数) 缓存编码后的结果，所有 provider 共享，
+同一套模板在整个项目（以及后续任务）中只编码一次。
+
+只有通过 Image.open(path) 打开、且文件仍然存在的图片才会被缓存；内存中的图片（如下载的 URL 图片）照常编码。
+缓存总大小受 REF_IMAGE_CACHE_MAX_MB 限制，超出后淘汰最久未使用的条目。
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, Union
+
+from PIL import Image, ImageFile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MB = 64
+
+Payload = TypeVar('Payload', str, bytes)
+
+
+def _source_key(image: Image.Image) -> Optional[Tuple]:
+    """图片对应的源文件标识；非文件图片返回 None"""
+    path = getattr(image, 'filename', None)
+    if not path or not isinstance(image, ImageFile.ImageFile):
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    # size/mode 一并纳入键，防止打开后被原地修改的图片命中旧结果
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size, image.size, image.mode
+
+
+class ReferenceImageCache:
+    """Thread-safe LRU of encoded reference image payloads bounded by total size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple, Union[str, bytes]]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_encode(self, image: Image.Image, variant: str,
+                      encode: Callable[[Image.Image], Payload]) -> Payload:
+        """
+        Return the cached payload for (source file, variant), encoding it on a miss
+
+        Args:
+            image: Reference image (usually from Image.open(path))
+            variant: Encoding parameters, e.g. "jpeg:1024:85"; identical variants share entries across providers
+            encode: Function producing the payload (str or bytes) from the image
+        """
+        source = _source_key(image) if self.max_bytes > 0 else None
+        if source is None:
+            return encode(image)
+
+        key = (source, variant)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        # 编码在锁外进行；并发未命中时可能重复编码，结果相同
+        payload = encode(image)
+        size = len(payload)
+        if size > self.max_bytes:
+            return payload
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = payload
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_mb': round(self._size / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_cache: Optional[ReferenceImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ref_image_cache() -> ReferenceImageCache:
+    """进程内共享的参考图编码缓存（容量取自 REF_IMAGE_CACHE_MAX_MB，0 表示不缓存）"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from config import get_config
+                max_mb = getattr(get_config(), 'REF_IMAGE_CACHE_MAX_MB', DEFAULT_MAX_MB)
+                _cache = ReferenceImageCache(int(max_mb * 1024 * 1024))
+    return _cache
+
+
+def cached_encode(image: Image.Image, variant: str, encode: Callable[[Image.Image], Payload]) -> Payload:
+    """使用共享缓存编码参考图"""
+    return get_ref_image_cache().get_or_encode(image, variant, encode)
+
+
+def get_ref_image_cache_stats() -> Dict[str, Any]:
+    return get_ref_image_cache().stats()
@@ -0,0 +1,442 @@
+"""
+Adaptive rate limiting for AI providers
+
+每个 (类型, provider, api_base, model) 在进程内共享一个 ProviderRateController，所有任务和用户共用：
+- TokenBucket：按配置的每分钟请求数（RPM）平滑发出请求，0 表示不限制
+- AIMDConcurrencyLimiter：并发上限按 AIMD 调整——初始值沿用批量任务的并发配置，请求成功时加性增长，
+  遇到 429 / 5xx / 明确的限流错误时乘性减小（同时清空令牌桶，让后续请求稍作等待）
+
+get_text_provider / get_image_provider 返回的 provider 会被 RateLimited*Provider 包装，
+调用方无需关心限流逻辑。配置项见 config.py 中的 AI_RATE_LIMIT_* / AI_*_RPM / AI_*_MAX_CONCURRENCY。
+
+页面级调用由 services.ai_scheduler 在分配名额时一并取得 AIMD 名额（try_acquire），并在当前上下文中
+标记为已持有（holding），包装后的 provider 不会再次排队等待。
+"""
+import re
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+from PIL import Image
+
+from .text.base import TextProvider
+from .image.base import ImageProvider
+
+logger = logging.getLogger(__name__)
+
+# 当前线程 / asyncio 任务已持有名额的限流器（id），由调度器在分配名额时设置
+_held_limiters: ContextVar[FrozenSet[int]] = ContextVar('held_limiters', default=frozenset())
+
+# 视为"上游过载"的 HTTP 状态码
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+_STATUS_PATTERN = re.compile(r'status(?:[ _]code)?[=: ]*(\d{3})', re.IGNORECASE)
+# 明确表示限流 / 过载的错误信息；客户端超时不在其中：图片生成本身耗时较长，超时不代表上游限流
+_THROTTLE_KEYWORDS = ('rate limit', 'ratelimit', 'resource_exhausted', 'too many requests', 'overloaded')
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """判断异常是否表示上游限流 / 过载（沿异常链检查 429/5xx 状态码和限流错误信息）"""
+    seen = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+
+        for attr in ('status_code', 'code', 'status'):
+            value = getattr(current, attr, None)
+            if isinstance(value, int) and value in THROTTLE_STATUS_CODES:
+                return True
+        response = getattr(current, 'response', None)
+        if getattr(response, 'status_code', None) in THROTTLE_STATUS_CODES:
+            return True
+
+        message = str(current)
+        match = _STATUS_PATTERN.search(message)
+        if match and int(match.group(1)) in THROTTLE_STATUS_CODES:
+            return True
+        lowered = message.lower()
+        if any(keyword in lowered for keyword in _THROTTLE_KEYWORDS):
+            return True
+
+        current = current.__cause__ or current.__context__
+    return False
+
+
+class TokenBucket:
+    """Thread-safe token bucket using reservations (callers sleep for the returned delay)"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数（令牌可以透支，由等待时间补偿）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def drain(self):
+        """清空令牌（上游限流时调用，让后续请求等待重新积累）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+
+class AIMDConcurrencyLimiter:
+    """
+    Concurrency limit with additive increase / multiplicative decrease
+
+    同一个实例可以同时被线程（acquire）和事件循环（aacquire）使用，空出的名额按先来先得移交给等待者；
+    没有等待者时通知监听者（如全局调度器）有空余名额。
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 32,
+                 decrease_factor: float = 0.5, cooldown: float = 2.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = float(min(max(initial, self.minimum), self.maximum))
+        self._in_flight = 0
+        self._waiters: Deque[Callable[[], None]] = deque()
+        self._listeners: List[Callable[[], None]] = []
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.throttles = 0
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self._limit))
+
+    def _try_acquire_locked(self) -> bool:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return True
+        return False
+
+    def try_acquire(self) -> bool:
+        """有空余名额且没有等待者时立即占用一个名额"""
+        with self._lock:
+            return self._try_acquire_locked()
+
+    def add_listener(self, callback: Callable[[], None]):
+        """注册空余名额通知（在释放名额的线程中调用，调用时不持有本限流器的锁）"""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def _notify(self):
+        with self._lock:
+            if self._in_flight >= self.limit or self._waiters:
+                return
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def is_held(self) -> bool:
+        """当前线程 / asyncio 任务是否已持有本限流器的名额（由 holding 标记）"""
+        return id(self) in _held_limiters.get()
+
+    @contextmanager
+    def holding(self):
+        """标记当前上下文已持有一个名额（名额的获取和归还由调用方负责）"""
+        token = _held_limiters.set(_held_limiters.get() | {id(self)})
+        try:
+            yield
+        finally:
+            _held_limiters.reset(token)
+
+    def acquire(self):
+        """阻塞直到获得一个并发名额"""
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            granted = threading.Event()
+            self._waiters.append(granted.set)
+        granted.wait()
+
+    async def aacquire(self):
+        """在事件循环中等待并发名额（不占用线程）"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _grant():
+            # 名额已移交给该等待者；若它已被取消，则继续移交给下一个
+            if future.cancelled():
+                self.release()
+            else:
+                future.set_result(None)
+
+        def _waker():
+            loop.call_soon_threadsafe(_grant)
+
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            self._waiters.append(_waker)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(_waker)
+                    granted = False
+                except ValueError:
+                    granted = True
+            # 名额已到手但任务被取消：归还名额（尚未送达的名额由 _grant 归还）
+            if granted and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """归还名额，并按当前上限唤醒等待者"""
+        wakers: List[Callable[[], None]] = []
+        with self._lock:
+            self._in_flight -= 1
+            while self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                wakers.append(self._waiters.popleft())
+        for waker in wakers:
+            waker()
+        self._notify()
+
+    def record_success(self):
+        """加性增长：每个"窗口"（约 limit 次成功）上限 +1"""
+        with self._lock:
+            self.successes += 1
+            previous = self.limit
+            self._limit = min(float(self.maximum), self._limit + 1.0 / max(1.0, self._limit))
+            grew = self.limit > previous
+        if grew:
+            self._notify()
+
+    def record_throttle(self):
+        """乘性减小（冷却期内的连续失败只减一次，避免同一波请求把上限压到最低）"""
+        with self._lock:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            previous = self.limit
+            self._limit = max(float(self.minimum), self._limit * self.decrease_factor)
+        logger.warning(f"Upstream throttled, concurrency limit {previous} -> {self.limit}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self._in_flight,
+                'waiting': len(self._waiters),
+                'successes': self.successes,
+                'throttles': self.throttles,
+            }
+
+
+class ProviderRateController:
+    """Token bucket + AIMD limiter shared by every caller of one provider/model"""
+
+    def __init__(self, name: str, limiter: AIMDConcurrencyLimiter, bucket: Optional[TokenBucket] = None):
+        self.name = name
+        self.limiter = limiter
+        self.bucket = bucket
+
+    def _on_error(self, exc: BaseException):
+        if is_throttle_error(exc):
+            self.limiter.record_throttle()
+            if self.bucket:
+                self.bucket.drain()
+
+    @contextmanager
+    def slot(self):
+        """同步调用的限流上下文（调度器已为当前上下文取得名额时不再排队）"""
+        held = self.limiter.is_held()
+        if not held:
+            self.limiter.acquire()
+        try:
+            if self.bucket:
+                delay = self.bucket.reserve()
+                if delay > 0:
+                    time.sleep(delay)
+            yield
+        except Exception as e:
+            self._on_error(e)
+            raise
+        else:
+            self.limiter.record_success()
+        finally:
+            if not held:
+                self.limiter.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        """异步调用的限流上下文（调度器已为当前上下文取得名额时不再排队）"""
+        held = self.limiter.is_held()
+        if not held:
+            await self.limiter.aacquire()
+        try:
+            if self.bucket:
+                delay = self.bucket.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield
+        except Exception as e:
+            self._on_error(e)
+            raise
+        else:
+            self.limiter.record_success()
+        finally:
+            if not held:
+                self.limiter.release()
+
+    def stats(self) -> Dict[str, Any]:
+        data = self.limiter.stats()
+        data['rpm'] = round(self.bucket.rate * 60) if self.bucket else 0
+        return data
+
+
+class RateLimitedTextProvider(TextProvider):
+    """TextProvider wrapper that routes calls through a ProviderRateController"""
+
+    def __init__(self, provider: TextProvider, controller: ProviderRateController):
+        self.provider = provider
+        self.controller = controller
+
+    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        with self.controller.slot():
+            return self.provider.generate_text(prompt, thinking_budget=thinking_budget)
+
+    def __getattr__(self, name):
+        # 透传 model 等属性
+        return getattr(self.provider, name)
+
+
+class RateLimitedImageProvider(ImageProvider):
+    """ImageProvider wrapper that routes calls through a ProviderRateController"""
+
+    def __init__(self, provider: ImageProvider, controller: ProviderRateController):
+        self.provider = provider
+        self.controller = controller
+
+    def generate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        with self.controller.slot():
+            return self.provider.generate_image(prompt, ref_images, aspect_ratio, resolution)
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        async with self.controller.aslot():
+            return await self.provider.agenerate_image(prompt, ref_images, aspect_ratio, resolution)
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+
+_controllers: Dict[Tuple[str, str, str, str], ProviderRateController] = {}
+_controllers_lock = threading.Lock()
+
+
+def _initial_concurrency(kind: str, config) -> int:
+    """
+    初始并发数：AI_CONCURRENCY_INITIAL 为 0 时沿用批量任务的并发配置
+    （MAX_DESCRIPTION_WORKERS / MAX_IMAGE_WORKERS，优先取设置页同步到 app.config 的值），
+    未遇到限流时不低于引入限流前的吞吐
+    """
+    initial = getattr(config, 'AI_CONCURRENCY_INITIAL', 0)
+    if initial > 0:
+        return initial
+
+    key = 'MAX_DESCRIPTION_WORKERS' if kind == 'text' else 'MAX_IMAGE_WORKERS'
+    value = getattr(config, key, 8)
+    try:
+        from flask import current_app
+        if current_app and hasattr(current_app, 'config'):
+            value = current_app.config.get(key, value)
+    except RuntimeError:
+        # 不在应用上下文中，使用 Config 默认值
+        pass
+    return int(value)
+
+
+def _create_controller(kind: str, name: str) -> ProviderRateController:
+    """根据 config 中的限流配置创建控制器"""
+    from config import get_config
+    config = get_config()
+    prefix = 'AI_TEXT' if kind == 'text' else 'AI_IMAGE'
+
+    maximum = getattr(config, f'{prefix}_MAX_CONCURRENCY', 16)
+    limiter = AIMDConcurrencyLimiter(
+        initial=_initial_concurrency(kind, config),
+        minimum=getattr(config, 'AI_CONCURRENCY_MIN', 1),
+        maximum=maximum
+    )
+
+    rpm = getattr(config, f'{prefix}_RPM', 0)
+    bucket = TokenBucket(rpm / 60.0, capacity=max(1.0, rpm / 60.0 * 5)) if rpm > 0 else None
+    return ProviderRateController(name, limiter, bucket)
+
+
+def get_rate_controller(kind: str, provider_name: str, api_base: str, model: str) -> ProviderRateController:
+    """获取 (类型, provider, api_base, model) 对应的进程内共享控制器"""
+    key = (kind, provider_name, api_base or '', model)
+    controller = _controllers.get(key)
+    if controller is not None:
+        return controller
+    with _controllers_lock:
+        controller = _controllers.get(key)
+        if controller is None:
+            controller = _create_controller(kind, f"{kind}:{provider_name}:{model}")
+            _controllers[key] = controller
+        return controller
+
+
+def with_rate_limit(provider, kind: str, api_base: str, model: str):
+    """用共享的限流控制器包装 provider（AI_RATE_LIMIT_ENABLED=false 时原样返回）"""
+    from config import get_config
+    if not getattr(get_config(), 'AI_RATE_LIMIT_ENABLED', True):
+        return provider
+
+    controller = get_rate_controller(kind, type(provider).__name__, api_base, model)
+    if kind == 'text':
+        return RateLimitedTextProvider(provider, controller)
+    return RateLimitedImageProvider(provider, controller)
+
+
+def get_provider_limiter(provider) -> Optional[AIMDConcurrencyLimiter]:
+    """取得 provider 使用的并发限流器（未启用限流时返回 None）"""
+    controller = getattr(provider, 'controller', None)
+    return controller.limiter if isinstance(controller, ProviderRateController) else None
+
+
+def get_rate_controller_stats() -> Dict[str, Dict[str, Any]]:
+    """各 provider/model 的并发上限与限流统计"""
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return {controller.name: controller.stats() for controller in controllers}
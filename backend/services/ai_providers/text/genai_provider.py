@@ -3,9 +3,9 @@ Google GenAI implementation for text generation
 Supports both SDK mode (for Google official API) and HTTP mode (for third-party APIs)
 """
 import logging
-import httpx
 from google import genai
 from google.genai import types
+from ..http_client import get_http_client, GOOGLE_API_DEFAULT_BASE
 from .base import TextProvider
 
 logger = logging.getLogger(__name__)
@@ -33,10 +33,13 @@ class GenAITextProvider(TextProvider):
 
         if self._use_sdk:
             # 使用 Google SDK
+            # SDK 请求同样复用共享连接池
+            http_client = get_http_client(api_base or GOOGLE_API_DEFAULT_BASE)
             http_options = types.HttpOptions(
                 base_url=api_base,
                 timeout=120000,  # 2分钟超时（毫秒）
-            ) if api_base else types.HttpOptions(timeout=120000)
+                httpx_client=http_client,
+            ) if api_base else types.HttpOptions(timeout=120000, httpx_client=http_client)
 
             self.client = genai.Client(
                 http_options=http_options,
@@ -108,7 +111,7 @@ class GenAITextProvider(TextProvider):
                 payload["generationConfig"]["thinkingConfig"] = {"thinkingBudget": thinking_budget}
 
             # Third-party API uses Bearer token
-            api_base = self.api_base or "https://generativelanguage.googleapis.com"
+            api_base = self.api_base or GOOGLE_API_DEFAULT_BASE
             url = f"{api_base}/v1beta/models/{self.model}:generateContent"
             headers = {
                 "Content-Type": "application/json",
@@ -117,8 +120,7 @@ class GenAITextProvider(TextProvider):
 
             logger.info(f"Calling GenAI API (HTTP): {url}")
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(url, json=payload, headers=headers)
+            response = get_http_client(url).post(url, json=payload, headers=headers, timeout=self.timeout)
 
             if response.status_code != 200:
                 error_text = response.text[:500]
@@ -3,6 +3,7 @@ OpenAI SDK implementation for text generation
 """
 import logging
 from openai import OpenAI
+from ..http_client import get_http_client, OPENAI_API_DEFAULT_BASE
 from .base import TextProvider
 from config import get_config
 
@@ -25,7 +26,8 @@ class OpenAITextProvider(TextProvider):
             api_key=api_key,
             base_url=api_base,
             timeout=get_config().OPENAI_TIMEOUT,  # set timeout from config
-            max_retries=get_config().OPENAI_MAX_RETRIES  # set max retries from config
+            max_retries=get_config().OPENAI_MAX_RETRIES,  # set max retries from config
+            http_client=get_http_client(api_base or OPENAI_API_DEFAULT_BASE)  # shared keep-alive pool
         )
         self.model = model
     
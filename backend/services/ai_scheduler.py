@@ -0,0 +1,288 @@
+"""
+AI Scheduler - 进程内全局的页面级 AI 任务公平调度
+
+每个批量任务（描述生成、图片生成）内部都会并发处理多个页面。如果不加约束，
+多个用户同时生成时上游并发数会成倍增长，且页数多的项目会挤占页数少的项目。
+FairShareScheduler 为所有页面级 AI 调用提供统一的并发名额：
+- 进程内同时执行的页面数不超过 AI_SCHEDULER_MAX_CONCURRENCY
+- 名额按用户做加权公平分配（stride 调度）：每个用户按会员等级获得权重，
+  空出的名额交给"已获得服务量 / 权重"最小的用户，付费等级获得更大份额但不会饿死免费用户
+- 同时支持线程（slot）和事件循环（aslot）两种调用方式
+- 传入调用所用的 provider 时，名额只在该 provider 的 AIMD 限流器有空余时分配，并一并取得限流器名额：
+  等待上游并发的调用留在调度器中按公平顺序排队，而不是先占用名额再进入限流器的先到先得队列
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from services.ai_providers.rate_limiter import AIMDConcurrencyLimiter, get_provider_limiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_LEVEL_WEIGHTS = {'free': 1.0, 'basic': 2.0, 'premium': 4.0}
+
+
+@dataclass(frozen=True)
+class ScheduleOwner:
+    """调度单位：发起任务的用户及其会员等级"""
+    user_id: str
+    level: str = 'free'
+
+
+ANONYMOUS_OWNER = ScheduleOwner(user_id='anonymous')
+
+
+def parse_level_weights(value: str) -> Dict[str, float]:
+    """解析 "free:1,basic:2,premium:4" 格式的权重配置"""
+    weights = dict(DEFAULT_LEVEL_WEIGHTS)
+    for item in (value or '').split(','):
+        if ':' not in item:
+            continue
+        level, weight = item.split(':', 1)
+        try:
+            weights[level.strip()] = max(0.1, float(weight))
+        except ValueError:
+            logger.warning(f"Invalid scheduler weight: {item}")
+    return weights
+
+
+class FairShareScheduler:
+    """Process-wide concurrency bound with weighted fair queuing per user"""
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 level_weights: Optional[Dict[str, float]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.level_weights = level_weights or dict(DEFAULT_LEVEL_WEIGHTS)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # 每个用户的等待队列，元素为 (waker, 该调用使用的 provider 限流器)
+        self._queues: Dict[str, Deque[Tuple[Callable[[], None], Optional[AIMDConcurrencyLimiter]]]] = {}
+        self._owners: Dict[str, ScheduleOwner] = {}
+        self._owner_in_flight: Dict[str, int] = {}
+        # stride 调度：每获得一个名额，pass 增加 1/权重；新加入的用户从当前虚拟时间开始
+        self._pass: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._limiters: Set[int] = set()
+
+    def configure(self, max_concurrency: int = None, level_weights: Dict[str, float] = None):
+        """调整并发上限和权重（设置变更时调用），新增的名额立即分配给等待者"""
+        with self._lock:
+            if max_concurrency is not None:
+                self.max_concurrency = max(1, max_concurrency)
+            if level_weights is not None:
+                self.level_weights = level_weights
+        self._dispatch()
+
+    def _weight(self, owner: ScheduleOwner) -> float:
+        return self.level_weights.get(owner.level, 1.0)
+
+    def _watch(self, limiter: Optional[AIMDConcurrencyLimiter]):
+        """限流器有空余名额时重新调度（每个限流器只注册一次）"""
+        if limiter is None or id(limiter) in self._limiters:
+            return
+        self._limiters.add(id(limiter))
+        limiter.add_listener(self._dispatch)
+
+    def _start_locked(self, owner: ScheduleOwner):
+        """为 owner 占用一个名额并推进其 pass 值"""
+        key = owner.user_id
+        current = max(self._pass.get(key, 0.0), self._virtual_time)
+        self._virtual_time = current
+        self._pass[key] = current + 1.0 / self._weight(owner)
+        self._owners[key] = owner
+        self._owner_in_flight[key] = self._owner_in_flight.get(key, 0) + 1
+        self._in_flight += 1
+
+    def _dispatch_locked(self) -> List[Callable[[], None]]:
+        """
+        把空闲名额分配给 pass 值最小的等待用户，返回需要唤醒的等待者
+
+        等待者使用的 provider 限流器没有空余名额时跳过该用户（名额在分配时一并取得），
+        限流器空出名额后会通知调度器重新分配，因此执行顺序始终由公平调度决定。
+        """
+        wakers = []
+        while self._in_flight < self.max_concurrency and self._queues:
+            ordered = sorted(
+                self._queues,
+                key=lambda k: max(self._pass.get(k, 0.0), self._virtual_time)
+            )
+            for key in ordered:
+                waker, limiter = self._queues[key][0]
+                if limiter is None or limiter.try_acquire():
+                    break
+            else:
+                break
+            queue = self._queues[key]
+            queue.popleft()
+            if not queue:
+                del self._queues[key]
+            self._start_locked(self._owners[key])
+            wakers.append(waker)
+        return wakers
+
+    def _dispatch(self):
+        with self._lock:
+            wakers = self._dispatch_locked()
+        for waker in wakers:
+            waker()
+
+    def _try_acquire_locked(self, owner: ScheduleOwner, limiter: Optional[AIMDConcurrencyLimiter]) -> bool:
+        if self._in_flight < self.max_concurrency and not self._queues:
+            if limiter is None or limiter.try_acquire():
+                self._start_locked(owner)
+                return True
+        return False
+
+    def _enqueue_locked(self, owner: ScheduleOwner, waker: Callable[[], None],
+                        limiter: Optional[AIMDConcurrencyLimiter]):
+        self._owners[owner.user_id] = owner
+        self._queues.setdefault(owner.user_id, deque()).append((waker, limiter))
+
+    def _remove_waiter_locked(self, owner: ScheduleOwner, waker: Callable[[], None]) -> bool:
+        queue = self._queues.get(owner.user_id)
+        if not queue:
+            return False
+        for entry in queue:
+            if entry[0] is waker:
+                queue.remove(entry)
+                if not queue:
+                    del self._queues[owner.user_id]
+                return True
+        return False
+
+    def acquire(self, owner: ScheduleOwner, limiter: Optional[AIMDConcurrencyLimiter] = None):
+        """阻塞直到 owner 获得一个名额（指定 limiter 时同时取得该 provider 限流器的名额）"""
+        self._watch(limiter)
+        with self._lock:
+            if self._try_acquire_locked(owner, limiter):
+                return
+            granted = threading.Event()
+            self._enqueue_locked(owner, granted.set, limiter)
+            # 排在前面的等待者可能都在等其他限流器，新等待者使用的限流器可能有空余名额
+            wakers = self._dispatch_locked()
+        for waker in wakers:
+            waker()
+        granted.wait()
+
+    async def aacquire(self, owner: ScheduleOwner, limiter: Optional[AIMDConcurrencyLimiter] = None):
+        """在事件循环中等待名额（不占用线程）"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _grant():
+            # 名额已分配给该等待者；若它已被取消，则直接归还
+            if future.cancelled():
+                self.release(owner, limiter)
+            else:
+                future.set_result(None)
+
+        def _waker():
+            loop.call_soon_threadsafe(_grant)
+
+        self._watch(limiter)
+        with self._lock:
+            if self._try_acquire_locked(owner, limiter):
+                return
+            self._enqueue_locked(owner, _waker, limiter)
+            wakers = self._dispatch_locked()
+        for waker in wakers:
+            waker()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = not self._remove_waiter_locked(owner, _waker)
+            if granted and future.done() and not future.cancelled():
+                self.release(owner, limiter)
+            raise
+
+    def release(self, owner: ScheduleOwner, limiter: Optional[AIMDConcurrencyLimiter] = None):
+        """归还名额（及一并取得的限流器名额）并调度下一个等待者"""
+        key = owner.user_id
+        with self._lock:
+            self._in_flight -= 1
+            remaining = self._owner_in_flight.get(key, 1) - 1
+            if remaining > 0:
+                self._owner_in_flight[key] = remaining
+            else:
+                self._owner_in_flight.pop(key, None)
+                # 用户空闲后清理状态，再次加入时从当前虚拟时间开始
+                if key not in self._queues:
+                    self._pass.pop(key, None)
+                    self._owners.pop(key, None)
+        if limiter is not None:
+            limiter.release()
+        self._dispatch()
+
+    @contextmanager
+    def slot(self, owner: ScheduleOwner, provider=None):
+        """
+        页面级 AI 调用的名额
+
+        Args:
+            owner: 调度单位
+            provider: 本次调用使用的（限流包装后的）provider，名额分配时一并取得其并发名额
+        """
+        limiter = get_provider_limiter(provider)
+        self.acquire(owner, limiter)
+        try:
+            if limiter is None:
+                yield
+            else:
+                with limiter.holding():
+                    yield
+        finally:
+            self.release(owner, limiter)
+
+    @asynccontextmanager
+    async def aslot(self, owner: ScheduleOwner, provider=None):
+        limiter = get_provider_limiter(provider)
+        await self.aacquire(owner, limiter)
+        try:
+            if limiter is None:
+                yield
+            else:
+                with limiter.holding():
+                    yield
+        finally:
+            self.release(owner, limiter)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self._in_flight,
+                'waiting': sum(len(queue) for queue in self._queues.values()),
+                'active_users': len(self._owner_in_flight),
+            }
+
+
+# Global scheduler instance（首次使用时按配置调整）
+ai_scheduler = FairShareScheduler()
+
+
+def configure_ai_scheduler(app):
+    """根据 app.config 中的 AI_SCHEDULER_* 配置调整全局调度器"""
+    ai_scheduler.configure(
+        max_concurrency=app.config.get('AI_SCHEDULER_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY),
+        level_weights=parse_level_weights(app.config.get('AI_SCHEDULER_LEVEL_WEIGHTS', ''))
+    )
+
+
+def resolve_schedule_owner(project_id: str) -> ScheduleOwner:
+    """根据项目所属用户及其有效会员等级确定调度单位（需在应用上下文中调用）"""
+    from models import Project, User
+
+    project = Project.query.get(project_id)
+    if not project or not project.user_id:
+        return ANONYMOUS_OWNER
+    user = User.query.get(project.user_id)
+    if not user:
+        return ANONYMOUS_OWNER
+    return ScheduleOwner(user_id=user.id, level=user.get_effective_level())
@@ -5,6 +5,7 @@ TODO: use structured output API
 """
 import os
 import json
+import asyncio
 import re
 import logging
 import requests
@@ -24,6 +25,7 @@ from .prompts import (
     get_descriptions_refinement_prompt
 )
 from .ai_providers import get_text_provider, get_image_provider, TextProvider, ImageProvider
+from .text_cache import get_text_cache
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -157,13 +159,15 @@ class AIService:
         retry=retry_if_exception_type((json.JSONDecodeError, ValueError)),
         reraise=True
     )
-    def generate_json(self, prompt: str, thinking_budget: int = 1000) -> Union[Dict, List]:
+    def generate_json(self, prompt: str, thinking_budget: int = 1000,
+                      use_cache: bool = False) -> Union[Dict, List]:
         """
         生成并解析JSON，如果解析失败则重新生成
         
         Args:
             prompt: 生成提示词
             thinking_budget: 思考预算
+            use_cache: 是否使用文本生成缓存（TEXT_CACHE_ENABLED 开启时生效）
             
         Returns:
             解析后的JSON对象（字典或列表）
@@ -172,7 +176,7 @@ class AIService:
             json.JSONDecodeError: JSON解析失败（重试3次后仍失败）
         """
         # 调用AI生成文本
-        response_text = self.text_provider.generate_text(prompt, thinking_budget=thinking_budget)
+        response_text = self._generate_text(prompt, thinking_budget, use_cache=use_cache)
         
         # 清理响应文本：移除markdown代码块标记和多余空白
         cleaned_text = response_text.strip().strip("```json").strip("```").strip()
@@ -181,7 +185,25 @@ class AIService:
             return json.loads(cleaned_text)
         except json.JSONDecodeError as e:
             logger.warning(f"JSON解析失败，将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}")
+            # 无法解析的结果不能留在缓存中，否则重试会一直命中同一个结果
+            if use_cache:
+                self._invalidate_cached_text(prompt, thinking_budget)
             raise
+
+    def _generate_text(self, prompt: str, thinking_budget: int, use_cache: bool = False) -> str:
+        """调用文本模型；use_cache 且启用了文本缓存时，相同 (模型, 提示词, 思考预算) 直接返回缓存结果"""
+        cache = get_text_cache() if use_cache else None
+        if cache is None:
+            return self.text_provider.generate_text(prompt, thinking_budget=thinking_budget)
+        return cache.get_or_generate(
+            self.text_model, prompt, thinking_budget,
+            lambda: self.text_provider.generate_text(prompt, thinking_budget=thinking_budget)
+        )
+
+    def _invalidate_cached_text(self, prompt: str, thinking_budget: int):
+        cache = get_text_cache()
+        if cache is not None:
+            cache.invalidate(self.text_model, prompt, thinking_budget)
     
     @staticmethod
     def _convert_mineru_path_to_local(mineru_path: str) -> Optional[str]:
@@ -266,7 +288,7 @@ class AIService:
             List of outline items (may contain parts with pages or direct pages)
         """
         outline_prompt = get_outline_generation_prompt(project_context, language)
-        outline = self.generate_json(outline_prompt, thinking_budget=1000)
+        outline = self.generate_json(outline_prompt, thinking_budget=1000, use_cache=True)
         return outline
     
     def parse_outline_text(self, project_context: ProjectContext, language: str = None) -> List[Dict]:
@@ -328,7 +350,7 @@ class AIService:
             language=language
         )
         
-        response_text = self.text_provider.generate_text(desc_prompt, thinking_budget=1000)
+        response_text = self._generate_text(desc_prompt, thinking_budget=1000, use_cache=True)
         
         return dedent(response_text)
     
@@ -368,7 +390,7 @@ class AIService:
 
 文件名："""
 
-            result = self.text_provider.generate_text(prompt, thinking_budget=0)
+            result = self._generate_text(prompt, thinking_budget=0, use_cache=True)
             # 清理结果
             filename = result.strip().strip('"\'')
             # 移除不安全字符
@@ -449,58 +471,7 @@ class AIService:
             Exception with detailed error message if generation fails
         """
         try:
-            logger.debug(f"Reference image: {ref_image_path}")
-            if additional_ref_images:
-                logger.debug(f"Additional reference images: {len(additional_ref_images)}")
-            logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
-
-            # 构建参考图片列表
-            ref_images = []
-            
-            # 添加主参考图片（如果提供了路径）
-            if ref_image_path:
-                if not os.path.exists(ref_image_path):
-                    raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
-                main_ref_image = Image.open(ref_image_path)
-                ref_images.append(main_ref_image)
-            
-            # 添加额外的参考图片
-            if additional_ref_images:
-                for ref_img in additional_ref_images:
-                    if isinstance(ref_img, Image.Image):
-                        # 已经是 PIL Image 对象
-                        ref_images.append(ref_img)
-                    elif isinstance(ref_img, str):
-                        # 可能是本地路径或 URL
-                        if os.path.exists(ref_img):
-                            # 本地路径
-                            ref_images.append(Image.open(ref_img))
-                        elif ref_img.startswith('http://') or ref_img.startswith('https://'):
-                            # URL，需要下载
-                            downloaded_img = self.download_image_from_url(ref_img)
-                            if downloaded_img:
-                                ref_images.append(downloaded_img)
-                            else:
-                                logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
-                        elif ref_img.startswith('/files/mineru/'):
-                            # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
-                            local_path = self._convert_mineru_path_to_local(ref_img)
-                            if local_path and os.path.exists(local_path):
-                                ref_images.append(Image.open(local_path))
-                                logger.debug(f"Loaded MinerU image from local path: {local_path}")
-                            else:
-                                logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
-                        elif ref_img.startswith('/files/docling/'):
-                            # Docling 本地文件路径，直接转换为文件系统路径
-                            local_path = self._convert_docling_path_to_local(ref_img)
-                            if local_path and os.path.exists(local_path):
-                                ref_images.append(Image.open(local_path))
-                                logger.debug(f"Loaded Docling image from local path: {local_path}")
-                            else:
-                                logger.warning(f"Docling image file not found: {ref_img}, skipping...")
-                        else:
-                            logger.warning(f"Invalid image reference: {ref_img}, skipping...")
-            
+            ref_images = self._load_ref_images(ref_image_path, aspect_ratio, resolution, additional_ref_images)
             logger.debug(f"Calling image provider for generation with {len(ref_images)} reference images...")
             
             # 使用 image_provider 生成图片
@@ -515,6 +486,98 @@ class AIService:
             error_detail = f"Error generating image: {type(e).__name__}: {str(e)}"
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
+
+    async def agenerate_image(self, prompt: str, ref_image_path: Optional[str] = None,
+                              aspect_ratio: str = "16:9", resolution: str = "2K",
+                              additional_ref_images: Optional[List[Union[str, Image.Image]]] = None) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image (参数与返回值相同)
+
+        参考图片的读取/下载在线程中完成，等待图片生成期间不占用线程。
+        注意：线程中可能需要应用上下文（Docling 路径解析），调用方应在应用上下文中运行事件循环。
+        """
+        try:
+            from flask import current_app, has_app_context
+
+            app = current_app._get_current_object() if has_app_context() else None
+
+            def _load():
+                if app is None:
+                    return self._load_ref_images(ref_image_path, aspect_ratio, resolution, additional_ref_images)
+                with app.app_context():
+                    return self._load_ref_images(ref_image_path, aspect_ratio, resolution, additional_ref_images)
+
+            ref_images = await asyncio.to_thread(_load)
+            logger.debug(f"Calling image provider (async) with {len(ref_images)} reference images...")
+
+            return await self.image_provider.agenerate_image(
+                prompt=prompt,
+                ref_images=ref_images if ref_images else None,
+                aspect_ratio=aspect_ratio,
+                resolution=resolution
+            )
+
+        except Exception as e:
+            error_detail = f"Error generating image: {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+
+    def _load_ref_images(self, ref_image_path: Optional[str], aspect_ratio: str, resolution: str,
+                         additional_ref_images: Optional[List[Union[str, Image.Image]]]) -> List[Image.Image]:
+        """读取主参考图片和额外参考图片（本地路径、URL、MinerU/Docling 路径或 PIL Image）"""
+        logger.debug(f"Reference image: {ref_image_path}")
+        if additional_ref_images:
+            logger.debug(f"Additional reference images: {len(additional_ref_images)}")
+        logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
+
+        # 构建参考图片列表
+        ref_images = []
+
+        # 添加主参考图片（如果提供了路径）
+        if ref_image_path:
+            if not os.path.exists(ref_image_path):
+                raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
+            main_ref_image = Image.open(ref_image_path)
+            ref_images.append(main_ref_image)
+
+        # 添加额外的参考图片
+        if additional_ref_images:
+            for ref_img in additional_ref_images:
+                if isinstance(ref_img, Image.Image):
+                    # 已经是 PIL Image 对象
+                    ref_images.append(ref_img)
+                elif isinstance(ref_img, str):
+                    # 可能是本地路径或 URL
+                    if os.path.exists(ref_img):
+                        # 本地路径
+                        ref_images.append(Image.open(ref_img))
+                    elif ref_img.startswith('http://') or ref_img.startswith('https://'):
+                        # URL，需要下载
+                        downloaded_img = self.download_image_from_url(ref_img)
+                        if downloaded_img:
+                            ref_images.append(downloaded_img)
+                        else:
+                            logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
+                    elif ref_img.startswith('/files/mineru/'):
+                        # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
+                        local_path = self._convert_mineru_path_to_local(ref_img)
+                        if local_path and os.path.exists(local_path):
+                            ref_images.append(Image.open(local_path))
+                            logger.debug(f"Loaded MinerU image from local path: {local_path}")
+                        else:
+                            logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
+                    elif ref_img.startswith('/files/docling/'):
+                        # Docling 本地文件路径，直接转换为文件系统路径
+                        local_path = self._convert_docling_path_to_local(ref_img)
+                        if local_path and os.path.exists(local_path):
+                            ref_images.append(Image.open(local_path))
+                            logger.debug(f"Loaded Docling image from local path: {local_path}")
+                        else:
+                            logger.warning(f"Docling image file not found: {ref_img}, skipping...")
+                    else:
+                        logger.warning(f"Invalid image reference: {ref_img}, skipping...")
+
+        return ref_images
     
     def edit_image(self, prompt: str, current_image_path: str,
                   aspect_ratio: str = "16:9", resolution: str = "2K",
@@ -0,0 +1,96 @@
+"""
+CPU Pool - CPU 密集型任务的共享进程池
+
+文字区域擦除（inpaint）、文字颜色提取、PDF 页面渲染等纯 CPU 计算在线程中执行会受 GIL 限制，
+这里提供进程内共享的进程池，供各转换流程提交任务：
+
+- 子进程由 forkserver 启动（不支持时使用 spawn）：不会 fork 多线程的 Web 进程。
+  两种方式下子进程都会以 __mp_main__ 重新执行入口模块（app.py 中的 create_app()），
+  因此 TaskManager.start_queue_consumer() 在子进程中直接返回，不会启动队列消费线程
+- 工作进程数由 CPU_POOL_WORKERS 配置，0 表示不使用进程池，任务直接在调用线程中执行
+- 工作进程异常退出导致进程池损坏（BrokenProcessPool）时，下次提交会重建进程池
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+
+# forkserver 预先导入的模块（进程池任务函数所在模块及其依赖），工作进程 fork 后无需重复导入
+_PRELOAD_MODULES = [
+    'numpy',
+    'cv2',
+    'PIL.Image',
+    'services.ppt_converter.converter',
+    'services.pdf_converter.rasterizer',
+]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _mp_context():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # 不预加载 '__main__'；子进程仍会在 prepare() 中以 __mp_main__ 重新执行入口模块
+        context.set_forkserver_preload(_PRELOAD_MODULES)
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def get_cpu_pool_workers() -> int:
+    """进程池的工作进程数（CPU_POOL_WORKERS，0 表示不使用进程池）"""
+    from config import get_config
+    return max(0, int(getattr(get_config(), 'CPU_POOL_WORKERS', DEFAULT_WORKERS)))
+
+
+def get_cpu_pool() -> Optional[ProcessPoolExecutor]:
+    """获取共享进程池（CPU_POOL_WORKERS=0 时返回 None）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = get_cpu_pool_workers()
+                if workers <= 0:
+                    return None
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+                logger.info(f"CPU process pool started with {workers} workers")
+    return _pool
+
+
+def reset_cpu_pool(broken: Optional[ProcessPoolExecutor] = None):
+    """丢弃损坏的进程池（broken 为 None 时丢弃当前进程池），下次提交时重建"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or (broken is not None and _pool is not broken):
+            return
+        pool, _pool = _pool, None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_cpu_task(func: Callable[..., Any], *args, **kwargs) -> Future:
+    """
+    Submit a picklable module-level function to the CPU pool
+
+    未启用进程池或进程池无法提交时，在当前线程中执行并返回已完成的 Future。
+    """
+    pool = get_cpu_pool()
+    if pool is not None:
+        try:
+            return pool.submit(func, *args, **kwargs)
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.warning(f"CPU process pool unavailable, running inline: {e}")
+            reset_cpu_pool(pool)
+
+    future: Future = Future()
+    try:
+        future.set_result(func(*args, **kwargs))
+    except BaseException as e:
+        future.set_exception(e)
+    return future
+
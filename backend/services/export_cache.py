@@ -0,0 +1,301 @@
+"""
+Export Cache - 导出文件（PPTX/PDF）的内容寻址缓存
+
+缓存键由导出格式、导出选项和按页序排列的 (page_id, 当前 PageImageVersion id, generated_image_path,
+图片文件 mtime/大小) 计算得到：任一页面换图、调整顺序或增删页面都会得到新的键，旧缓存自然失效。
+
+缓存文件存放在项目导出目录下的 .cache/ 中，命中时直接硬链接（不支持时复制）到用户请求的文件名，
+无需重新生成。每个项目每种格式只保留最近的 EXPORT_CACHE_MAX_PER_PROJECT 个缓存文件。
+
+同一缓存键同时只会构建一次：构建期间存在 <key>.<fmt>.building 标记文件（跨进程有效），
+其他请求（包括图片生成完成后的后台预渲染）会等待这次构建完成后直接使用结果。
+"""
+import os
+import json
+import uuid
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.export_service import ExportService
+
+logger = logging.getLogger(__name__)
+
+# 导出实现变化导致输出不同时递增，使旧缓存失效
+EXPORT_CACHE_VERSION = 1
+DEFAULT_MAX_PER_PROJECT = 4
+
+# 构建标记超过该时间（秒）视为构建进程已退出，可以接手
+BUILD_STALE_SECONDS = 600
+BUILD_POLL_INTERVAL = 0.2
+
+# 各导出格式的构建函数：(图片路径列表, 输出路径, 并行线程数)
+EXPORT_BUILDERS: Dict[str, Callable[[List[str], str, Optional[int]], None]] = {
+    'pptx': lambda image_paths, path, workers: ExportService.create_pptx_from_images(image_paths, output_file=path),
+    'pdf': lambda image_paths, path, workers: ExportService.create_pdf_from_images(
+        image_paths, output_file=path, max_workers=workers
+    ),
+}
+
+
+def collect_export_images(project_id: str, file_service) -> Tuple[List, Dict[str, str]]:
+    """
+    按页序获取项目的页面及其图片绝对路径（只包含已生成图片的页面）
+
+    Returns:
+        (pages, page_id -> absolute image path)
+    """
+    from models import Page
+
+    pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+    page_image_paths = {
+        page.id: file_service.get_absolute_path(page.generated_image_path)
+        for page in pages if page.generated_image_path
+    }
+    return pages, page_image_paths
+
+
+def compute_export_key(pages: List, image_paths: Dict[str, str], fmt: str,
+                       options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Compute the cache key for exporting pages
+
+    Args:
+        pages: Pages in export order (Page objects)
+        image_paths: page_id -> absolute image path for pages that have an image
+        fmt: Export format ('pptx' / 'pdf')
+        options: Export options that affect the output
+    """
+    from models import PageImageVersion
+
+    page_ids = [page.id for page in pages]
+    current_versions = {
+        version.page_id: version.id
+        for version in PageImageVersion.query.filter(
+            PageImageVersion.page_id.in_(page_ids),
+            PageImageVersion.is_current.is_(True)
+        ).all()
+    } if page_ids else {}
+
+    entries = []
+    for page in pages:
+        abs_path = image_paths.get(page.id)
+        if not abs_path:
+            continue
+        try:
+            stat = os.stat(abs_path)
+            file_sig = [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            file_sig = None
+        entries.append([page.id, current_versions.get(page.id), page.generated_image_path, file_sig])
+
+    raw = json.dumps({
+        'version': EXPORT_CACHE_VERSION,
+        'format': fmt,
+        'options': options or {},
+        'pages': entries,
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ExportCache:
+    """Export artifacts cached under a project's exports directory"""
+
+    def __init__(self, exports_dir: Path, max_per_format: int = DEFAULT_MAX_PER_PROJECT):
+        self.cache_dir = Path(exports_dir) / '.cache'
+        self.max_per_format = max_per_format
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_per_format > 0
+
+    def artifact_path(self, key: str, fmt: str) -> Path:
+        return self.cache_dir / f"{key}.{fmt}"
+
+    def lookup(self, key: str, fmt: str) -> Optional[Path]:
+        """返回已缓存的导出文件（并刷新其访问时间），未命中返回 None"""
+        if not self.enabled:
+            return None
+        path = self.artifact_path(key, fmt)
+        if not path.exists():
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def store(self, key: str, fmt: str, build: Callable[[str], None]) -> Path:
+        """
+        调用 build(path) 生成导出文件到缓存目录，并清理多余的旧缓存
+
+        若同一导出已在构建中（本进程或其他进程），等待其完成并直接返回结果；
+        对方构建失败时由当前调用接手重新构建。
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.artifact_path(key, fmt)
+        marker = Path(f"{path}.building")
+
+        while True:
+            if path.exists():
+                return path
+            try:
+                fd = os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    stale = time.time() - marker.stat().st_mtime > BUILD_STALE_SECONDS
+                except OSError:
+                    continue
+                if stale:
+                    logger.warning(f"Removing stale export build marker: {marker}")
+                    try:
+                        marker.unlink()
+                    except OSError:
+                        pass
+                    continue
+                time.sleep(BUILD_POLL_INTERVAL)
+
+        try:
+            os.close(fd)
+            # 等待期间对方可能刚好完成
+            if not path.exists():
+                build(str(path))
+                self._prune(fmt)
+            return path
+        finally:
+            try:
+                marker.unlink()
+            except OSError:
+                pass
+
+    def _prune(self, fmt: str):
+        artifacts = []
+        for path in self.cache_dir.glob(f"*.{fmt}"):
+            try:
+                artifacts.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        artifacts.sort(reverse=True)
+        for _, path in artifacts[self.max_per_format:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def materialize(artifact: Path, output_path: str):
+        """把缓存文件放到用户请求的路径（优先硬链接，跨设备等情况下复制）"""
+        tmp_path = f"{output_path}.{uuid.uuid4().hex}.link"
+        try:
+            try:
+                os.link(artifact, tmp_path)
+            except OSError:
+                shutil.copyfile(artifact, tmp_path)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def export_with_cache(exports_dir: Path, pages: List, image_paths: Dict[str, str], fmt: str,
+                      output_path: str, build: Callable[[str], None],
+                      options: Optional[Dict[str, Any]] = None,
+                      max_per_format: Optional[int] = None) -> bool:
+    """
+    Produce the export at output_path, reusing a cached artifact when pages have not changed
+
+    Args:
+        exports_dir: Project exports directory
+        pages: Pages in export order
+        image_paths: page_id -> absolute image path
+        fmt: Export format
+        output_path: Where the requested file should end up
+        build: Function writing the export to the given path
+        options: Export options that affect the output
+        max_per_format: Cached artifacts kept per format (defaults to EXPORT_CACHE_MAX_PER_PROJECT, 0 disables)
+
+    Returns:
+        True if served from cache
+    """
+    if max_per_format is None:
+        from config import get_config
+        max_per_format = getattr(get_config(), 'EXPORT_CACHE_MAX_PER_PROJECT', DEFAULT_MAX_PER_PROJECT)
+
+    cache = ExportCache(exports_dir, max_per_format)
+    if not cache.enabled:
+        build(output_path)
+        return False
+
+    key = compute_export_key(pages, image_paths, fmt, options)
+    artifact = cache.lookup(key, fmt)
+    hit = artifact is not None
+    if hit:
+        logger.info(f"Export cache hit ({fmt}): {key[:12]}")
+    else:
+        artifact = cache.store(key, fmt, build)
+
+    cache.materialize(artifact, output_path)
+    return hit
+
+
+# 后台预渲染：单线程执行，同一时间只构建一个项目的导出，避免与前台请求争抢 CPU
+_prerender_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='export-prerender')
+
+
+def _lower_thread_priority():
+    """尽量降低当前线程的调度优先级（Linux 上 setpriority 作用于单个线程）"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+def prerender_exports(project_id: str, formats: Optional[List[str]] = None):
+    """
+    为项目构建并缓存导出文件（需在应用上下文中调用）
+
+    与导出接口使用相同的缓存键和构建方式，之后点击导出可直接命中缓存。
+    """
+    from flask import current_app
+    from services.file_service import FileService
+
+    file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+    pages, page_image_paths = collect_export_images(project_id, file_service)
+    if not page_image_paths:
+        return
+
+    max_per_format = current_app.config.get('EXPORT_CACHE_MAX_PER_PROJECT', DEFAULT_MAX_PER_PROJECT)
+    cache = ExportCache(file_service._get_exports_dir(project_id), max_per_format)
+    if not cache.enabled:
+        return
+
+    image_paths = [page_image_paths[page.id] for page in pages if page.id in page_image_paths]
+    for fmt in formats or list(EXPORT_BUILDERS):
+        key = compute_export_key(pages, page_image_paths, fmt)
+        if cache.lookup(key, fmt):
+            continue
+        started = time.time()
+        cache.store(key, fmt, lambda path, fmt=fmt: EXPORT_BUILDERS[fmt](image_paths, path, 1))
+        logger.info(f"Pre-rendered {fmt} export ready for project {project_id} ({time.time() - started:.1f}s)")
+
+
+def schedule_export_prerender(project_id: str, app):
+    """图片全部生成完成后，在后台低优先级线程中预渲染导出文件（EXPORT_PRERENDER_ENABLED 开启时）"""
+    if not app.config.get('EXPORT_PRERENDER_ENABLED', False):
+        return
+
+    def _run():
+        _lower_thread_priority()
+        with app.app_context():
+            try:
+                prerender_exports(project_id)
+            except Exception as e:
+                logger.warning(f"Export pre-render failed for project {project_id}: {e}", exc_info=True)
+
+    _prerender_executor.submit(_run)
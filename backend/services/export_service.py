@@ -3,9 +3,17 @@ Export Service - handles PPTX and PDF export
 Based on demo.py create_pptx_from_images()
 """
 import os
+import re
+import uuid
 import logging
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+from xml.sax.saxutils import quoteattr
 from pptx import Presentation
 from pptx.util import Inches
 from PIL import Image
@@ -13,6 +21,271 @@ import io
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def _get_export_workers() -> int:
+    from config import get_config
+    return max(1, getattr(get_config(), 'EXPORT_WORKERS', 4))
+
+
+def _ordered_parallel_map(func: Callable[[T], R], items: Iterable[T], max_workers: int) -> Iterator[R]:
+    """
+    在线程池中并行执行 func，按输入顺序逐个产出结果
+
+    同时提交的任务不超过 2 * max_workers 个，已产出的结果由调用方处理后即可释放，
+    因此内存占用与 worker 数成正比，而不是与页数成正比。
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        window = deque()
+        for item in items:
+            window.append(executor.submit(func, item))
+            if len(window) >= max_workers * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+_REL_TYPE_BASE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PPTX_SLIDE_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", 'png'),
+    (b"\xff\xd8\xff", 'jpeg'),
+    (b"GIF87a", 'gif'),
+    (b"GIF89a", 'gif'),
+)
+_IMAGE_CONTENT_TYPES = {'png': 'image/png', 'jpeg': 'image/jpeg', 'gif': 'image/gif'}
+
+# 单页幻灯片：一张铺满页面的图片（与 python-pptx add_picture 生成的结构一致）
+_PPTX_SLIDE_XML = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main">'
+    '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    '<p:grpSpPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/><a:chOff x="0" y="0"/>'
+    '<a:chExt cx="0" cy="0"/></a:xfrm></p:grpSpPr>'
+    '<p:pic><p:nvPicPr><p:cNvPr id="2" name="Picture 1" descr={descr}/>'
+    '<p:cNvPicPr><a:picLocks noChangeAspect="1"/></p:cNvPicPr><p:nvPr/></p:nvPicPr>'
+    '<p:blipFill><a:blip r:embed="rId2"/><a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+    '<p:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:pic>'
+    '</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>'
+)
+_PPTX_SLIDE_RELS_XML = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="' + _REL_TYPE_BASE + '/slideLayout" Target="{layout}"/>'
+    '<Relationship Id="rId2" Type="' + _REL_TYPE_BASE + '/image" Target="../media/{media}"/>'
+    '</Relationships>'
+)
+
+
+@lru_cache(maxsize=1)
+def _pptx_skeleton() -> Tuple[Tuple[Tuple[str, bytes], ...], str]:
+    """
+    无幻灯片的 16:9 演示文稿（母版、版式、主题等），只在首次导出时由 python-pptx 生成一次
+
+    Returns:
+        (zip 内所有条目 (name, data), 空白版式相对幻灯片的路径)
+    """
+    prs = Presentation()
+    # Set slide dimensions to 16:9 (width 10 inches, height 5.625 inches)
+    prs.slide_width = Inches(10)
+    prs.slide_height = Inches(5.625)
+    # Layout 6 is typically blank
+    layout_partname = str(prs.slide_layouts[6].part.partname)
+
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    with zipfile.ZipFile(buffer) as zf:
+        entries = tuple((info.filename, zf.read(info)) for info in zf.infolist())
+    return entries, '..' + layout_partname[len('/ppt'):]
+
+
+def _detect_image_type(image_path: str) -> Optional[str]:
+    """根据文件头判断 PPTX 可直接嵌入的图片类型（png/jpeg/gif），其他格式返回 None"""
+    with open(image_path, 'rb') as f:
+        head = f.read(8)
+    for signature, image_type in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_type
+    return None
+
+
+def _write_pptx(image_paths: List[str], output: Union[str, BinaryIO]):
+    """
+    直接写出 PPTX 压缩包：骨架部件来自 _pptx_skeleton()，每页生成幻灯片 XML，
+    图片文件按块读入并以 ZIP_STORED 存储（PNG/JPEG 本身已压缩，不再重复 deflate）
+    """
+    slides = []
+    for image_path in image_paths:
+        if not os.path.exists(image_path):
+            logger.warning(f"Image not found: {image_path}")
+            continue
+        slides.append((image_path, _detect_image_type(image_path)))
+
+    entries, layout_target = _pptx_skeleton()
+    slide_width, slide_height = Inches(10), Inches(5.625)
+    # 新增幻灯片关系的编号接在骨架已有关系之后
+    rel_base = _max_relationship_id(dict(entries)['ppt/_rels/presentation.xml.rels'].decode('utf-8'))
+
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in entries:
+            if slides:
+                data = _patch_pptx_part(name, data, slides, rel_base)
+            zf.writestr(name, data)
+
+        for index, (image_path, image_type) in enumerate(slides, 1):
+            media_name = f"image{index}.{image_type or 'png'}"
+            zf.writestr(f"ppt/slides/slide{index}.xml", _PPTX_SLIDE_XML.format(
+                descr=quoteattr(os.path.basename(image_path)), cx=slide_width, cy=slide_height
+            ))
+            zf.writestr(f"ppt/slides/_rels/slide{index}.xml.rels", _PPTX_SLIDE_RELS_XML.format(
+                layout=layout_target, media=media_name
+            ))
+
+            if image_type:
+                zf.write(image_path, f"ppt/media/{media_name}", compress_type=zipfile.ZIP_STORED)
+            else:
+                # 其他格式（如 WebP）转为 PNG 后嵌入
+                buffer = io.BytesIO()
+                with Image.open(image_path) as img:
+                    img.save(buffer, format='PNG')
+                zf.writestr(f"ppt/media/{media_name}", buffer.getvalue(), compress_type=zipfile.ZIP_STORED)
+
+
+def _patch_pptx_part(name: str, data: bytes, slides: List[Tuple[str, Optional[str]]], rel_base: int) -> bytes:
+    """在骨架的内容类型、演示文稿关系和幻灯片列表中登记新增的幻灯片"""
+    if name == '[Content_Types].xml':
+        xml = data.decode('utf-8')
+        additions = []
+        for image_type in sorted({image_type or 'png' for _, image_type in slides}):
+            if f'Extension="{image_type}"' not in xml:
+                additions.append(
+                    f'<Default Extension="{image_type}" ContentType="{_IMAGE_CONTENT_TYPES[image_type]}"/>'
+                )
+        additions.extend(
+            f'<Override PartName="/ppt/slides/slide{index}.xml" ContentType="{_PPTX_SLIDE_CONTENT_TYPE}"/>'
+            for index in range(1, len(slides) + 1)
+        )
+        return xml.replace('</Types>', ''.join(additions) + '</Types>').encode('utf-8')
+
+    if name == 'ppt/_rels/presentation.xml.rels':
+        xml = data.decode('utf-8')
+        rels = ''.join(
+            f'<Relationship Id="rId{rel_base + index}" Type="{_REL_TYPE_BASE}/slide" Target="slides/slide{index}.xml"/>'
+            for index in range(1, len(slides) + 1)
+        )
+        return xml.replace('</Relationships>', rels + '</Relationships>').encode('utf-8')
+
+    if name == 'ppt/presentation.xml':
+        xml = data.decode('utf-8')
+        slide_ids = ''.join(
+            f'<p:sldId id="{255 + index}" r:id="rId{rel_base + index}"/>'
+            for index in range(1, len(slides) + 1)
+        )
+        return xml.replace(
+            '</p:sldMasterIdLst>', f'</p:sldMasterIdLst><p:sldIdLst>{slide_ids}</p:sldIdLst>', 1
+        ).encode('utf-8')
+
+    return data
+
+
+def _max_relationship_id(rels_xml: str) -> int:
+    return max((int(value) for value in re.findall(r'Id="rId(\d+)"', rels_xml)), default=0)
+
+
+@dataclass
+class _PdfPageImage:
+    """已编码为 JPEG 的单页图片（PDF DCTDecode 图像对象）"""
+    width: int
+    height: int
+    color_space: str
+    data: bytes
+
+
+def _encode_pdf_page(image_path: str) -> _PdfPageImage:
+    """读取页面图片并编码为 JPEG；源文件本身是 RGB/灰度 JPEG 时直接使用原始字节，无需解码"""
+    with Image.open(image_path) as img:
+        width, height = img.size
+        if img.format == 'JPEG' and img.mode in ('RGB', 'L'):
+            with open(image_path, 'rb') as f:
+                data = f.read()
+            return _PdfPageImage(width, height, 'DeviceGray' if img.mode == 'L' else 'DeviceRGB', data)
+
+        # Convert to RGB if necessary (PDF requires RGB)
+        rgb = img if img.mode == 'RGB' else img.convert('RGB')
+        buffer = io.BytesIO()
+        # 与 Pillow 保存 PDF 时一致：RGB 图片以默认质量的 JPEG 嵌入
+        rgb.save(buffer, format='JPEG')
+        return _PdfPageImage(width, height, 'DeviceRGB', buffer.getvalue())
+
+
+def _iter_pdf_document(pages: Iterable[_PdfPageImage]) -> Iterator[bytes]:
+    """
+    逐页写出 PDF（每页一个全页图片），页面处理完即写出，最后写 Pages/Catalog 和交叉引用表
+
+    对象编号：1 = Catalog，2 = Pages，之后每页依次为 图片、内容流、Page 三个对象。
+    页面尺寸与 Pillow 默认一致（72 DPI，1 像素 = 1 pt）。
+    """
+    offsets = {}
+    position = 0
+    page_refs = []
+    next_obj = 3
+
+    def _object(number: int, body: bytes, stream: bytes = None) -> bytes:
+        offsets[number] = position
+        chunk = f"{number} 0 obj\n".encode() + body
+        if stream is not None:
+            chunk += b"\nstream\n" + stream + b"\nendstream"
+        return chunk + b"\nendobj\n"
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    yield header
+    position += len(header)
+
+    for page in pages:
+        image_obj, content_obj, page_obj = next_obj, next_obj + 1, next_obj + 2
+        next_obj += 3
+
+        chunk = _object(image_obj, (
+            f"<< /Type /XObject /Subtype /Image /Width {page.width} /Height {page.height} "
+            f"/ColorSpace /{page.color_space} /BitsPerComponent 8 /Filter /DCTDecode "
+            f"/Length {len(page.data)} >>"
+        ).encode(), page.data)
+        yield chunk
+        position += len(chunk)
+
+        content = f"q\n{page.width} 0 0 {page.height} 0 0 cm\n/image Do\nQ\n".encode()
+        chunk = _object(content_obj, f"<< /Length {len(content)} >>".encode(), content)
+        yield chunk
+        position += len(chunk)
+
+        procset = '/ImageB' if page.color_space == 'DeviceGray' else '/ImageC'
+        chunk = _object(page_obj, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page.width} {page.height}] "
+            f"/Resources << /ProcSet [/PDF {procset}] /XObject << /image {image_obj} 0 R >> >> "
+            f"/Contents {content_obj} 0 R >>"
+        ).encode())
+        yield chunk
+        position += len(chunk)
+        page_refs.append(f"{page_obj} 0 R")
+
+    chunk = _object(2, f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>".encode())
+    yield chunk
+    position += len(chunk)
+
+    chunk = _object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    yield chunk
+    position += len(chunk)
+
+    xref = [f"xref\n0 {next_obj}\n", "0000000000 65535 f \n"]
+    xref.extend(f"{offsets[number]:010d} 00000 n \n" for number in range(1, next_obj))
+    xref.append(f"trailer\n<< /Size {next_obj} /Root 1 0 R >>\nstartxref\n{position}\n%%EOF\n")
+    yield "".join(xref).encode()
+
 
 class ExportService:
     """Service for exporting presentations"""
@@ -20,8 +293,10 @@ class ExportService:
     @staticmethod
     def create_pptx_from_images(image_paths: List[str], output_file: str = None) -> bytes:
         """
-        Create PPTX file from image paths
-        Based on demo.py create_pptx_from_images()
+        Create PPTX file from image paths (one full-slide picture per image)
+
+        直接写出 PPTX 压缩包，图片原样存储，不经过 python-pptx 的读取和解析，
+        导出耗时与内存基本只取决于图片文件的拷贝。
         
         Args:
             image_paths: List of absolute paths to images
@@ -30,92 +305,76 @@ class ExportService:
         Returns:
             PPTX file as bytes if output_file is None
         """
-        # Create presentation
-        prs = Presentation()
-        
-        # Set slide dimensions to 16:9 (width 10 inches, height 5.625 inches)
-        prs.slide_width = Inches(10)
-        prs.slide_height = Inches(5.625)
-        
-        # Add each image as a slide
-        for image_path in image_paths:
-            if not os.path.exists(image_path):
-                logger.warning(f"Image not found: {image_path}")
-                continue
-            
-            # Add blank slide layout (layout 6 is typically blank)
-            blank_slide_layout = prs.slide_layouts[6]
-            slide = prs.slides.add_slide(blank_slide_layout)
-            
-            # Add image to fill entire slide
-            slide.shapes.add_picture(
-                image_path,
-                left=0,
-                top=0,
-                width=prs.slide_width,
-                height=prs.slide_height
-            )
-        
-        # Save or return bytes
         if output_file:
-            prs.save(output_file)
+            # 先写入临时文件，完成后再替换，避免下载到写了一半的文件
+            tmp_file = f"{output_file}.{uuid.uuid4().hex}.tmp"
+            try:
+                _write_pptx(image_paths, tmp_file)
+                os.replace(tmp_file, output_file)
+            finally:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
             return None
         else:
-            # Save to bytes
             pptx_bytes = io.BytesIO()
-            prs.save(pptx_bytes)
-            pptx_bytes.seek(0)
+            _write_pptx(image_paths, pptx_bytes)
             return pptx_bytes.getvalue()
     
     @staticmethod
-    def create_pdf_from_images(image_paths: List[str], output_file: str = None) -> bytes:
+    def iter_pdf_from_images(image_paths: List[str], max_workers: int = None) -> Iterator[bytes]:
         """
-        Create PDF file from image paths
-        
+        Generate a PDF from image paths as a stream of byte chunks
+
+        页面图片在线程池中并行解码 / 编码，并按页序逐页写出；
+        同一时间只保留约 2 * max_workers 页的编码结果，内存占用与页数无关。
+
         Args:
             image_paths: List of absolute paths to images
-            output_file: Optional output file path (if None, returns bytes)
-        
-        Returns:
-            PDF file as bytes if output_file is None
+            max_workers: Number of encoding threads (defaults to EXPORT_WORKERS)
+
+        Raises:
+            ValueError: No valid images found
         """
-        images = []
-        
-        # Load all images
+        valid_paths = []
         for image_path in image_paths:
             if not os.path.exists(image_path):
                 logger.warning(f"Image not found: {image_path}")
                 continue
-            
-            img = Image.open(image_path)
-            
-            # Convert to RGB if necessary (PDF requires RGB)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            images.append(img)
-        
-        if not images:
+            valid_paths.append(image_path)
+
+        if not valid_paths:
             raise ValueError("No valid images found for PDF export")
+
+        workers = max_workers or _get_export_workers()
+        return _iter_pdf_document(_ordered_parallel_map(_encode_pdf_page, valid_paths, workers))
+
+    @staticmethod
+    def create_pdf_from_images(image_paths: List[str], output_file: str = None,
+                               max_workers: int = None) -> bytes:
+        """
+        Create PDF file from image paths
         
-        # Save as PDF
+        Args:
+            image_paths: List of absolute paths to images
+            output_file: Optional output file path (if None, returns bytes)
+            max_workers: Number of encoding threads (defaults to EXPORT_WORKERS)
+        
+        Returns:
+            PDF file as bytes if output_file is None
+        """
+        chunks = ExportService.iter_pdf_from_images(image_paths, max_workers=max_workers)
+
         if output_file:
-            images[0].save(
-                output_file,
-                save_all=True,
-                append_images=images[1:],
-                format='PDF'
-            )
+            # 先写入临时文件，完成后再替换，避免下载到写了一半的文件
+            tmp_file = f"{output_file}.{uuid.uuid4().hex}.tmp"
+            try:
+                with open(tmp_file, 'wb') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+                os.replace(tmp_file, output_file)
+            finally:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
             return None
         else:
-            # Save to bytes
-            pdf_bytes = io.BytesIO()
-            images[0].save(
-                pdf_bytes,
-                save_all=True,
-                append_images=images[1:],
-                format='PDF'
-            )
-            pdf_bytes.seek(0)
-            return pdf_bytes.getvalue()
-
+            return b"".join(chunks)
@@ -1,21 +1,68 @@
 """
 File Service - handles all file operations
+
+文件始终先写入上传目录（本地工作副本）；使用远程存储（STORAGE_BACKEND=s3）时同步上传到对象存储，
+本地缺失的文件在读取时按需下载，删除操作同时作用于对象存储。
 """
 import os
 import uuid
+import logging
 from pathlib import Path
 from typing import Optional
 from werkzeug.utils import secure_filename
 from PIL import Image
+from services.image_derivatives import DERIVATIVE_SIZES, derivative_path, ensure_derivative, \
+    generate_derivatives, delete_derivatives
+from services.storage import StorageBackend, get_storage
+from utils.http_cache import IMMUTABLE_MAX_AGE, is_versioned_filename
+
+logger = logging.getLogger(__name__)
 
 
 class FileService:
     """Service for file management"""
     
-    def __init__(self, upload_folder: str):
+    def __init__(self, upload_folder: str, storage: Optional[StorageBackend] = None):
         """Initialize file service"""
         self.upload_folder = Path(upload_folder)
         self.upload_folder.mkdir(exist_ok=True, parents=True)
+        self.storage = storage or get_storage(str(self.upload_folder))
+
+    def _relative_key(self, path: Path) -> str:
+        return Path(path).relative_to(self.upload_folder).as_posix()
+
+    def publish_file(self, path) -> None:
+        """
+        Upload a file written under the upload folder to remote storage (no-op for local storage)
+
+        Args:
+            path: Absolute path of the file inside the upload folder
+        """
+        if not self.storage.is_remote:
+            return
+        path = Path(path)
+        # 带版本号的文件内容不变，允许浏览器长期缓存；其余文件每次验证 ETag
+        if is_versioned_filename(path.name):
+            cache_control = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            cache_control = 'no-cache'
+        self.storage.put_file(self._relative_key(path), str(path), cache_control=cache_control)
+
+    def _fetch(self, relative_path: str, path: Path) -> bool:
+        """本地缺失时从远程存储下载"""
+        if path.exists() or not self.storage.is_remote:
+            return path.exists()
+        try:
+            return self.storage.download(relative_path, str(path))
+        except Exception as e:
+            logger.warning(f"Failed to fetch {relative_path} from storage: {e}")
+            return False
+
+    def _delete_remote(self, *keys: str):
+        if not self.storage.is_remote:
+            return
+        for key in keys:
+            self.storage.delete(key)
     
     def _get_project_dir(self, project_id: str) -> Path:
         """Get project directory"""
@@ -73,6 +120,7 @@ class FileService:
         
         filepath = template_dir / filename
         file.save(str(filepath))
+        self.publish_file(filepath)
         
         # Return relative path
         return filepath.relative_to(self.upload_folder).as_posix()
@@ -100,7 +148,9 @@ class FileService:
         
         # Generate filename with version number or timestamp
         if version_number is not None:
-            filename = f"{page_id}_v{version_number}.{ext}"
+            # 版本号按已有版本数计算，并发生成或删除旧版本后可能重复；附加随机后缀保证文件名唯一，
+            # 已发布的文件不会被覆盖（带版本号的文件会被浏览器长期缓存）
+            filename = f"{page_id}_v{version_number}_{uuid.uuid4().hex[:8]}.{ext}"
         else:
             # Use timestamp for unique filename
             import time
@@ -112,6 +162,17 @@ class FileService:
         # Save image - format is determined by file extension or explicitly specified
         # Some PIL Image objects may not support format parameter, so we use extension
         image.save(str(filepath))
+        self.publish_file(filepath)
+
+        # 生成缩略图 / 预览图（失败时由首次请求按需生成）
+        from config import get_config
+        if getattr(get_config(), 'IMAGE_DERIVATIVES_ON_SAVE', True):
+            try:
+                generate_derivatives(filepath, image)
+                for size in DERIVATIVE_SIZES:
+                    self.publish_file(derivative_path(filepath, size))
+            except Exception as e:
+                logger.warning(f"Failed to generate derivatives for {filepath}: {e}")
         
         # Return relative path
         return filepath.relative_to(self.upload_folder).as_posix()
@@ -148,6 +209,7 @@ class FileService:
 
         # Save image
         image.save(str(filepath))
+        self.publish_file(filepath)
 
         # Return relative path
         return filepath.relative_to(self.upload_folder).as_posix()
@@ -162,11 +224,72 @@ class FileService:
         Returns:
             True if deleted successfully
         """
-        filepath = self.upload_folder / image_path.replace('\\', '/')
+        relative_path = image_path.replace('\\', '/')
+        filepath = self.upload_folder / relative_path
+        deleted = False
         if filepath.exists() and filepath.is_file():
             filepath.unlink()
-            return True
-        return False
+            delete_derivatives(filepath)
+            deleted = True
+        if self.storage.is_remote:
+            self._delete_remote(relative_path, *(
+                derivative_path(Path(relative_path), size).as_posix() for size in DERIVATIVE_SIZES
+            ))
+            deleted = True
+        return deleted
+
+    def delete_file(self, relative_path: str) -> bool:
+        """
+        Delete a single file from the upload folder and remote storage
+
+        Args:
+            relative_path: Relative path from upload folder
+
+        Returns:
+            True if deleted successfully
+        """
+        relative_path = relative_path.replace('\\', '/')
+        filepath = self.upload_folder / relative_path
+        deleted = False
+        if filepath.is_file():
+            filepath.unlink()
+            deleted = True
+        if self.storage.is_remote:
+            self._delete_remote(relative_path)
+            deleted = True
+        return deleted
+
+    def get_derivative(self, relative_path: str, size: str) -> str:
+        """
+        Get the thumbnail / preview derivative of a page image, generating it if needed
+
+        Args:
+            relative_path: Relative path of the original image
+            size: Derivative size ('thumb' / 'preview')
+
+        Returns:
+            Relative path of the derivative
+
+        Raises:
+            ValueError: Unknown size
+            FileNotFoundError: Original image missing
+        """
+        if size not in DERIVATIVE_SIZES:
+            raise ValueError(f"Unknown image size: {size}")
+        relative_path = relative_path.replace('\\', '/')
+        key = derivative_path(Path(relative_path), size).as_posix()
+        local_path = self.upload_folder / key
+
+        if not self.storage.is_remote:
+            ensure_derivative(self.upload_folder / relative_path, size)
+            return key
+
+        # 远程存储：本地已有的衍生图已在生成时上传；否则先查对象存储，都没有时才下载原图生成
+        if local_path.exists() or self.storage.exists(key):
+            return key
+        original = Path(self.get_absolute_path(relative_path))
+        self.publish_file(ensure_derivative(original, size))
+        return key
     
     def get_file_url(self, project_id: Optional[str], file_type: str, filename: str) -> str:
         """
@@ -193,9 +316,12 @@ class FileService:
             relative_path: Relative path from upload folder
         
         Returns:
-            Absolute file path
+            Absolute file path (downloaded from remote storage first if missing locally)
         """
-        return str(self.upload_folder / relative_path.replace('\\', '/'))
+        relative_path = relative_path.replace('\\', '/')
+        path = self.upload_folder / relative_path
+        self._fetch(relative_path, path)
+        return str(path)
     
     def delete_template(self, project_id: str) -> bool:
         """
@@ -213,6 +339,8 @@ class FileService:
         for file in template_dir.iterdir():
             if file.is_file():
                 file.unlink()
+        if self.storage.is_remote:
+            self.storage.delete_prefix(f"{project_id}/template/")
         
         return True
     
@@ -233,6 +361,8 @@ class FileService:
         for file in pages_dir.glob(f"{page_id}.*"):
             if file.is_file():
                 file.unlink()
+        if self.storage.is_remote:
+            self.storage.delete_prefix(f"{project_id}/pages/{page_id}.")
         
         return True
     
@@ -251,13 +381,18 @@ class FileService:
         
         if project_dir.exists():
             shutil.rmtree(project_dir)
+        if self.storage.is_remote:
+            self.storage.delete_prefix(f"{project_id}/")
         
         return True
     
     def file_exists(self, relative_path: str) -> bool:
         """Check if file exists"""
-        filepath = self.upload_folder / relative_path.replace('\\', '/')
-        return filepath.exists() and filepath.is_file()
+        relative_path = relative_path.replace('\\', '/')
+        filepath = self.upload_folder / relative_path
+        if filepath.exists() and filepath.is_file():
+            return True
+        return self.storage.is_remote and self.storage.exists(relative_path)
     
     def get_template_path(self, project_id: str) -> Optional[str]:
         """
@@ -275,6 +410,13 @@ class FileService:
         for file in template_dir.iterdir():
             if file.is_file() and file.stem == 'template':
                 return str(file)
+
+        # 本地没有时从远程存储下载
+        if self.storage.is_remote:
+            for key in self.storage.list_keys(f"{project_id}/template/template."):
+                path = self.upload_folder / key
+                if self._fetch(key, path):
+                    return str(path)
         
         return None
     
@@ -306,6 +448,7 @@ class FileService:
         
         filepath = template_dir / filename
         file.save(str(filepath))
+        self.publish_file(filepath)
         
         # Return relative path
         return filepath.relative_to(self.upload_folder).as_posix()
@@ -326,6 +469,8 @@ class FileService:
         
         if template_dir.exists():
             shutil.rmtree(template_dir)
+        if self.storage.is_remote:
+            self.storage.delete_prefix(f"user-templates/{template_id}/")
         
         return True
     
@@ -0,0 +1,119 @@
+"""
+Image Derivatives - 页面图片的缩略图 / 预览图（WebP）
+
+生成的页面原图通常是数 MB 的 PNG，编辑器缩略图列表、项目卡片等只需要小尺寸图片。
+这里为页面图片生成固定档位的 WebP 衍生图，存放在原图旁边：
+
+    pages/{page_id}_v1.png  ->  pages/{page_id}_v1.thumb.webp / pages/{page_id}_v1.preview.webp
+
+衍生图在保存原图时生成（IMAGE_DERIVATIVES_ON_SAVE），旧图片则在首次请求时按需生成；
+原图更新（mtime 更新）后衍生图会重新生成。
+"""
+import os
+import uuid
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+# 档位 -> 最大宽度（像素），高度按比例缩放
+DERIVATIVE_SIZES: Dict[str, int] = {
+    'thumb': 480,
+    'preview': 1280,
+}
+
+# Pillow 未编译 WebP 支持时退回 JPEG
+DERIVATIVE_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+DERIVATIVE_EXT = 'webp' if DERIVATIVE_FORMAT == 'WEBP' else 'jpg'
+DERIVATIVE_QUALITY = 82
+
+
+def derivative_path(original: Path, size: str) -> Path:
+    """衍生图路径（与原图同目录）"""
+    original = Path(original)
+    return original.with_name(f"{original.stem}.{size}.{DERIVATIVE_EXT}")
+
+
+def _is_fresh(path: Path, original: Path) -> bool:
+    try:
+        return path.stat().st_mtime_ns >= original.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def _write_derivative(image: Image.Image, path: Path, max_width: int) -> Image.Image:
+    """
+    缩放并以 WebP 写出（先写临时文件再替换，并发生成同一衍生图时互不影响）
+
+    Returns:
+        缩放后的图片（供生成更小的档位）
+    """
+    if image.width > max_width:
+        height = max(1, round(image.height * max_width / image.width))
+        image = image.resize((max_width, height), Image.Resampling.LANCZOS)
+
+    output = image
+    if output.mode not in ('RGB', 'RGBA'):
+        output = output.convert('RGBA' if 'A' in output.getbands() or 'transparency' in output.info else 'RGB')
+    if DERIVATIVE_FORMAT == 'JPEG' and output.mode != 'RGB':
+        output = output.convert('RGB')
+
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        output.save(tmp_path, format=DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY, method=4)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return image
+
+
+def generate_derivatives(original: Path, image: Optional[Image.Image] = None):
+    """
+    Generate every derivative size for an image
+
+    Args:
+        original: Path of the original image
+        image: Already decoded image (avoids reading the file again after saving)
+    """
+    original = Path(original)
+    if image is None:
+        with Image.open(original) as img:
+            img.load()
+            image = img.copy()
+    # 从大到小依次缩放，小图基于上一档的缩放结果生成
+    for size, max_width in sorted(DERIVATIVE_SIZES.items(), key=lambda item: -item[1]):
+        image = _write_derivative(image, derivative_path(original, size), max_width)
+
+
+def ensure_derivative(original: Path, size: str) -> Path:
+    """
+    Return the derivative for original at the given size, generating it if missing or stale
+
+    Raises:
+        ValueError: Unknown size
+        FileNotFoundError: Original image missing
+    """
+    if size not in DERIVATIVE_SIZES:
+        raise ValueError(f"Unknown image size: {size}")
+    original = Path(original)
+    if not original.exists():
+        raise FileNotFoundError(str(original))
+
+    path = derivative_path(original, size)
+    if not _is_fresh(path, original):
+        with Image.open(original) as img:
+            _write_derivative(img, path, DERIVATIVE_SIZES[size])
+    return path
+
+
+def delete_derivatives(original: Path):
+    """删除原图的所有衍生图"""
+    for size in DERIVATIVE_SIZES:
+        try:
+            derivative_path(original, size).unlink()
+        except OSError:
+            pass
@@ -0,0 +1,90 @@
+"""
+Image Pipeline - 基于 asyncio 的批量页面图片生成调度
+
+图片生成主要是在等待上游 API（单页可能长达数分钟）。使用线程池时，每个进行中的页面都要占用一个线程，
+并发数受 MAX_IMAGE_WORKERS 限制。这里改为在一个事件循环中调度所有页面：
+- 等待 API 返回期间不占用线程，同时进行的生成数只受 max_in_flight（以及上游限流）约束
+- 参考图读取、图片保存等 CPU/磁盘操作通过 asyncio.to_thread 在默认线程池中执行
+- 页面结果通过 on_result 回调交给调用方（在运行事件循环的线程中执行，可直接使用该线程的数据库会话）
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from PIL import Image
+
+from services.ai_providers.http_client import aclose_async_http_clients
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 32
+
+# (page_id, image_path, error)
+PageImageResult = Tuple[str, Optional[str], Optional[str]]
+
+
+@dataclass
+class PageImageJob:
+    """单个页面的图片生成参数（已生成好提示词，不包含 ORM 对象）"""
+    page_id: str
+    page_index: int
+    prompt: str
+    additional_ref_images: Optional[List[str]] = None
+
+
+def run_page_image_pipeline(
+    jobs: List[PageImageJob],
+    generate: Callable[[PageImageJob], Awaitable[Optional[Image.Image]]],
+    save: Callable[[str, Image.Image], str],
+    on_result: Callable[[PageImageResult], None],
+    on_tick: Callable[[], None] = None,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    tick_interval: float = 1.0
+):
+    """
+    Generate images for all pages in one event loop (blocks until every page finishes)
+
+    Args:
+        jobs: Pages to generate
+        generate: Coroutine function producing the image for a job
+        save: Blocking function saving an image, returns its relative path (runs in a worker thread)
+        on_result: Called with (page_id, image_path, error) as each page finishes
+        on_tick: Called after each batch of results and at least every tick_interval seconds
+        max_in_flight: Maximum number of concurrent generations
+        tick_interval: Seconds between on_tick calls while waiting
+    """
+    asyncio.run(_run_pipeline(jobs, generate, save, on_result, on_tick, max_in_flight, tick_interval))
+
+
+async def _run_pipeline(jobs, generate, save, on_result, on_tick, max_in_flight, tick_interval):
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+
+    async def _process(job: PageImageJob) -> PageImageResult:
+        async with semaphore:
+            try:
+                logger.info(f"🎨 Generating image for page {job.page_index}/{len(jobs)} (async)...")
+                image = await generate(job)
+                if not image:
+                    raise ValueError("Failed to generate image")
+
+                image_path = await asyncio.to_thread(save, job.page_id, image)
+                logger.info(f"✅ Image generated successfully for page {job.page_index}")
+                return job.page_id, image_path, None
+
+            except Exception as e:
+                logger.error(f"Failed to generate image for page {job.page_id}: {e}", exc_info=True)
+                return job.page_id, None, str(e)
+
+    try:
+        pending = {asyncio.create_task(_process(job)) for job in jobs}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=tick_interval, return_when=asyncio.FIRST_COMPLETED
+            )
+            for finished in done:
+                on_result(finished.result())
+            if on_tick:
+                on_tick()
+    finally:
+        await aclose_async_http_clients()
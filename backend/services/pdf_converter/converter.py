@@ -93,23 +93,11 @@ class PDFConverter:
             if page_count == 0:
                 return False
 
-            # 检查前几页
+            # 检查前几页：没有文本块，且图片占页面 50% 以上时认为是图片页
             check_pages = min(3, page_count)
-            image_pages = 0
-
-            for i in range(check_pages):
-                page_data = parser.parse_page(i)
-
-                # 如果没有文本块，但有图片，认为是图片页
-                if len(page_data.text_blocks) == 0 and len(page_data.images) > 0:
-                    # 检查图片是否覆盖大部分页面
-                    for img in page_data.images:
-                        x0, y0, x1, y1 = img.bbox
-                        img_area = (x1 - x0) * (y1 - y0)
-                        page_area = page_data.width * page_data.height
-                        if img_area > page_area * 0.5:  # 图片占页面 50% 以上
-                            image_pages += 1
-                            break
+            image_pages = sum(
+                1 for i in range(check_pages) if parser.is_image_page(i, min_coverage=0.5)
+            )
 
             # 如果大部分检查页都是图片页，认为是图片型 PDF
             return image_pages >= check_pages * 0.5
@@ -133,36 +121,25 @@ class PDFConverter:
         # 导入 PPTConverter（延迟导入避免循环依赖）
         from services.ppt_converter import PPTConverter
         from services.ppt_converter.text_corrector import load_reference_text
+        from .rasterizer import rasterize_pdf
 
         try:
-            # 1. 从 PDF 提取图片到临时目录
+            # 1. 在进程池中并行渲染 PDF 页面（各页渲染完成后直接在内存中交给 OCR，不写入图片文件）
             temp_dir = tempfile.mkdtemp(prefix="pdf_ocr_")
-            image_paths = []
 
             with PDFParser(pdf_path) as parser:
                 page_count = parser.get_page_count()
 
-                if progress_callback:
-                    progress_callback({
-                        'current_page': 0,
-                        'total': page_count,
-                        'stage': 'extracting',
-                        'stage_name': '正在从 PDF 提取图片...'
-                    })
-
-                for page_num in range(page_count):
-                    # 将 PDF 页面渲染为图片（使用较低 DPI 避免超出 OCR 尺寸限制）
-                    image_path = Path(temp_dir) / f"page_{page_num + 1:03d}.png"
-                    parser.render_page_to_image(page_num, image_path, dpi=100)
-                    image_paths.append(image_path)
+            if progress_callback:
+                progress_callback({
+                    'current_page': 0,
+                    'total': page_count,
+                    'stage': 'extracting',
+                    'stage_name': '正在从 PDF 提取图片...'
+                })
 
-                    if progress_callback:
-                        progress_callback({
-                            'current_page': page_num + 1,
-                            'total': page_count,
-                            'stage': 'extracting',
-                            'stage_name': f'提取第 {page_num + 1} 页图片...'
-                        })
+            # 使用较低 DPI 避免超出 OCR 尺寸限制
+            pages = rasterize_pdf(pdf_path, page_count, dpi=100)
 
             # 2. 加载参考文本（如果存在同名 .txt 文件）
             reference_text = load_reference_text(pdf_path)
@@ -177,10 +154,11 @@ class PDFConverter:
             )
 
             result = ppt_converter.convert_images(
-                image_paths=image_paths,
+                image_paths=pages,
                 output_path=output_path,
                 remove_text=True,  # 移除原图中的文字区域
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                work_dir=temp_dir  # 背景图写入临时目录
             )
 
             # 4. 清理临时文件
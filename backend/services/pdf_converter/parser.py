@@ -57,6 +57,23 @@ class PDFParser:
 
         return page_data
 
+    def is_image_page(self, page_num: int, min_coverage: float = 0.5) -> bool:
+        """
+        判断页面是否为图片页：没有文本，且有图片覆盖页面 min_coverage 以上的面积
+
+        只读取图片的位置信息，不提取图片数据（比 parse_page 快得多）
+        """
+        page = self.doc[page_num]
+        if page.get_text("text").strip():
+            return False
+
+        page_area = page.rect.width * page.rect.height
+        for info in page.get_image_info():
+            x0, y0, x1, y1 = info["bbox"]
+            if (x1 - x0) * (y1 - y0) > page_area * min_coverage:
+                return True
+        return False
+
     def _extract_text_blocks(self, page: fitz.Page) -> list[PDFTextBlock]:
         """提取页面中的文本块"""
         text_blocks = []
@@ -0,0 +1,188 @@
+"""
+PDF 页面栅格化
+把 PDF 页面渲染为 BGR 数组，供图片型 PDF 的 OCR 转换直接使用（不写入 / 读取 PNG 文件）
+
+页面按区间拆分后提交到共享进程池（services.cpu_pool），每个工作进程自行打开文档并渲染一段页面，
+多段并行；返回的 PageImage 在对应区间渲染完成后即可取用，OCR 不必等待全部页面渲染完成。
+
+预先渲染的区间数受窗口限制（每个工作进程 PREFETCH_RANGES_PER_WORKER 段），各页 release 后丢弃数组，
+一段页面全部 release 后才提交下一段，大型扫描件不会把所有页面的数组同时留在内存中。
+OCR 需要的页面所在区间尚未提交时立即提交，不等待窗口（避免与等待凑批的 LLM 过滤互相等待）。
+"""
+
+import math
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Union
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from services.cpu_pool import get_cpu_pool_workers, submit_cpu_task, reset_cpu_pool
+from services.ppt_converter.models import PageImage, PageSource
+
+logger = logging.getLogger(__name__)
+
+# 每个工作进程分到的区间数（区间越小，前几页越早可用于 OCR）
+RANGES_PER_WORKER = 4
+# 单个区间的最大页数
+MAX_RANGE_PAGES = 8
+# 每个工作进程最多预先渲染的区间数（已渲染、尚未全部 release 的区间占用窗口）
+PREFETCH_RANGES_PER_WORKER = 2
+
+
+def render_page_range(pdf_path: str, start: int, stop: int, dpi: int) -> list[np.ndarray]:
+    """
+    渲染 [start, stop) 页（在进程池中执行，每次调用单独打开文档）
+
+    Returns:
+        各页的 BGR 数组
+    """
+    zoom = dpi / 72
+    matrix = fitz.Matrix(zoom, zoom)
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start, stop):
+            pix = doc[page_num].get_pixmap(matrix=matrix, alpha=False)
+            samples = np.frombuffer(pix.samples, dtype=np.uint8)
+            # 每行可能有对齐填充，按 stride 切出有效像素
+            image = samples.reshape(pix.height, pix.stride)[:, :pix.width * pix.n]
+            image = image.reshape(pix.height, pix.width, pix.n)
+            if pix.n == 1:
+                pages.append(cv2.cvtColor(image, cv2.COLOR_GRAY2BGR))
+            else:
+                pages.append(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    return pages
+
+
+def _split_ranges(page_count: int, workers: int) -> list[tuple[int, int]]:
+    size = math.ceil(page_count / max(1, workers * RANGES_PER_WORKER))
+    size = max(1, min(MAX_RANGE_PAGES, size))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+class _RenderWindow:
+    """按页序预先提交区间渲染，同时在渲染中或未释放的区间不超过 limit 段"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._pending: deque['_PageRange'] = deque()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def add(self, page_range: '_PageRange'):
+        with self._lock:
+            self._pending.append(page_range)
+
+    def fill(self):
+        """在窗口允许的范围内按页序提交区间"""
+        while True:
+            with self._lock:
+                if not self._pending or self._in_flight >= self.limit:
+                    return
+                page_range = self._pending.popleft()
+                self._in_flight += 1
+            page_range.submit()
+
+    def demand(self, page_range: '_PageRange'):
+        """区间被需要但尚未预先提交：立即提交（可暂时超出窗口）"""
+        with self._lock:
+            if page_range not in self._pending:
+                return
+            self._pending.remove(page_range)
+            self._in_flight += 1
+        page_range.submit()
+
+    def finished(self):
+        """一段页面已全部释放，交还窗口并继续提交后续区间"""
+        with self._lock:
+            self._in_flight -= 1
+        self.fill()
+
+
+class _PageRange(PageSource):
+    """[start, stop) 页的批量渲染结果，各页 release 后丢弃对应数组"""
+
+    def __init__(self, window: _RenderWindow, pdf_path: str, start: int, stop: int, dpi: int):
+        self.window = window
+        self.args = (pdf_path, start, stop, dpi)
+        self.size = stop - start
+        self._future: Optional[Future] = None
+        self._pages: Optional[list[Optional[np.ndarray]]] = None
+        self._submitted = False
+        self._released: set[int] = set()
+        self._lock = threading.Lock()
+
+    def submit(self):
+        with self._lock:
+            if not self._submitted:
+                self._submitted = True
+                self._future = submit_cpu_task(render_page_range, *self.args)
+
+    def get(self, offset: int) -> np.ndarray:
+        self.window.demand(self)
+        self.submit()
+        with self._lock:
+            if self._pages is None:
+                try:
+                    self._pages = self._future.result()
+                except BrokenProcessPool:
+                    _, start, stop, _ = self.args
+                    logger.warning(f"第 {start + 1}-{stop} 页渲染进程异常退出，在当前线程重试")
+                    reset_cpu_pool()
+                    self._pages = render_page_range(*self.args)
+                self._future = None
+            return self._pages[offset]
+
+    def release(self, offset: int) -> None:
+        with self._lock:
+            if offset in self._released:
+                return
+            self._released.add(offset)
+            if self._pages is not None:
+                self._pages[offset] = None
+            done = len(self._released) == self.size
+            if done:
+                self._pages = self._future = None
+        if done and self._submitted:
+            self.window.finished()
+
+
+def rasterize_pdf(
+    pdf_path: Union[str, Path],
+    page_count: int,
+    dpi: int = 100,
+    name_prefix: str = 'page'
+) -> list[PageImage]:
+    """
+    并行渲染 PDF 的所有页面
+
+    Args:
+        pdf_path: PDF 文件路径
+        page_count: 页数
+        dpi: 分辨率
+        name_prefix: 页面名称前缀（页面名称形如 page_001）
+
+    Returns:
+        按页序排列的 PageImage，处理完各页后应调用 release()
+        （未启用进程池时不预先渲染，页面在首次 load() 时于当前线程中渲染）
+    """
+    workers = get_cpu_pool_workers()
+    window = _RenderWindow(limit=workers * PREFETCH_RANGES_PER_WORKER)
+    pages = []
+    for start, stop in _split_ranges(page_count, max(1, workers)):
+        page_range = _PageRange(window, str(pdf_path), start, stop, dpi)
+        window.add(page_range)
+        for offset, page_num in enumerate(range(start, stop)):
+            pages.append(PageImage(
+                name=f"{name_prefix}_{page_num + 1:03d}",
+                source=page_range,
+                offset=offset
+            ))
+    window.fill()
+    return pages
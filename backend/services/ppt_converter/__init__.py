@@ -5,7 +5,7 @@ PPT 可编辑文字转换模块
 从 geminipptskill 项目移植并适配
 """
 
-from .models import TextBlock, SlideData, ConversionResult
+from .models import TextBlock, SlideData, PageImage, ConversionResult
 from .ocr_engine import OCREngine
 from .font_mapper import FontMapper
 from .ppt_generator import PPTGenerator
@@ -14,6 +14,7 @@ from .converter import PPTConverter
 __all__ = [
     "TextBlock",
     "SlideData",
+    "PageImage",
     "ConversionResult",
     "OCREngine",
     "FontMapper",
@@ -1,21 +1,81 @@
 """
 百度云 OCR API 客户端
 使用通用文字识别（高精度含位置版）
+
+- access_token 在进程内按 API Key 共享，过期前自动刷新（不再每次导出重新获取）
+- 识别结果按图片内容哈希缓存到磁盘（OCR_CACHE_*），图片未变化时重新导出无需再次识别
+- 进程内同时进行的识别请求数受 BAIDU_OCR_MAX_CONCURRENCY 限制（多页并发由 PPTConverter 的页面线程池驱动）
+- 除图片文件外也可直接识别内存中的 BGR 数组（如 PDF 页面的渲染结果）
 """
 
 import base64
+import hashlib
 import io
+import json
+import os
 import re
+import threading
+import time
 import logging
 from pathlib import Path
-from typing import Union, Optional
-import requests
+from typing import Any, Union, Optional
+import numpy as np
 from PIL import Image
 
 from .models import TextBlock
+from ..ai_providers.http_client import get_http_client
+from ..text_cache import DiskTextCache
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_CACHE_TTL = 30 * 24 * 3600  # 30 天
+DEFAULT_CACHE_MAX_ENTRIES = 20000
+# access_token 在到期前提前刷新的时间（秒）
+TOKEN_REFRESH_MARGIN = 3600
+
+# 进程内共享的 access_token：(api_key, secret_key) -> (token, 到期时间)
+_tokens: dict[tuple[str, str], tuple[str, float]] = {}
+_token_lock = threading.Lock()
+
+_request_semaphore: Optional[threading.BoundedSemaphore] = None
+_result_cache: Optional[DiskTextCache] = None
+_cache_initialized = False
+_init_lock = threading.Lock()
+
+
+def _get_request_semaphore() -> threading.BoundedSemaphore:
+    """进程内共享的识别请求并发限制（BAIDU_OCR_MAX_CONCURRENCY）"""
+    global _request_semaphore
+    if _request_semaphore is None:
+        with _init_lock:
+            if _request_semaphore is None:
+                from config import get_config
+                limit = int(getattr(get_config(), 'BAIDU_OCR_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY))
+                _request_semaphore = threading.BoundedSemaphore(max(1, limit))
+    return _request_semaphore
+
+
+def get_ocr_result_cache() -> Optional[DiskTextCache]:
+    """获取 OCR 结果的磁盘缓存（OCR_CACHE_ENABLED=false 时返回 None）"""
+    global _result_cache, _cache_initialized
+    if not _cache_initialized:
+        with _init_lock:
+            if not _cache_initialized:
+                from config import get_config
+                config = get_config()
+                if getattr(config, 'OCR_CACHE_ENABLED', True):
+                    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+                    path = getattr(config, 'OCR_CACHE_PATH', '') or os.path.join(backend_dir, 'instance', 'ocr_cache')
+                    _result_cache = DiskTextCache(
+                        path,
+                        ttl=getattr(config, 'OCR_CACHE_TTL', DEFAULT_CACHE_TTL),
+                        max_entries=getattr(config, 'OCR_CACHE_MAX_ENTRIES', DEFAULT_CACHE_MAX_ENTRIES)
+                    )
+                    logger.info(f"OCR result cache enabled ({path})")
+                _cache_initialized = True
+    return _result_cache
+
 
 # 纯符号正则（用于过滤误识别）
 SYMBOL_ONLY_PATTERN = re.compile(
@@ -53,39 +113,62 @@ class BaiduOCRClient:
     TOKEN_URL = "https://aip.baidubce.com/oauth/2.0/token"
     # 使用通用文字识别（含位置信息版）
     OCR_URL = "https://aip.baidubce.com/rest/2.0/ocr/v1/general"
+    # 识别参数（同时作为结果缓存键的一部分）
+    OCR_PARAMS = {
+        "recognize_granularity": "small",
+        "probability": "true"
+    }
+    # QPS 超限错误码（多页并行识别时可能触发），退避后重试
+    QPS_LIMIT_ERROR_CODES = {18}
+    QPS_LIMIT_MAX_RETRIES = 4
+    # access_token 无效 / 过期错误码，刷新 token 后重试一次
+    TOKEN_ERROR_CODES = {110, 111}
 
     def __init__(self, api_key: str, secret_key: str):
         self.api_key = api_key
         self.secret_key = secret_key
-        self._access_token: Optional[str] = None
 
     @property
     def access_token(self) -> str:
-        """获取或刷新 access_token"""
-        if self._access_token is None:
-            self._access_token = self._get_access_token()
-        return self._access_token
-
-    def _get_access_token(self) -> str:
-        """从百度 API 获取 access_token"""
+        """获取 access_token（进程内共享，到期前刷新）"""
+        key = (self.api_key, self.secret_key)
+        with _token_lock:
+            cached = _tokens.get(key)
+            if cached and cached[1] > time.time():
+                return cached[0]
+            token, expires_in = self._get_access_token()
+            _tokens[key] = (token, time.time() + max(0, expires_in - TOKEN_REFRESH_MARGIN))
+            return token
+
+    def _invalidate_access_token(self, token: str):
+        """丢弃失效的 access_token（其他线程已刷新时保留新 token）"""
+        key = (self.api_key, self.secret_key)
+        with _token_lock:
+            cached = _tokens.get(key)
+            if cached and cached[0] == token:
+                del _tokens[key]
+
+    def _get_access_token(self) -> tuple[str, int]:
+        """从百度 API 获取 access_token，返回 (token, 有效期秒数)"""
         params = {
             "grant_type": "client_credentials",
             "client_id": self.api_key,
             "client_secret": self.secret_key
         }
 
-        response = requests.post(self.TOKEN_URL, params=params, timeout=10)
+        response = get_http_client(self.TOKEN_URL).post(self.TOKEN_URL, params=params, timeout=10)
         response.raise_for_status()
 
         result = response.json()
         if "access_token" not in result:
             raise ValueError(f"获取 access_token 失败: {result}")
 
-        return result["access_token"]
+        # 百度 access_token 有效期通常为 30 天
+        return result["access_token"], int(result.get("expires_in", 30 * 24 * 3600))
 
-    def _prepare_image(self, image_path: Path) -> tuple[str, float]:
+    def _prepare_image(self, image: Union[Path, np.ndarray]) -> tuple[str, float]:
         """
-        准备图片用于 OCR，确保满足百度 OCR 限制
+        准备图片（图片文件或 BGR 数组）用于 OCR，确保满足百度 OCR 限制
 
         百度 OCR 限制：
         - 图片最长边不超过 4096px
@@ -94,69 +177,97 @@ class BaiduOCRClient:
         Returns:
             (base64_data, scale_factor): base64 编码的图片数据和缩放比例
         """
+        if isinstance(image, np.ndarray):
+            return self._encode_image(Image.fromarray(np.ascontiguousarray(image[:, :, ::-1])))
+        with Image.open(image) as img:
+            return self._encode_image(img)
+
+    def _encode_image(self, img: Image.Image) -> tuple[str, float]:
+        """缩放并编码为 JPEG base64，返回 (base64_data, scale_factor)"""
         MAX_DIMENSION = 4096
         MAX_BASE64_SIZE = 4 * 1024 * 1024  # 4MB
 
-        with Image.open(image_path) as img:
-            original_width, original_height = img.size
-            scale_factor = 1.0
-
-            # 检查是否需要缩放
-            max_side = max(original_width, original_height)
-            if max_side > MAX_DIMENSION:
-                scale_factor = MAX_DIMENSION / max_side
-                new_width = int(original_width * scale_factor)
-                new_height = int(original_height * scale_factor)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                logger.info(
-                    f"图片缩放: {original_width}x{original_height} -> "
-                    f"{new_width}x{new_height} (scale={scale_factor:.3f})"
-                )
+        original_width, original_height = img.size
+        scale_factor = 1.0
+
+        # 检查是否需要缩放
+        max_side = max(original_width, original_height)
+        if max_side > MAX_DIMENSION:
+            scale_factor = MAX_DIMENSION / max_side
+            new_width = int(original_width * scale_factor)
+            new_height = int(original_height * scale_factor)
+            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            logger.info(
+                f"图片缩放: {original_width}x{original_height} -> "
+                f"{new_width}x{new_height} (scale={scale_factor:.3f})"
+            )
 
-            # 转换为 JPEG 并编码为 base64
+        # 转换为 JPEG 并编码为 base64
+        buffer = io.BytesIO()
+        # 转换为 RGB（去除 alpha 通道）
+        if img.mode in ('RGBA', 'P'):
+            img = img.convert('RGB')
+        img.save(buffer, format='JPEG', quality=85)
+        image_bytes = buffer.getvalue()
+
+        # 检查大小，如果超过限制则进一步压缩
+        quality = 85
+        while len(image_bytes) > MAX_BASE64_SIZE and quality > 30:
+            quality -= 10
             buffer = io.BytesIO()
-            # 转换为 RGB（去除 alpha 通道）
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-            img.save(buffer, format='JPEG', quality=85)
+            img.save(buffer, format='JPEG', quality=quality)
             image_bytes = buffer.getvalue()
-
-            # 检查大小，如果超过限制则进一步压缩
-            quality = 85
-            while len(image_bytes) > MAX_BASE64_SIZE and quality > 30:
-                quality -= 10
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=quality)
-                image_bytes = buffer.getvalue()
-                logger.info(f"图片压缩: quality={quality}, size={len(image_bytes)}")
-
-            return base64.b64encode(image_bytes).decode("utf-8"), scale_factor
-
-    def recognize(
-        self,
-        image_path: Union[str, Path],
-        confidence_threshold: float = 0.6
-    ) -> list[TextBlock]:
-        """识别图片中的文字"""
-        image_path = Path(image_path)
-
+            logger.info(f"图片压缩: quality={quality}, size={len(image_bytes)}")
+
+        return base64.b64encode(image_bytes).decode("utf-8"), scale_factor
+
+    def _cache_key(self, image: Union[Path, np.ndarray]) -> str:
+        """结果缓存键：识别接口、识别参数与图片内容（文件内容或数组像素）的哈希"""
+        digest = hashlib.sha256()
+        if isinstance(image, np.ndarray):
+            digest.update(repr(image.shape).encode('utf-8'))
+            digest.update(np.ascontiguousarray(image).data)
+        else:
+            with open(image, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        raw = json.dumps([self.OCR_URL, self.OCR_PARAMS, digest.hexdigest()], sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _request_ocr(self, image: Union[Path, np.ndarray]) -> dict[str, Any]:
+        """调用识别接口，返回 {"words_result": [...], "scale_factor": float}"""
         # 压缩图片以满足百度 OCR 限制（最长边 4096px，base64 后 4MB）
-        image_data, scale_factor = self._prepare_image(image_path)
+        image_data, scale_factor = self._prepare_image(image)
 
-        url = f"{self.OCR_URL}?access_token={self.access_token}"
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {
-            "image": image_data,
-            "recognize_granularity": "small",
-            "probability": "true"
-        }
-
-        response = requests.post(
-            url, headers=headers, data=data, timeout=30
-        )
-        response.raise_for_status()
-
-        result = response.json()
+        data = {"image": image_data, **self.OCR_PARAMS}
+        client = get_http_client(self.OCR_URL)
+
+        token_refreshed = False
+        attempt = 0
+        with _get_request_semaphore():
+            while True:
+                token = self.access_token
+                response = client.post(
+                    self.OCR_URL, params={"access_token": token},
+                    headers=headers, data=data, timeout=30
+                )
+                response.raise_for_status()
+
+                result = response.json()
+                error_code = result.get("error_code")
+                if error_code in self.TOKEN_ERROR_CODES and not token_refreshed:
+                    logger.info("百度 OCR access_token 失效，刷新后重试")
+                    self._invalidate_access_token(token)
+                    token_refreshed = True
+                    continue
+                if (error_code not in self.QPS_LIMIT_ERROR_CODES
+                        or attempt == self.QPS_LIMIT_MAX_RETRIES):
+                    break
+                delay = 0.5 * (2 ** attempt)
+                attempt += 1
+                logger.info(f"百度 OCR QPS 超限，{delay:.1f}s 后重试")
+                time.sleep(delay)
 
         if "error_code" in result:
             raise ValueError(
@@ -164,7 +275,6 @@ class BaiduOCRClient:
                 f"{result.get('error_msg', '未知错误')}"
             )
 
-        text_blocks = []
         words_result = result.get("words_result", [])
 
         # 调试日志：输出原始 OCR 结果
@@ -174,7 +284,42 @@ class BaiduOCRClient:
             raw_prob = item.get("probability", {}).get("average", 0)
             logger.info(f"  [{i}] 文字: '{raw_text}', 置信度: {raw_prob:.3f}")
 
-        for item in words_result:
+        return {"words_result": words_result, "scale_factor": scale_factor}
+
+    def _recognize_raw(self, image: Union[Path, np.ndarray]) -> dict[str, Any]:
+        """获取原始识别结果（优先读取缓存，缓存读写失败不影响识别）"""
+        cache = get_ocr_result_cache()
+        if cache is None:
+            return self._request_ocr(image)
+
+        key = self._cache_key(image)
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"OCR cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            logger.info(f"OCR 缓存命中: {key[:12]}")
+            return json.loads(cached)
+
+        raw = self._request_ocr(image)
+        try:
+            cache.set(key, json.dumps(raw, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"OCR cache write failed: {e}")
+        return raw
+
+    def recognize(
+        self,
+        image: Union[str, Path, np.ndarray],
+        confidence_threshold: float = 0.6
+    ) -> list[TextBlock]:
+        """识别图片（图片文件路径或 BGR 数组）中的文字"""
+        raw = self._recognize_raw(image if isinstance(image, np.ndarray) else Path(image))
+        scale_factor = raw["scale_factor"]
+
+        text_blocks = []
+        for item in raw["words_result"]:
             text = item.get("words", "")
             location = item.get("location", {})
             prob = item.get("probability", {})
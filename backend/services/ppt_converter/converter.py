@@ -3,21 +3,32 @@ PPT 转换器主模块
 整合 OCR、字体映射、PPT 生成等功能
 """
 
+import os
+import queue
+import shutil
 import logging
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Union, Optional, Callable
 import cv2
+import numpy as np
 
-from .models import SlideData, ConversionResult
+from .models import SlideData, ConversionResult, TextBlock, PageImage
 from .ocr_engine import OCREngine
 from .font_mapper import FontMapper
 from .ppt_generator import PPTGenerator
-from .llm_filter import get_llm_filter
+from .llm_filter import LLMFilterBatcher, get_llm_filter
 from .text_corrector import TextCorrector, load_reference_text
 from .utils.image_utils import load_image, remove_text_regions
+from ..cpu_pool import submit_cpu_task, reset_cpu_pool
 
 logger = logging.getLogger(__name__)
 
+# 同时处理的页数（OCR / LLM 请求并发数）
+DEFAULT_MAX_WORKERS = 4
+
 
 class PPTConverter:
     """PPT 转换器，将图片 PPT 转换为可编辑 PPT"""
@@ -27,14 +38,18 @@ class PPTConverter:
         api_key: str = None,
         secret_key: str = None,
         confidence_threshold: float = 0.6,
-        reference_text: str = None
+        reference_text: str = None,
+        max_workers: int = None
     ):
         self.ocr_engine = OCREngine(
             api_key=api_key,
             secret_key=secret_key
         )
-        self.font_mapper = FontMapper()
         self.confidence_threshold = confidence_threshold
+        # 并行处理的页数：优先使用参数，其次环境变量 PPT_CONVERT_WORKERS
+        self.max_workers = max(1, max_workers or int(
+            os.environ.get("PPT_CONVERT_WORKERS", DEFAULT_MAX_WORKERS)
+        ))
         # 文本校正器（如果提供了参考文本）
         self.text_corrector = None
         if reference_text:
@@ -45,54 +60,92 @@ class PPTConverter:
 
     def convert_images(
         self,
-        image_paths: list[Union[str, Path]],
+        image_paths: list[Union[str, Path, PageImage]],
         output_path: Union[str, Path],
         remove_text: bool = True,
-        progress_callback: Optional[Callable[[dict], None]] = None
+        progress_callback: Optional[Callable[[dict], None]] = None,
+        work_dir: Optional[Union[str, Path]] = None
     ) -> ConversionResult:
         """
         转换多张图片为可编辑 PPT
 
+        各页并行处理：OCR 在线程池中执行；配置了 LLM 过滤时，多页的 OCR 结果按 token 预算
+        合并为少量批次请求；CPU 阶段（字体颜色提取、文字区域擦除）提交到共享进程池；
+        幻灯片按页序组装，进度回调始终在调用线程中执行。
+
         Args:
-            image_paths: 图片路径列表
+            image_paths: 图片路径列表，也可以是内存中的页面图片（PageImage，不读写原图文件）
             output_path: 输出文件路径
             remove_text: 是否移除原图中的文字区域
             progress_callback: 进度回调函数，接收进度字典
+            work_dir: PageImage 页面背景图的写入目录（默认使用临时目录，生成 PPT 后删除）
         """
         generator = PPTGenerator()
         slides_data = []
         total_text_blocks = 0
         total_pages = len(image_paths)
 
-        for idx, image_path in enumerate(image_paths, start=1):
-            # 回调：开始处理当前页
-            if progress_callback:
-                progress_callback({
-                    'current_page': idx,
-                    'total': total_pages,
-                    'stage': 'ocr',
-                    'stage_name': f'第 {idx} 页 OCR 识别中...'
-                })
-
-            slide_data = self._process_single_image(
-                image_path, remove_text, index=idx,
-                progress_callback=progress_callback
-            )
-            if slide_data:
-                generator.add_slide(slide_data)
-                slides_data.append(slide_data)
-                total_text_blocks += len(slide_data.text_blocks)
-
-            # 回调：当前页处理完成
-            if progress_callback:
-                progress_callback({
-                    'current_page': idx,
-                    'total': total_pages,
-                    'completed': idx,
-                    'stage': 'page_done',
-                    'stage_name': f'第 {idx} 页处理完成',
-                    'text_blocks_count': len(slide_data.text_blocks) if slide_data else 0
-                })
+        # 工作线程只把事件放入队列，由调用线程统一处理（回调中可能使用数据库会话等线程相关资源）
+        events: queue.Queue = queue.Queue()
+        finished: dict[int, Optional[SlideData]] = {}
+        next_index = 1
+        completed = 0
+
+        temp_dir = None
+        if work_dir is None and any(isinstance(page, PageImage) for page in image_paths):
+            temp_dir = work_dir = tempfile.mkdtemp(prefix='ppt_convert_')
+
+        # LLM 智能过滤（如果配置了 DeepSeek）：整个文档的页面合并为少量请求
+        llm_filter = get_llm_filter()
+        batcher = LLMFilterBatcher(llm_filter, total_pages) if llm_filter else None
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ppt-convert')
+        try:
+            for idx, image_path in enumerate(image_paths, start=1):
+                if isinstance(image_path, PageImage):
+                    background_path = Path(work_dir) / f"{image_path.name}.png"
+                    page = (image_path, background_path)
+                else:
+                    page = (Path(image_path), None)
+                executor.submit(self._process_page, *page, remove_text, idx, events, batcher)
+
+            while completed < total_pages:
+                kind, idx, payload = events.get()
+
+                if kind == 'progress':
+                    if progress_callback:
+                        progress_callback({'current_page': idx, 'total': total_pages, **payload})
+                    continue
+                if kind == 'error':
+                    raise payload
+
+                slide_data = self._finish_page(payload)
+                finished[idx] = slide_data
+                completed += 1
+
+                # 按页序加入已完成的连续页面
+                while next_index in finished:
+                    ready = finished.pop(next_index)
+                    if ready:
+                        generator.add_slide(ready)
+                        slides_data.append(ready)
+                        total_text_blocks += len(ready.text_blocks)
+                    next_index += 1
+
+                # 回调：当前页处理完成
+                if progress_callback:
+                    progress_callback({
+                        'current_page': idx,
+                        'total': total_pages,
+                        'completed': completed,
+                        'stage': 'page_done',
+                        'stage_name': f'第 {idx} 页处理完成',
+                        'text_blocks_count': len(slide_data.text_blocks) if slide_data else 0
+                    })
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            if batcher:
+                batcher.close()
 
         # 回调：生成 PPT 文件
         if progress_callback:
@@ -104,7 +157,11 @@ class PPTConverter:
                 'stage_name': '正在生成 PPT 文件...'
             })
 
-        output_path = generator.save(output_path)
+        try:
+            output_path = generator.save(output_path)
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
 
         return ConversionResult(
             output_path=output_path,
@@ -113,84 +170,184 @@ class PPTConverter:
             success=True
         )
 
-    def _process_single_image(
+    def _process_page(
         self,
-        image_path: Union[str, Path],
+        page: Union[Path, PageImage],
+        background_path: Optional[Path],
         remove_text: bool,
-        index: int = 1,
-        progress_callback: Optional[Callable[[dict], None]] = None
-    ) -> Optional[SlideData]:
-        """处理单张图片"""
-        image_path = Path(image_path)
-        if not image_path.exists():
-            return None
-
-        image = load_image(image_path)
-        if image is None:
-            return None
+        index: int,
+        events: queue.Queue,
+        batcher: Optional[LLMFilterBatcher] = None
+    ) -> None:
+        """
+        处理单页（工作线程）：OCR 识别后交给 LLM 批量过滤（不阻塞工作线程），
+        过滤完成后执行文本校正并把 CPU 阶段提交到进程池，
+        完成或失败时向 events 投递 ('done', index, ...) / ('error', index, exception)
 
-        height, width = image.shape[:2]
+        page 为 PageImage 时直接识别和处理内存中的图片，背景图写入 background_path，
+        CPU 阶段提交后调用 page.release() 释放页面数组。
+        """
+        def report(stage: str, stage_name: str):
+            events.put(('progress', index, {'stage': stage, 'stage_name': stage_name}))
 
-        # OCR 识别
-        text_blocks = self.ocr_engine.recognize(
-            image_path, self.confidence_threshold
-        )
+        release = page.release if isinstance(page, PageImage) else None
+        try:
+            report('ocr', f'第 {index} 页 OCR 识别中...')
+            image_path = page.load() if isinstance(page, PageImage) else page
+            text_blocks = self._recognize_page(image_path)
+            if text_blocks is None:
+                if batcher:
+                    batcher.skip()
+                if release:
+                    release()
+                events.put(('done', index, None))
+                return
 
-        # 字体映射
-        text_blocks = self.font_mapper.enrich_text_blocks(
-            text_blocks, image, height
-        )
+            if batcher and text_blocks:
+                # 回调：LLM 过滤阶段
+                report('llm_filter', f'第 {index} 页 LLM 智能过滤中...')
+                logger.info(f"第 {index} 页开始 LLM 过滤...")
+                batcher.submit(index, text_blocks).add_done_callback(
+                    lambda f: self._after_filter(
+                        f, image_path, background_path, remove_text, index, events, report, release
+                    )
+                )
+                return
+            if batcher:
+                batcher.skip()
 
-        # LLM 智能处理（如果配置了 DeepSeek）
-        llm_filter = get_llm_filter()
-        if llm_filter and text_blocks:
-            # 回调：LLM 过滤阶段
-            if progress_callback:
-                progress_callback({
-                    'current_page': index,
-                    'stage': 'llm_filter',
-                    'stage_name': f'第 {index} 页 LLM 智能过滤中...'
-                })
-
-            logger.info(f"第 {index} 页开始 LLM 过滤...")
-            text_blocks, filtered_count = llm_filter.filter_text_blocks(
-                text_blocks, page_index=index
+            self._submit_render(
+                image_path, background_path, remove_text, index, text_blocks, events, report, release
             )
+        except Exception as e:
+            events.put(('error', index, e))
+
+    def _after_filter(
+        self,
+        future: Future,
+        image_path: Union[Path, np.ndarray],
+        background_path: Optional[Path],
+        remove_text: bool,
+        index: int,
+        events: queue.Queue,
+        report: Callable[[str, str], None],
+        release: Optional[Callable[[], None]] = None
+    ) -> None:
+        """LLM 过滤完成（在批量过滤线程中执行）"""
+        try:
+            text_blocks, filtered_count = future.result()
             logger.info(f"第 {index} 页 LLM 过滤完成，过滤 {filtered_count} 个")
 
             # 注意：OCR 文字修复功能已禁用
             # 原因：DeepSeek 会参考其他文字块内容来"补全"当前行，导致重复文字
             # 如需启用，需要更严格的验证逻辑或改用单条处理模式
 
+            self._submit_render(
+                image_path, background_path, remove_text, index, text_blocks, events, report, release
+            )
+        except Exception as e:
+            events.put(('error', index, e))
+
+    def _submit_render(
+        self,
+        image_path: Union[Path, np.ndarray],
+        background_path: Optional[Path],
+        remove_text: bool,
+        index: int,
+        text_blocks: list[TextBlock],
+        events: queue.Queue,
+        report: Callable[[str, str], None],
+        release: Optional[Callable[[], None]] = None
+    ) -> None:
+        """文本校正后把 CPU 阶段提交到进程池，随后调用 release 释放页面数组（CPU 阶段参数中仍持有）"""
         # 文本校正（使用参考文本修复 OCR 遗漏和错别字）
         if self.text_corrector and text_blocks:
-            if progress_callback:
-                progress_callback({
-                    'current_page': index,
-                    'stage': 'text_correction',
-                    'stage_name': f'第 {index} 页文本校正中...'
-                })
+            report('text_correction', f'第 {index} 页文本校正中...')
             logger.info(f"第 {index} 页开始文本校正...")
             text_blocks = self.text_corrector.correct_text_blocks(
                 text_blocks, page_num=index
             )
             logger.info(f"第 {index} 页文本校正完成")
 
-        # 处理背景图片
-        if remove_text and text_blocks:
-            # 提取 bbox 列表传给 remove_text_regions
-            bboxes = [block.bbox for block in text_blocks]
-            processed_image = remove_text_regions(image, bboxes)
-            processed_path = image_path.with_suffix('.processed.png')
-            cv2.imwrite(str(processed_path), processed_image)
-            bg_path = processed_path
-        else:
-            bg_path = image_path
-
-        return SlideData(
-            index=index,
-            image_path=bg_path,
-            width=width,
-            height=height,
-            text_blocks=text_blocks
+        if isinstance(image_path, Path):
+            image_path = str(image_path)
+        args = (image_path, index, text_blocks, remove_text,
+                str(background_path) if background_path else None)
+        try:
+            future = submit_cpu_task(_render_slide, *args)
+        finally:
+            if release:
+                release()
+        future.add_done_callback(lambda f: events.put(('done', index, (f, args))))
+
+    def _finish_page(self, payload) -> Optional[SlideData]:
+        """取出 CPU 阶段结果；工作进程崩溃时在当前线程重新执行该页的 CPU 阶段"""
+        if payload is None:
+            return None
+        future, args = payload
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            logger.warning(f"第 {args[1]} 页处理进程异常退出，在当前线程重试")
+            reset_cpu_pool()
+            return _render_slide(*args)
+
+    def _recognize_page(self, image_path: Union[Path, np.ndarray]) -> Optional[list[TextBlock]]:
+        """OCR 识别（图片文件不存在时返回 None）"""
+        if isinstance(image_path, Path) and not image_path.exists():
+            return None
+
+        return self.ocr_engine.recognize(
+            image_path, self.confidence_threshold
         )
+
+
+def _render_slide(
+    image_path: Union[str, np.ndarray],
+    index: int,
+    text_blocks: list[TextBlock],
+    remove_text: bool,
+    background_path: Optional[str] = None
+) -> Optional[SlideData]:
+    """
+    CPU 阶段（在进程池中执行）：字体映射（字重、颜色提取）与背景文字擦除
+
+    字体映射只依赖文字块的位置，在 LLM 过滤之后执行，被过滤的文字块不再计算。
+    image_path 为内存中的 BGR 数组时，背景图（擦除文字后或原图）写入 background_path。
+    """
+    if isinstance(image_path, np.ndarray):
+        image = image_path
+    else:
+        image_path = Path(image_path)
+        image = load_image(image_path)
+    if image is None:
+        return None
+
+    height, width = image.shape[:2]
+
+    # 字体映射
+    text_blocks = FontMapper().enrich_text_blocks(
+        text_blocks, image, height
+    )
+
+    # 处理背景图片
+    if remove_text and text_blocks:
+        # 提取 bbox 列表传给 remove_text_regions
+        bboxes = [block.bbox for block in text_blocks]
+        processed_image = remove_text_regions(image, bboxes)
+        processed_path = Path(background_path) if background_path else image_path.with_suffix('.processed.png')
+        cv2.imwrite(str(processed_path), processed_image)
+        bg_path = processed_path
+    elif background_path:
+        bg_path = Path(background_path)
+        cv2.imwrite(str(bg_path), image)
+    else:
+        bg_path = image_path
+
+    return SlideData(
+        index=index,
+        image_path=bg_path,
+        width=width,
+        height=height,
+        text_blocks=text_blocks
+    )
@@ -10,7 +10,7 @@ from pathlib import Path
 import numpy as np
 
 from .font_classifier import FontCategory, FontClassifier
-from .utils.color_utils import extract_text_color
+from .utils.color_utils import extract_text_color, extract_text_colors
 from .utils.font_utils import (
     get_font_path,
     get_font_display_name,
@@ -46,9 +46,10 @@ class FontMapper:
         self,
         text_image: np.ndarray,
         bbox_height: int,
-        image_height: int
+        image_height: int,
+        color: Optional[tuple[int, int, int]] = None
     ) -> FontMapping:
-        """分析文字图像并映射到具体字体"""
+        """分析文字图像并映射到具体字体（color 为已批量提取的文字颜色）"""
         # 先计算字号
         font_size = estimate_font_size_pt(bbox_height, image_height)
 
@@ -59,7 +60,8 @@ class FontMapper:
             category = FontCategory.SONGTI
 
         weight = self.classifier.estimate_font_weight(text_image)
-        color = extract_text_color(text_image)
+        if color is None:
+            color = extract_text_color(text_image)
         font_path = get_font_path(category.value, weight)
         font_name = get_font_display_name(category.value)
 
@@ -76,13 +78,14 @@ class FontMapper:
         self,
         text_block: TextBlock,
         full_image: np.ndarray,
-        image_height: int
+        image_height: int,
+        color: Optional[tuple[int, int, int]] = None
     ) -> TextBlock:
         """为 TextBlock 填充字体信息"""
         x, y, w, h = text_block.bbox
         text_image = crop_image(full_image, text_block.bbox)
 
-        mapping = self.map_font(text_image, h, image_height)
+        mapping = self.map_font(text_image, h, image_height, color)
 
         text_block.font_category = mapping.category
         text_block.font_weight = mapping.weight
@@ -105,8 +108,11 @@ class FontMapper:
         full_image: np.ndarray,
         image_height: int
     ) -> list[TextBlock]:
-        """批量为 TextBlock 列表填充字体信息"""
+        """批量为 TextBlock 列表填充字体信息（整页文字块的颜色一次性提取）"""
+        colors = extract_text_colors([
+            crop_image(full_image, tb.bbox) for tb in text_blocks
+        ])
         return [
-            self.enrich_text_block(tb, full_image, image_height)
-            for tb in text_blocks
+            self.enrich_text_block(tb, full_image, image_height, color)
+            for tb, color in zip(text_blocks, colors)
         ]
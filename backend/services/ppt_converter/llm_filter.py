@@ -1,18 +1,79 @@
 """
 LLM 智能过滤模块
 使用 DeepSeek API 判断 OCR 识别的文字是否应该被提取
+
+整个文档的多页文字按 token 预算合并为少量请求（每页使用页内编号），各批次并发请求；
+每页的过滤结果按 (模型, 页面文字) 的哈希缓存到磁盘，页面文字未变化时无需再次请求。
 """
 
 import os
+import re
+import json
+import hashlib
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional
 
 from openai import OpenAI
 
 from .models import TextBlock
+from ..text_cache import DiskTextCache
 
 logger = logging.getLogger(__name__)
 
+# 每个请求包含的页面文字 token 上限（估算值），可用环境变量 LLM_FILTER_BATCH_TOKENS 覆盖
+DEFAULT_BATCH_TOKENS = 4000
+# 同时进行的批次请求数，可用环境变量 LLM_FILTER_MAX_CONCURRENCY 覆盖
+DEFAULT_MAX_CONCURRENCY = 4
+# 结果缓存（backend/instance/llm_filter_cache/），可用环境变量 LLM_FILTER_CACHE_ENABLED=false 关闭
+CACHE_TTL = 30 * 24 * 3600
+CACHE_MAX_ENTRIES = 20000
+# 提示词变化时修改版本号，使旧缓存失效
+PROMPT_VERSION = 2
+
+_FILTER_CRITERIA = """判断标准：
+1. 属于页面正文内容的文字应该保留（标题、正文、表格内容、列表项、段落等）
+2. 以下内容应该过滤掉：
+   - 页码（如单独的数字 "1"、"2"、"第1页" 等）
+   - 水印文字
+   - 装饰性文字
+   - 图片内嵌的文字（如古文献截图、示意图中的标注等）
+   - 明显不属于正文的杂乱字符
+
+重要原则：如果不确定，宁可保留，不要误删正文内容。"""
+
+_result_cache: Optional[DiskTextCache] = None
+_cache_initialized = False
+_cache_lock = threading.Lock()
+
+
+def _get_result_cache() -> Optional[DiskTextCache]:
+    """过滤结果的磁盘缓存（LLM_FILTER_CACHE_ENABLED=false 时返回 None）"""
+    global _result_cache, _cache_initialized
+    if not _cache_initialized:
+        with _cache_lock:
+            if not _cache_initialized:
+                if os.environ.get("LLM_FILTER_CACHE_ENABLED", "true").lower() == "true":
+                    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+                    _result_cache = DiskTextCache(
+                        os.path.join(backend_dir, 'instance', 'llm_filter_cache'),
+                        ttl=CACHE_TTL,
+                        max_entries=CACHE_MAX_ENTRIES
+                    )
+                _cache_initialized = True
+    return _result_cache
+
+
+def _estimate_tokens(texts: list[str]) -> int:
+    """估算页面文字的 token 数（按字符数保守估计，另加每行编号的开销）"""
+    return sum(len(text) + 4 for text in texts) + 8
+
+
+def _page_texts(text_blocks: list[TextBlock]) -> list[str]:
+    """参与判断的文字（非空文字块，页内编号即该列表的下标）"""
+    return [tb.text.strip() for tb in text_blocks if tb.text.strip()]
+
 
 def load_deepseek_config() -> dict:
     """
@@ -52,6 +113,12 @@ class LLMFilter:
             base_url=config["base_url"]
         )
         self.model = config["model"]
+        self.batch_tokens = max(1, int(
+            os.environ.get("LLM_FILTER_BATCH_TOKENS", DEFAULT_BATCH_TOKENS)
+        ))
+        self.max_concurrency = max(1, int(
+            os.environ.get("LLM_FILTER_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+        ))
 
     def filter_text_blocks(
         self,
@@ -68,27 +135,65 @@ class LLMFilter:
         Returns:
             (过滤后的文字块列表, 被过滤的数量)
         """
-        if not text_blocks:
-            return [], 0
+        return self.filter_pages({page_index: text_blocks})[page_index]
 
-        # 构建 OCR 文字列表
-        ocr_texts = [
-            tb.text.strip() for tb in text_blocks if tb.text.strip()
-        ]
+    def filter_pages(
+        self,
+        pages: dict[int, list[TextBlock]]
+    ) -> dict[int, tuple[list[TextBlock], int]]:
+        """
+        批量过滤多页的文字块
 
-        if not ocr_texts:
-            return [], 0
+        未命中缓存的页面按 token 预算合并为若干批次，各批次并发请求。
 
-        # 调用 LLM 判断
-        keep_indices = self._call_llm(ocr_texts)
+        Args:
+            pages: 页码 -> OCR 识别的文字块列表
 
-        # 根据 LLM 结果过滤
+        Returns:
+            页码 -> (过滤后的文字块列表, 被过滤的数量)
+        """
+        texts = {index: _page_texts(blocks) for index, blocks in pages.items()}
+        keep: dict[int, set[int]] = {}
+        pending: dict[int, list[str]] = {}
+        cache = _get_result_cache()
+
+        for index, page_texts in texts.items():
+            if not page_texts:
+                keep[index] = set()
+                continue
+            cached = self._read_cache(cache, page_texts)
+            if cached is not None:
+                logger.info(f"第 {index} 页 LLM 过滤结果命中缓存")
+                keep[index] = cached
+            else:
+                pending[index] = page_texts
+
+        batches = self._split_batches(pending)
+        if len(batches) == 1:
+            keep.update(self._call_llm_batch(batches[0], cache))
+        elif batches:
+            workers = min(len(batches), self.max_concurrency)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm-filter') as executor:
+                for result in executor.map(lambda batch: self._call_llm_batch(batch, cache), batches):
+                    keep.update(result)
+
+        return {
+            index: self._apply(blocks, keep[index], index)
+            for index, blocks in pages.items()
+        }
+
+    def _apply(
+        self,
+        text_blocks: list[TextBlock],
+        keep_indices: set[int],
+        page_index: int
+    ) -> tuple[list[TextBlock], int]:
+        """根据 LLM 结果过滤（编号对应非空文字块的顺序）"""
         filtered = []
         filtered_count = 0
 
-        for i, tb in enumerate(text_blocks):
-            if not tb.text.strip():
-                continue
+        non_empty = [tb for tb in text_blocks if tb.text.strip()]
+        for i, tb in enumerate(non_empty):
             if i in keep_indices:
                 filtered.append(tb)
             else:
@@ -102,45 +207,84 @@ class LLMFilter:
 
         return filtered, filtered_count
 
-    def _call_llm(self, ocr_texts: list[str]) -> set[int]:
+    def _split_batches(self, pages: dict[int, list[str]]) -> list[dict[int, list[str]]]:
+        """按页序把页面打包为不超过 token 预算的批次（单页超出预算时单独成批）"""
+        batches = []
+        current: dict[int, list[str]] = {}
+        current_tokens = 0
+        for index in sorted(pages):
+            tokens = _estimate_tokens(pages[index])
+            if current and current_tokens + tokens > self.batch_tokens:
+                batches.append(current)
+                current, current_tokens = {}, 0
+            current[index] = pages[index]
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _cache_key(self, texts: list[str]) -> str:
+        raw = json.dumps([PROMPT_VERSION, self.model, texts], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _read_cache(self, cache: Optional[DiskTextCache], texts: list[str]) -> Optional[set[int]]:
+        if cache is None:
+            return None
+        try:
+            cached = cache.get(self._cache_key(texts))
+        except Exception as e:
+            logger.warning(f"LLM filter cache read failed: {e}")
+            return None
+        return set(json.loads(cached)) if cached is not None else None
+
+    def _write_cache(self, cache: Optional[DiskTextCache], texts: list[str], keep_indices: set[int]):
+        if cache is None:
+            return
+        try:
+            cache.set(self._cache_key(texts), json.dumps(sorted(keep_indices)))
+        except Exception as e:
+            logger.warning(f"LLM filter cache write failed: {e}")
+
+    def _call_llm_batch(
+        self,
+        pages: dict[int, list[str]],
+        cache: Optional[DiskTextCache] = None
+    ) -> dict[int, set[int]]:
         """
-        调用 LLM API 判断哪些文字应该保留
+        一次 LLM 请求判断多页文字应该保留哪些
 
         Args:
-            ocr_texts: OCR 识别的文字列表
+            pages: 页码 -> OCR 识别的文字列表
+            cache: 结果缓存（只缓存 LLM 明确给出的结果）
 
         Returns:
-            应该保留的文字索引集合
+            页码 -> 应该保留的文字索引集合
         """
-        # 构建带编号的文字列表
-        numbered_texts = "\n".join(
-            f"[{i}] {text}" for i, text in enumerate(ocr_texts)
+        sections = []
+        for index, texts in pages.items():
+            numbered_texts = "\n".join(f"[{i}] {text}" for i, text in enumerate(texts))
+            sections.append(f"### 第{index}页\n{numbered_texts}")
+        page_texts = "\n\n".join(sections)
+        example = ", ".join(
+            f'"{index}": {value}' for index, value in zip(list(pages)[:3], ['[0, 1, 3]', '"all"', '"none"'])
         )
 
         prompt = f"""你是一个 PPT 文字提取助手。我正在将图片形式的 PPT 转换为可编辑的 PPT。
 
-OCR 识别出了以下文字块（每行一个，前面是编号）：
-{numbered_texts}
-
-请判断哪些 OCR 识别的文字应该被提取到可编辑 PPT 中。
+OCR 识别出了以下 {len(pages)} 页的文字块（每页以"### 第N页"开头，每行一个文字块，前面是该页内的编号）：
+{page_texts}
 
-判断标准：
-1. 属于页面正文内容的文字应该保留（标题、正文、表格内容、列表项、段落等）
-2. 以下内容应该过滤掉：
-   - 页码（如单独的数字 "1"、"2"、"第1页" 等）
-   - 水印文字
-   - 装饰性文字
-   - 图片内嵌的文字（如古文献截图、示意图中的标注等）
-   - 明显不属于正文的杂乱字符
+请逐页判断哪些 OCR 识别的文字应该被提取到可编辑 PPT 中，每页独立判断。
 
-重要原则：如果不确定，宁可保留，不要误删正文内容。
+{_FILTER_CRITERIA}
 
-请直接返回应该保留的文字编号，用逗号分隔。例如：0,1,3,5
-如果所有文字都应该保留，返回：all
-如果所有文字都应该过滤，返回：none
+请返回一个 JSON 对象：键为页码，值为该页应该保留的文字编号数组；
+该页所有文字都应该保留时值为 "all"，都应该过滤时值为 "none"。例如：
+{{{example}}}
 
-只返回编号，不要解释。"""
+必须包含每一页，只返回 JSON，不要解释。"""
 
+        total_blocks = sum(len(texts) for texts in pages.values())
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
@@ -148,17 +292,62 @@ OCR 识别出了以下文字块（每行一个，前面是编号）：
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                max_tokens=500
+                max_tokens=min(8000, 200 + 8 * total_blocks)
             )
 
-            result = response.choices[0].message.content.strip().lower()
-            logger.info(f"LLM 返回: {result}")
-            return self._parse_llm_response(result, len(ocr_texts))
-
+            result = response.choices[0].message.content.strip()
+            logger.info(f"LLM 返回（第 {', '.join(str(i) for i in pages)} 页）: {result}")
+            parsed = self._parse_batch_response(result, pages)
         except Exception as e:
             # API 调用失败时，保留所有文字（降级处理）
             logger.warning(f"LLM API 调用失败: {e}，将保留所有文字")
-            return set(range(len(ocr_texts)))
+            parsed = {}
+
+        keep = {}
+        for index, texts in pages.items():
+            if index in parsed:
+                keep[index] = parsed[index]
+                self._write_cache(cache, texts, parsed[index])
+            else:
+                # 返回结果缺少该页时保留该页所有文字（不缓存）
+                keep[index] = set(range(len(texts)))
+        return keep
+
+    def _parse_batch_response(
+        self,
+        response: str,
+        pages: dict[int, list[str]]
+    ) -> dict[int, set[int]]:
+        """
+        解析多页请求返回的 JSON（无法解析的页面不出现在结果中）
+
+        Args:
+            response: LLM 返回的字符串（可能包含 ```json 代码块）
+            pages: 页码 -> OCR 识别的文字列表
+
+        Returns:
+            页码 -> 应该保留的索引集合
+        """
+        match = re.search(r'\{.*\}', response, re.DOTALL)
+        if not match:
+            return {}
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+
+        result = {}
+        for key, value in data.items():
+            page = re.sub(r'\D', '', str(key))
+            if not page or int(page) not in pages:
+                continue
+            total_count = len(pages[int(page)])
+            if isinstance(value, list):
+                value = ",".join(str(v) for v in value) if value else "none"
+            result[int(page)] = self._parse_llm_response(str(value).lower(), total_count)
+        return result
 
     def _parse_llm_response(
         self,
@@ -296,6 +485,80 @@ OCR 识别结果（每行一个，前面是编号）：
             return text_blocks
 
 
+class LLMFilterBatcher:
+    """
+    转换流水线中的批量过滤：各页 OCR 完成后调用 submit，
+    累计的页面文字达到 token 预算或所有页面都已提交时合并为一次请求（在后台线程中执行）
+    """
+
+    def __init__(self, llm_filter: LLMFilter, total_pages: int):
+        """
+        Args:
+            llm_filter: LLM 过滤器
+            total_pages: 本次转换的页数（不需要过滤的页面调用 skip）
+        """
+        self.llm_filter = llm_filter
+        self._remaining = total_pages
+        self._pending: dict[int, tuple[list[TextBlock], Future]] = {}
+        self._pending_tokens = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=llm_filter.max_concurrency, thread_name_prefix='llm-filter'
+        )
+
+    def submit(self, page_index: int, text_blocks: list[TextBlock]) -> Future:
+        """提交一页的文字块，返回 Future[(过滤后的文字块列表, 被过滤的数量)]"""
+        future: Future = Future()
+        tokens = _estimate_tokens(_page_texts(text_blocks))
+        batches = []
+        with self._lock:
+            if self._pending and self._pending_tokens + tokens > self.llm_filter.batch_tokens:
+                batches.append(self._take_pending())
+            self._pending[page_index] = (text_blocks, future)
+            self._pending_tokens += tokens
+            self._remaining -= 1
+            if self._pending_tokens >= self.llm_filter.batch_tokens or self._remaining <= 0:
+                batches.append(self._take_pending())
+        for batch in batches:
+            self._dispatch(batch)
+        return future
+
+    def skip(self):
+        """某页不需要过滤（无文字或处理失败）"""
+        with self._lock:
+            self._remaining -= 1
+            batch = self._take_pending() if self._remaining <= 0 and self._pending else None
+        if batch:
+            self._dispatch(batch)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _take_pending(self) -> dict[int, tuple[list[TextBlock], Future]]:
+        batch, self._pending, self._pending_tokens = self._pending, {}, 0
+        return batch
+
+    def _dispatch(self, batch: dict[int, tuple[list[TextBlock], Future]]):
+        def run():
+            try:
+                results = self.llm_filter.filter_pages(
+                    {index: blocks for index, (blocks, _) in batch.items()}
+                )
+            except BaseException as e:
+                for _, future in batch.values():
+                    future.set_exception(e)
+                return
+            for index, (_, future) in batch.items():
+                future.set_result(results[index])
+
+        try:
+            self._executor.submit(run)
+        except RuntimeError as e:
+            # 转换已结束（executor 已关闭）
+            for _, future in batch.values():
+                future.set_exception(e)
+
+
 # 全局实例（延迟初始化）
 _llm_filter: Optional[LLMFilter] = None
 
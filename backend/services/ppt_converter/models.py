@@ -3,10 +3,13 @@
 定义系统中使用的核心数据结构
 """
 
+from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Optional, Union
 from pathlib import Path
 
+import numpy as np
+
 
 @dataclass
 class TextBlock:
@@ -31,6 +34,37 @@ class SlideData:
     text_blocks: list[TextBlock] = field(default_factory=list)
 
 
+class PageSource(ABC):
+    """批量渲染的页面来源（如 PDF 的一段页面），按下标取出页面的 BGR 数组"""
+
+    @abstractmethod
+    def get(self, offset: int) -> np.ndarray:
+        """取得第 offset 页的 BGR 数组（渲染未完成时等待）"""
+
+    @abstractmethod
+    def release(self, offset: int) -> None:
+        """第 offset 页已处理完，丢弃其数组"""
+
+
+@dataclass
+class PageImage:
+    """内存中的页面图片（如 PDF 页面的渲染结果），无需写入图片文件即可识别和处理"""
+    name: str                                    # 页面名称（用于日志和背景图文件名）
+    source: Union[np.ndarray, PageSource]        # BGR 数组，或批量渲染的页面来源
+    offset: int = 0                              # source 为 PageSource 时该页在其中的下标
+
+    def load(self) -> np.ndarray:
+        """取得 BGR 数组（批量渲染未完成时等待）"""
+        if isinstance(self.source, PageSource):
+            return self.source.get(self.offset)
+        return self.source
+
+    def release(self) -> None:
+        """页面的 CPU 阶段已提交，不再需要该数组（批量渲染时交还渲染窗口）"""
+        if isinstance(self.source, PageSource):
+            self.source.release(self.offset)
+
+
 @dataclass
 class ConversionResult:
     """转换结果"""
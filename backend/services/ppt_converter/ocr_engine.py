@@ -7,6 +7,8 @@ from pathlib import Path
 from typing import Union, Optional
 import os
 
+import numpy as np
+
 from .models import TextBlock
 
 
@@ -57,8 +59,8 @@ class OCREngine:
 
     def recognize(
         self,
-        image_path: Union[str, Path],
+        image: Union[str, Path, np.ndarray],
         confidence_threshold: float = 0.3
     ) -> list[TextBlock]:
-        """识别图片中的文字"""
-        return self.baidu_client.recognize(image_path, confidence_threshold)
+        """识别图片（图片文件路径或 BGR 数组）中的文字"""
+        return self.baidu_client.recognize(image, confidence_threshold)
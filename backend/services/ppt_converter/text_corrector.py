@@ -5,14 +5,94 @@
 
 import re
 import logging
+from collections import Counter
 from pathlib import Path
 from typing import Optional
 from difflib import SequenceMatcher
 
+import numpy as np
+
 from .models import TextBlock
 
 logger = logging.getLogger(__name__)
 
+# 浮点比较容差（候选过滤只能放宽，不能漏掉可能达到阈值的文本）
+_EPSILON = 1e-9
+# 部分匹配：OCR 文本至少有该比例的字符按顺序出现在参考文本中
+PARTIAL_MATCH_RATIO = 0.8
+# 部分匹配得分 = OCR 长度 / 参考文本长度 + PARTIAL_MATCH_BONUS
+PARTIAL_MATCH_BONUS = 0.3
+
+
+class _NgramIndex:
+    """
+    参考文本的 n-gram 倒排索引
+
+    - 二元组（bigram）索引：OCR 文本是参考文本的子串时，参考文本必然包含 OCR 文本的全部二元组，
+      取各二元组倒排表的交集即可找到包含 OCR 文本的参考文本
+    - 字符（unigram）计数索引：两段文本公共字符数（按次数取最小值之和）是 SequenceMatcher
+      匹配字符数和部分匹配字符数的上界，据此排除相似度不可能达到阈值的参考文本
+    """
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self._lengths = np.array([len(t) for t in texts], dtype=np.int32)
+
+        bigrams: dict[str, list[int]] = {}
+        chars: dict[str, tuple[list[int], list[int]]] = {}
+        for i, text in enumerate(texts):
+            for gram in {text[j:j + 2] for j in range(len(text) - 1)}:
+                bigrams.setdefault(gram, []).append(i)
+            for char, count in Counter(text).items():
+                ids, counts = chars.setdefault(char, ([], []))
+                ids.append(i)
+                counts.append(count)
+
+        self._bigrams = {gram: set(ids) for gram, ids in bigrams.items()}
+        self._chars = {
+            char: (np.array(ids, dtype=np.int32), np.array(counts, dtype=np.int32))
+            for char, (ids, counts) in chars.items()
+        }
+
+    def find_containing(self, query: str) -> Optional[str]:
+        """按原始顺序返回第一个包含 query 的参考文本（query 至少 2 个字符）"""
+        postings = []
+        for gram in {query[j:j + 2] for j in range(len(query) - 1)}:
+            ids = self._bigrams.get(gram)
+            if not ids:
+                return None
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        for i in sorted(candidates):
+            if query in self.texts[i]:
+                return self.texts[i]
+        return None
+
+    def candidates(self, query: str, threshold: float) -> list[str]:
+        """按原始顺序返回相似度或部分匹配得分可能达到 threshold 的参考文本"""
+        if not self.texts:
+            return []
+
+        overlap = np.zeros(len(self.texts), dtype=np.int32)
+        for char, query_count in Counter(query).items():
+            posting = self._chars.get(char)
+            if posting is not None:
+                ids, counts = posting
+                overlap[ids] += np.minimum(counts, query_count)
+
+        length = len(query)
+        lengths = self._lengths
+        # SequenceMatcher.ratio() = 2 * 匹配字符数 / 总长度
+        similar = 2 * overlap >= threshold * (length + lengths) - _EPSILON
+        # 部分匹配：参考文本更长、字符覆盖足够，且得分 length / len(ref) + bonus 可能达到阈值
+        partial = (
+            (lengths > length)
+            & (overlap >= PARTIAL_MATCH_RATIO * length - _EPSILON)
+            & (length >= (threshold - PARTIAL_MATCH_BONUS) * lengths - _EPSILON)
+        )
+        return [self.texts[i] for i in np.flatnonzero(similar | partial)]
+
 
 class TextCorrector:
     """文本校正器"""
@@ -30,6 +110,11 @@ class TextCorrector:
         self.pages_text = self._parse_reference_text(reference_text)
         # 提取所有文本片段用于匹配
         self.all_segments = self._extract_segments(reference_text)
+        # 建立 n-gram 索引，匹配时只对候选文本精确评分
+        self._page_indexes = {
+            page_num: _NgramIndex(lines) for page_num, lines in self.pages_text.items()
+        }
+        self._segment_index = _NgramIndex(self.all_segments)
 
     def _parse_reference_text(self, text: str) -> dict[int, list[str]]:
         """
@@ -107,6 +192,9 @@ class TextCorrector:
         """
         在参考文本中查找最佳匹配
 
+        只对 n-gram 索引筛选出的候选文本做精确评分；相似度不可能达到阈值的参考文本不参与评分，
+        因此未找到匹配时返回的最佳匹配只是候选文本中的最佳值（可能为 None）
+
         Args:
             ocr_text: OCR 识别的文本
             page_num: 页码（如果提供，优先在该页查找）
@@ -121,41 +209,50 @@ class TextCorrector:
         best_score = 0.0
 
         # 如果提供了页码，优先在该页查找
-        if page_num and page_num in self.pages_text:
-            for ref_text in self.pages_text[page_num]:
-                # 完全匹配
-                if ocr_text in ref_text:
-                    return ref_text, 1.0
-
-                # 检查 OCR 文本是否是参考文本的子串（可能有遗漏）
-                if self._is_partial_match(ocr_text, ref_text):
-                    score = len(ocr_text) / len(ref_text) + 0.3
-                    if score > best_score:
-                        best_score = min(score, 0.95)
-                        best_match = ref_text
-
-                # 计算相似度
-                score = self._similarity(ocr_text, ref_text)
-                if score > best_score:
-                    best_score = score
-                    best_match = ref_text
+        if page_num and page_num in self._page_indexes:
+            index = self._page_indexes[page_num]
+            # 完全匹配
+            ref_text = index.find_containing(ocr_text)
+            if ref_text is not None:
+                return ref_text, 1.0
+            best_match, best_score = self._score_candidates(
+                ocr_text, index.candidates(ocr_text, self.similarity_threshold),
+                best_match, best_score
+            )
 
         # 如果在当前页没找到好的匹配，在所有片段中查找
         if best_score < self.similarity_threshold:
-            for segment in self.all_segments:
-                if ocr_text in segment:
-                    return segment, 1.0
+            segment = self._segment_index.find_containing(ocr_text)
+            if segment is not None:
+                return segment, 1.0
+            best_match, best_score = self._score_candidates(
+                ocr_text, self._segment_index.candidates(ocr_text, self.similarity_threshold),
+                best_match, best_score
+            )
 
-                if self._is_partial_match(ocr_text, segment):
-                    score = len(ocr_text) / len(segment) + 0.3
-                    if score > best_score:
-                        best_score = min(score, 0.95)
-                        best_match = segment
+        return best_match, best_score
 
-                score = self._similarity(ocr_text, segment)
+    def _score_candidates(
+        self,
+        ocr_text: str,
+        candidates: list[str],
+        best_match: Optional[str],
+        best_score: float
+    ) -> tuple[Optional[str], float]:
+        """对候选参考文本精确评分，返回更新后的 (最佳匹配文本, 相似度)"""
+        for ref_text in candidates:
+            # 检查 OCR 文本是否是参考文本的子串（可能有遗漏）
+            if self._is_partial_match(ocr_text, ref_text):
+                score = len(ocr_text) / len(ref_text) + PARTIAL_MATCH_BONUS
                 if score > best_score:
-                    best_score = score
-                    best_match = segment
+                    best_score = min(score, 0.95)
+                    best_match = ref_text
+
+            # 计算相似度
+            score = self._similarity(ocr_text, ref_text)
+            if score > best_score:
+                best_score = score
+                best_match = ref_text
 
         return best_match, best_score
 
@@ -180,7 +277,7 @@ class TextCorrector:
                 ref_idx += 1
 
         # 如果匹配了大部分字符，认为是部分匹配
-        return matched >= len(ocr_text) * 0.8
+        return matched >= len(ocr_text) * PARTIAL_MATCH_RATIO
 
     def correct_text_block(
         self,
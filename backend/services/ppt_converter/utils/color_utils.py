@@ -4,44 +4,139 @@
 """
 
 import numpy as np
-from sklearn.cluster import KMeans
 import cv2
 
 
-def extract_text_color(
-    text_image: np.ndarray,
-    n_colors: int = 2
-) -> tuple[int, int, int]:
-    """
-    从文字区域提取文字颜色
+# 每个文字块参与聚类的最大像素数（超过时等间隔采样）
+MAX_SAMPLE_PIXELS = 4096
+# 2-means 最大迭代次数（Otsu 初始化后通常 2~5 次即收敛）
+MAX_ITERATIONS = 20
+
+# BT.601 亮度权重（RGB）
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
 
-    使用 K-Means 聚类分离前景色（文字）和背景色，
-    选择像素数量较少的颜色作为文字色（文字通常占据较小面积）
+
+def _sample_pixels(text_image: np.ndarray) -> np.ndarray:
+    """RGB 像素（float32，N x 3），像素过多时等间隔采样"""
+    rgb_image = cv2.cvtColor(text_image, cv2.COLOR_BGR2RGB)
+    pixels = rgb_image.reshape(-1, 3)
+    if len(pixels) > MAX_SAMPLE_PIXELS:
+        step = len(pixels) / MAX_SAMPLE_PIXELS
+        pixels = pixels[(np.arange(MAX_SAMPLE_PIXELS) * step).astype(np.int64)]
+    return pixels.astype(np.float32)
+
+
+def _otsu_thresholds(luma: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """按行（每个文字块）计算亮度的 Otsu 阈值，返回 (B,)"""
+    batch = luma.shape[0]
+    bins = np.clip(luma, 0, 255).astype(np.int64) + np.arange(batch)[:, None] * 256
+    hist = np.bincount(bins.ravel(), weights=weights.ravel(), minlength=batch * 256)
+    hist = hist.reshape(batch, 256)
+
+    levels = np.arange(256, dtype=np.float64)
+    w0 = np.cumsum(hist, axis=1)
+    m0 = np.cumsum(hist * levels, axis=1)
+    total = w0[:, -1:]
+    w1 = total - w0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (m0 * total - w0 * m0[:, -1:]) ** 2 / (w0 * w1)
+    between = np.nan_to_num(between, nan=-1.0, posinf=-1.0)
+    return np.argmax(between, axis=1).astype(np.float32)
+
+
+def extract_text_colors(
+    text_images: list[np.ndarray]
+) -> list[tuple[int, int, int]]:
     """
-    if text_image is None or text_image.size == 0:
-        return (0, 0, 0)
+    批量提取多个文字区域的文字颜色
 
-    try:
-        rgb_image = cv2.cvtColor(text_image, cv2.COLOR_BGR2RGB)
-        pixels = rgb_image.reshape(-1, 3).astype(np.float64)
+    对每个文字块的像素做 2-means 聚类分离前景色（文字）和背景色，
+    选择像素数量较少的颜色作为文字色（文字通常占据较小面积）。
 
-        if len(pixels) < n_colors:
+    所有文字块一起向量化计算：亮度 Otsu 阈值给出初始划分，
+    再在 RGB 空间迭代至收敛（替代 sklearn KMeans 的 10 次随机初始化）。
+    """
+    colors: list[tuple[int, int, int]] = [(0, 0, 0)] * len(text_images)
+
+    samples = []
+    indices = []
+    for i, text_image in enumerate(text_images):
+        if text_image is None or text_image.size == 0:
+            continue
+        try:
+            pixels = _sample_pixels(text_image)
+        except Exception:
+            continue
+        if len(pixels) < 2:
             avg = pixels.mean(axis=0).astype(int)
-            return (int(avg[0]), int(avg[1]), int(avg[2]))
+            colors[i] = (int(avg[0]), int(avg[1]), int(avg[2]))
+            continue
+        samples.append(pixels)
+        indices.append(i)
+
+    if not samples:
+        return colors
+
+    # 补齐为 (B, N, 3)，weights 标记有效像素
+    batch = len(samples)
+    size = max(len(p) for p in samples)
+    pixels = np.zeros((batch, size, 3), dtype=np.float32)
+    weights = np.zeros((batch, size), dtype=np.float32)
+    for b, p in enumerate(samples):
+        pixels[b, :len(p)] = p
+        weights[b, :len(p)] = 1.0
+
+    # 初始划分：亮度 Otsu 阈值（暗 -> 簇 0，亮 -> 簇 1）
+    luma = np.floor(pixels @ _LUMA_WEIGHTS)
+    labels = (luma > _otsu_thresholds(luma, weights)[:, None]).astype(np.int64)
 
-        kmeans = KMeans(n_clusters=n_colors, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(pixels)
+    # 空簇（如纯色区域）的中心取整体均值
+    weighted = pixels * weights[:, :, None]
+    total_sums = weighted.sum(axis=1)
+    total_counts = weights.sum(axis=1)
+    centers = np.repeat((total_sums / total_counts[:, None])[:, None, :], 2, axis=1)
+    for _ in range(MAX_ITERATIONS):
+        # 簇 1 的统计量由掩码求得，簇 0 为总量减去簇 1
+        mask = labels.astype(np.float32) * weights
+        counts1 = mask.sum(axis=1)
+        sums1 = np.einsum('bn,bnc->bc', mask, pixels)
+        counts = np.stack([total_counts - counts1, counts1], axis=1)
+        sums = np.stack([total_sums - sums1, sums1], axis=1)
+        # 空簇沿用上一轮的中心
+        centers = np.where(counts[:, :, None] > 0, sums / np.maximum(counts, 1)[:, :, None], centers)
 
-        colors = kmeans.cluster_centers_.astype(int)
+        # 两个中心的最近邻划分等价于到中垂面的投影比较：|p-c1|² < |p-c0|² <=> p·(c1-c0) > (|c1|²-|c0|²)/2
+        direction = centers[:, 1] - centers[:, 0]
+        offset = ((centers[:, 1] ** 2).sum(axis=1) - (centers[:, 0] ** 2).sum(axis=1)) / 2
+        new_labels = (np.einsum('bnc,bc->bn', pixels, direction) > offset[:, None]).astype(np.int64)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
 
-        # 统计每个聚类的像素数量
-        cluster_counts = np.bincount(labels, minlength=n_colors)
+    counts1 = (labels * weights).sum(axis=1)
+    counts = np.stack([total_counts - counts1, counts1], axis=1)
 
-        # 选择像素数量较少的颜色作为文字色（文字通常占据较小面积）
-        text_color_idx = np.argmin(cluster_counts)
-        text_color = colors[text_color_idx]
+    for b, i in enumerate(indices):
+        # 只有一种颜色时两个簇重合，取该颜色
+        present = counts[b] > 0
+        if present.all():
+            text_color = centers[b, int(np.argmin(counts[b]))]
+        else:
+            text_color = centers[b, int(np.argmax(present))]
+        text_color = text_color.astype(int)
+        colors[i] = (int(text_color[0]), int(text_color[1]), int(text_color[2]))
 
-        return (int(text_color[0]), int(text_color[1]), int(text_color[2]))
+    return colors
 
-    except Exception:
-        return (0, 0, 0)
+
+def extract_text_color(
+    text_image: np.ndarray,
+    n_colors: int = 2
+) -> tuple[int, int, int]:
+    """
+    从文字区域提取文字颜色
+
+    分离前景色（文字）和背景色，选择像素数量较少的颜色作为文字色（文字通常占据较小面积）；
+    批量处理多个文字块时使用 extract_text_colors。n_colors 仅支持 2（保留参数兼容旧调用）
+    """
+    return extract_text_colors([text_image])[0]
@@ -10,6 +10,13 @@ from PIL import Image
 import cv2
 
 
+# cv2.inpaint 的修复半径
+INPAINT_RADIUS = 3
+# 局部修复时在掩码外扩的边距：TELEA 修复每个像素只读取半径范围内的像素，
+# 其距离场也只在掩码外半径范围内计算，超出该边距的像素不影响结果，局部修复与整图修复逐像素一致
+INPAINT_ROI_MARGIN = 4 * INPAINT_RADIUS + 4
+
+
 def load_image(image_path: Union[str, Path]) -> np.ndarray:
     """加载图像文件，返回 BGR 格式的 numpy 数组"""
     path = Path(image_path)
@@ -49,20 +56,20 @@ def _detect_background_color(
     h, w = image.shape[:2]
     x, y, bw, bh = bbox
 
-    samples = []
+    regions = []
     if y > sample_width:
-        samples.extend(image[y-sample_width:y, x:x+bw].reshape(-1, 3))
+        regions.append(image[y-sample_width:y, x:x+bw].reshape(-1, 3))
     if y + bh + sample_width < h:
-        samples.extend(image[y+bh:y+bh+sample_width, x:x+bw].reshape(-1, 3))
+        regions.append(image[y+bh:y+bh+sample_width, x:x+bw].reshape(-1, 3))
     if x > sample_width:
-        samples.extend(image[y:y+bh, x-sample_width:x].reshape(-1, 3))
+        regions.append(image[y:y+bh, x-sample_width:x].reshape(-1, 3))
     if x + bw + sample_width < w:
-        samples.extend(image[y:y+bh, x+bw:x+bw+sample_width].reshape(-1, 3))
+        regions.append(image[y:y+bh, x+bw:x+bw+sample_width].reshape(-1, 3))
 
-    if not samples:
+    samples = np.concatenate(regions) if regions else np.empty((0, 3), dtype=image.dtype)
+    if len(samples) == 0:
         return np.array([255, 255, 255], dtype=np.uint8), True
 
-    samples = np.array(samples)
     median_color = np.median(samples, axis=0).astype(np.uint8)
 
     diffs = np.abs(samples.astype(np.float32) - median_color)
@@ -85,6 +92,9 @@ def remove_text_regions(
 ) -> np.ndarray:
     """
     智能擦除文字区域：优先使用颜色填充，最大限度避免 inpaint 伪影
+
+    非纯色背景的文字框只修复边缘一圈，且只在文字框外扩 INPAINT_ROI_MARGIN 的局部区域内执行 inpaint，
+    不再为每个文字框分配整图掩码并做整图修复（结果与整图修复逐像素一致）
     """
     if not bboxes:
         return image.copy()
@@ -104,6 +114,8 @@ def remove_text_regions(
         y1 = max(0, y - actual_padding)
         x2 = min(w, x + bw + actual_padding)
         y2 = min(h, y + bh + actual_padding)
+        if x2 <= x1 or y2 <= y1:
+            continue
 
         bg_color, is_solid = _detect_background_color(image, bbox)
 
@@ -119,13 +131,21 @@ def remove_text_regions(
             if cx2 > cx1 and cy2 > cy1:
                 result[cy1:cy2, cx1:cx2] = bg_color
 
-            edge_mask = np.zeros((h, w), dtype=np.uint8)
-            edge_mask[y1:y2, x1:x2] = 255
+            rx1 = max(0, x1 - INPAINT_ROI_MARGIN)
+            ry1 = max(0, y1 - INPAINT_ROI_MARGIN)
+            rx2 = min(w, x2 + INPAINT_ROI_MARGIN)
+            ry2 = min(h, y2 + INPAINT_ROI_MARGIN)
+
+            edge_mask = np.zeros((ry2 - ry1, rx2 - rx1), dtype=np.uint8)
+            edge_mask[y1-ry1:y2-ry1, x1-rx1:x2-rx1] = 255
             if cx2 > cx1 and cy2 > cy1:
-                edge_mask[cy1:cy2, cx1:cx2] = 0
+                edge_mask[cy1-ry1:cy2-ry1, cx1-rx1:cx2-rx1] = 0
 
             if np.any(edge_mask):
-                result = cv2.inpaint(result, edge_mask, 3, cv2.INPAINT_TELEA)
+                roi = np.ascontiguousarray(result[ry1:ry2, rx1:rx2])
+                result[ry1:ry2, rx1:rx2] = cv2.inpaint(
+                    roi, edge_mask, INPAINT_RADIUS, cv2.INPAINT_TELEA
+                )
 
     return result
 
@@ -0,0 +1,62 @@
+"""
+Storage - 文件存储后端
+
+STORAGE_BACKEND 配置项：
+    local: 文件只保存在上传目录（默认）
+    s3:    上传目录作为本地工作副本，文件同步上传到 S3 兼容的对象存储（AWS S3 / MinIO / R2 等），
+           本地缺失时按需下载；文件访问通过预签名 URL 重定向，由对象存储直接提供下载
+
+多个 Web / Worker 节点共享同一个桶即可共享文件，无需共享磁盘。
+"""
+import threading
+from typing import Optional
+
+from .base import StorageBackend, StorageError
+from .local import LocalStorage
+from .s3 import S3Storage
+
+__all__ = [
+    "StorageBackend",
+    "StorageError",
+    "LocalStorage",
+    "S3Storage",
+    "get_storage",
+]
+
+_remote_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def _create_remote_storage(config) -> StorageBackend:
+    backend = (getattr(config, 'STORAGE_BACKEND', 'local') or 'local').lower()
+    if backend == 's3':
+        return S3Storage(
+            bucket=config.S3_BUCKET,
+            access_key=config.S3_ACCESS_KEY_ID,
+            secret_key=config.S3_SECRET_ACCESS_KEY,
+            endpoint_url=config.S3_ENDPOINT_URL or None,
+            region=config.S3_REGION,
+            prefix=config.S3_KEY_PREFIX,
+            addressing_style=config.S3_ADDRESSING_STYLE,
+            presign_expires=config.S3_PRESIGN_EXPIRES,
+        )
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def get_storage(upload_folder: str) -> StorageBackend:
+    """
+    获取当前配置的存储后端
+
+    local 后端直接以上传目录为根目录；远程后端在进程内共享同一个实例（复用连接池）
+    """
+    from config import get_config
+    config = get_config()
+    if (getattr(config, 'STORAGE_BACKEND', 'local') or 'local').lower() == 'local':
+        return LocalStorage(upload_folder)
+
+    global _remote_storage
+    if _remote_storage is None:
+        with _storage_lock:
+            if _remote_storage is None:
+                _remote_storage = _create_remote_storage(config)
+    return _remote_storage
@@ -0,0 +1,75 @@
+"""
+Storage backend interface
+
+对象以 key（相对于上传目录的 posix 路径，如 "{project_id}/pages/{page_id}_v1.png"）寻址。
+上传 / 下载均按块流式进行，不会把整个文件读入内存。
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import BinaryIO, List, Optional
+
+# 流式读写的块大小
+CHUNK_SIZE = 1024 * 1024
+
+
+class StorageError(RuntimeError):
+    """Storage backend request failed"""
+    pass
+
+
+class StorageBackend(ABC):
+    """Abstract object storage addressed by upload-relative keys"""
+
+    # 远程存储：本地上传目录只作为工作副本，需要同步上传 / 按需下载
+    is_remote = False
+
+    @abstractmethod
+    def upload(self, key: str, fileobj: BinaryIO, size: int, content_type: Optional[str] = None,
+               cache_control: Optional[str] = None) -> None:
+        """Stream size bytes from fileobj to key (overwrites)"""
+        pass
+
+    @abstractmethod
+    def download(self, key: str, local_path: str) -> bool:
+        """
+        Stream key to local_path (written atomically)
+
+        Returns:
+            False if the object does not exist
+        """
+        pass
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete key (missing keys are ignored)"""
+        pass
+
+    @abstractmethod
+    def list_keys(self, prefix: str) -> List[str]:
+        """List keys starting with prefix"""
+        pass
+
+    def put_file(self, key: str, local_path: str, content_type: Optional[str] = None,
+                 cache_control: Optional[str] = None) -> None:
+        """上传本地文件"""
+        with open(local_path, 'rb') as f:
+            self.upload(key, f, os.fstat(f.fileno()).st_size, content_type, cache_control)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """删除 prefix 下的所有对象（prefix 应以 / 结尾，避免误删同前缀的其他目录）"""
+        for key in self.list_keys(prefix):
+            self.delete(key)
+
+    def presigned_url(self, key: str, expires: Optional[int] = None,
+                      download_name: Optional[str] = None) -> Optional[str]:
+        """
+        Time-limited URL from which clients can fetch key directly
+
+        Returns:
+            None if the backend cannot serve files itself (files are then served by the app)
+        """
+        return None
@@ -0,0 +1,89 @@
+"""
+Local disk storage backend
+"""
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+from .base import StorageBackend, CHUNK_SIZE
+
+
+class LocalStorage(StorageBackend):
+    """Objects stored as files under a root directory (default: the upload folder itself)"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def upload(self, key: str, fileobj: BinaryIO, size: int, content_type: Optional[str] = None,
+               cache_control: Optional[str] = None) -> None:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.upload")
+        try:
+            with open(tmp_path, 'wb') as f:
+                shutil.copyfileobj(fileobj, f, CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def put_file(self, key: str, local_path: str, content_type: Optional[str] = None,
+                 cache_control: Optional[str] = None) -> None:
+        # 本地文件已位于存储目录中时无需复制
+        if Path(local_path).resolve() == self.path(key):
+            return
+        super().put_file(key, local_path, content_type, cache_control)
+
+    def download(self, key: str, local_path: str) -> bool:
+        path = self.path(key)
+        if not path.is_file():
+            return False
+        if path == Path(local_path).resolve():
+            return True
+        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{local_path}.{uuid.uuid4().hex}.download"
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return True
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def delete(self, key: str) -> None:
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix: str) -> None:
+        path = self.path(prefix)
+        if prefix.endswith('/') and path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            super().delete_prefix(prefix)
+
+    def list_keys(self, prefix: str) -> List[str]:
+        # 只扫描前缀所在的目录
+        base = self.path(prefix.rsplit('/', 1)[0]) if '/' in prefix else self.root
+        if not base.is_dir():
+            return []
+        keys = []
+        for path in base.rglob('*'):
+            if path.is_file():
+                key = path.relative_to(self.root).as_posix()
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
@@ -0,0 +1,264 @@
+"""
+S3-compatible object storage backend
+
+直接通过 HTTP 调用 S3 REST API（AWS Signature V4 签名），可用于 AWS S3、MinIO、Cloudflare R2、
+阿里云 OSS（S3 兼容模式）等；连接复用 AI Provider 共享的 httpx 连接池，无需额外依赖 boto3。
+
+- 上传使用 UNSIGNED-PAYLOAD 流式发送文件内容，不必预先计算整个文件的哈希
+- 下载按块写入临时文件后原子替换
+- 预签名 URL 的签名时间按有效期的一半取整：同一窗口内同一对象的 URL 保持不变，浏览器缓存可以命中
+"""
+import hmac
+import time
+import hashlib
+import logging
+import mimetypes
+import os
+import uuid
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from .base import StorageBackend, StorageError, CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b'').hexdigest()
+# SigV4 预签名 URL 的最长有效期（7 天）
+MAX_PRESIGN_EXPIRES = 7 * 24 * 3600
+DEFAULT_PRESIGN_EXPIRES = 3600
+
+
+def _uri_encode(value: str, safe: str = '-_.~') -> str:
+    return quote(value, safe=safe)
+
+
+def _canonical_query(query: Dict[str, str]) -> str:
+    return '&'.join(
+        f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items())
+    )
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+class S3Storage(StorageBackend):
+    """Objects stored in an S3-compatible bucket"""
+
+    is_remote = True
+
+    def __init__(self, bucket: str, access_key: str, secret_key: str,
+                 endpoint_url: Optional[str] = None, region: str = 'us-east-1',
+                 prefix: str = '', addressing_style: str = 'path',
+                 presign_expires: int = DEFAULT_PRESIGN_EXPIRES, timeout: float = 60.0):
+        """
+        Args:
+            bucket: Bucket name
+            access_key / secret_key: Credentials
+            endpoint_url: Service endpoint, e.g. http://minio:9000 (defaults to AWS S3 in region)
+            region: Signing region (MinIO accepts us-east-1)
+            prefix: Key prefix inside the bucket, e.g. "banana-slides/"
+            addressing_style: 'path' (endpoint/bucket/key, MinIO default) or 'virtual' (bucket.endpoint/key)
+            presign_expires: Default presigned URL lifetime in seconds
+            timeout: Request timeout in seconds
+        """
+        if not bucket:
+            raise ValueError("S3 bucket is required")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region or 'us-east-1'
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.addressing_style = addressing_style
+        self.presign_expires = min(max(1, int(presign_expires)), MAX_PRESIGN_EXPIRES)
+        self.timeout = timeout
+
+        endpoint = urlsplit(endpoint_url or f"https://s3.{self.region}.amazonaws.com")
+        self.scheme = endpoint.scheme or 'https'
+        netloc = endpoint.netloc
+        if addressing_style == 'virtual':
+            netloc = f"{bucket}.{netloc}"
+        self.host = netloc
+        self.origin = f"{self.scheme}://{netloc}"
+        # path 模式下桶名作为路径的第一段
+        self._bucket_path = '' if addressing_style == 'virtual' else f"/{_uri_encode(bucket)}"
+
+    # ---------------------------------------------------------------- 签名
+
+    def _object_path(self, key: str) -> str:
+        return f"{self._bucket_path}/{_uri_encode(self.prefix + key, safe='/-_.~')}"
+
+    def _signature(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str],
+                   payload_hash: str, amz_date: str) -> Tuple[str, str, str]:
+        """
+        Returns:
+            (credential scope, signed header names, signature)
+        """
+        date = amz_date[:8]
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        lowered = {k.lower(): ' '.join(str(v).split()) for k, v in headers.items()}
+        signed_headers = ';'.join(sorted(lowered))
+        canonical_headers = ''.join(f"{k}:{lowered[k]}\n" for k in sorted(lowered))
+        canonical_request = '\n'.join([
+            method, path, _canonical_query(query), canonical_headers, signed_headers, payload_hash
+        ])
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256', amz_date, scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+        ])
+        signing_key = _hmac(f"AWS4{self.secret_key}".encode('utf-8'), date)
+        for part in (self.region, 's3', 'aws4_request'):
+            signing_key = _hmac(signing_key, part)
+        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        return scope, signed_headers, signature
+
+    @staticmethod
+    def _amz_date(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+    def _url(self, path: str, query: Dict[str, str]) -> str:
+        url = f"{self.origin}{path}"
+        return f"{url}?{_canonical_query(query)}" if query else url
+
+    def _request(self, method: str, path: str, query: Optional[Dict[str, str]] = None,
+                 headers: Optional[Dict[str, str]] = None, content=None,
+                 payload_hash: str = EMPTY_PAYLOAD_HASH, stream: bool = False):
+        from services.ai_providers.http_client import get_http_client
+
+        query = query or {}
+        amz_date = self._amz_date(time.time())
+        signed = {
+            'host': self.host,
+            'x-amz-content-sha256': payload_hash,
+            'x-amz-date': amz_date,
+        }
+        signed.update({k.lower(): v for k, v in (headers or {}).items() if k.lower() != 'content-length'})
+        scope, signed_headers, signature = self._signature(method, path, query, signed, payload_hash, amz_date)
+
+        request_headers = dict(signed)
+        if headers and 'Content-Length' in headers:
+            request_headers['Content-Length'] = headers['Content-Length']
+        request_headers['Authorization'] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        client = get_http_client(self.origin)
+        request = client.build_request(
+            method, self._url(path, query), headers=request_headers, content=content, timeout=self.timeout
+        )
+        return client.send(request, stream=stream)
+
+    @staticmethod
+    def _raise_for_status(response, action: str, key: str):
+        if response.status_code >= 300:
+            raise StorageError(f"S3 {action} failed for {key}: HTTP {response.status_code} {response.text[:300]}")
+
+    # ---------------------------------------------------------------- 对象操作
+
+    def upload(self, key: str, fileobj: BinaryIO, size: int, content_type: Optional[str] = None,
+               cache_control: Optional[str] = None) -> None:
+        headers = {
+            'Content-Length': str(size),
+            'Content-Type': content_type or mimetypes.guess_type(key)[0] or 'application/octet-stream',
+        }
+        if cache_control:
+            headers['Cache-Control'] = cache_control
+
+        def _chunks():
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+        response = self._request('PUT', self._object_path(key), headers=headers,
+                                 content=_chunks(), payload_hash=UNSIGNED_PAYLOAD)
+        self._raise_for_status(response, 'upload', key)
+
+    def download(self, key: str, local_path: str) -> bool:
+        response = self._request('GET', self._object_path(key), stream=True)
+        try:
+            if response.status_code == 404:
+                return False
+            if response.status_code >= 300:
+                response.read()
+                self._raise_for_status(response, 'download', key)
+
+            Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{local_path}.{uuid.uuid4().hex}.download"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        f.write(chunk)
+                os.replace(tmp_path, local_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return True
+        finally:
+            response.close()
+
+    def exists(self, key: str) -> bool:
+        response = self._request('HEAD', self._object_path(key))
+        if response.status_code == 404:
+            return False
+        self._raise_for_status(response, 'head', key)
+        return True
+
+    def delete(self, key: str) -> None:
+        response = self._request('DELETE', self._object_path(key))
+        if response.status_code != 404:
+            self._raise_for_status(response, 'delete', key)
+
+    def list_keys(self, prefix: str) -> List[str]:
+        keys = []
+        query = {'list-type': '2', 'prefix': self.prefix + prefix}
+        while True:
+            response = self._request('GET', self._bucket_path or '/', query=query)
+            self._raise_for_status(response, 'list', prefix)
+            root = ET.fromstring(response.content)
+            token = None
+            truncated = False
+            for element in root:
+                tag = element.tag.rsplit('}', 1)[-1]
+                if tag == 'Contents':
+                    for child in element:
+                        if child.tag.rsplit('}', 1)[-1] == 'Key' and child.text:
+                            keys.append(child.text[len(self.prefix):])
+                elif tag == 'IsTruncated':
+                    truncated = (element.text or '').lower() == 'true'
+                elif tag == 'NextContinuationToken':
+                    token = element.text
+            if not truncated or not token:
+                return keys
+            query = {**query, 'continuation-token': token}
+
+    # ---------------------------------------------------------------- 预签名
+
+    def presigned_url(self, key: str, expires: Optional[int] = None,
+                      download_name: Optional[str] = None) -> Optional[str]:
+        expires = min(max(2, int(expires or self.presign_expires)), MAX_PRESIGN_EXPIRES)
+        # 签名时间按半个有效期取整，URL 在窗口内保持稳定，且剩余有效期至少为一半
+        window = expires // 2
+        signed_at = int(time.time()) // window * window
+        return self._presign(key, expires, signed_at, download_name)
+
+    def _presign(self, key: str, expires: int, signed_at: float,
+                 download_name: Optional[str] = None) -> str:
+        path = self._object_path(key)
+        amz_date = self._amz_date(signed_at)
+        query = {
+            'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+            'X-Amz-Credential': f"{self.access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request",
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(expires),
+            'X-Amz-SignedHeaders': 'host',
+        }
+        if download_name:
+            query['response-content-disposition'] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+        _, _, signature = self._signature('GET', path, query, {'host': self.host}, UNSIGNED_PAYLOAD, amz_date)
+        return f"{self._url(path, query)}&X-Amz-Signature={signature}"
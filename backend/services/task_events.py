@@ -0,0 +1,213 @@
+"""
+Task Events - 进程内任务进度事件发布/订阅，用于 SSE 推送
+
+- 任何提交到数据库的 Task 变更（状态、进度）都会在提交后自动发布给订阅者
+- 不需要持久化的中间进度（如可编辑 PPT 导出的阶段提示）可直接调用 publish_task_event 发布
+- stream_task_events 生成 Server-Sent Events 文本流；当任务在其他进程（独立 worker）中执行时，
+  会低频回退到数据库查询，保证跨进程也能收到更新
+"""
+import json
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Task
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED')
+
+DEFAULT_FALLBACK_INTERVAL = 3.0  # 秒，无进程内事件时回退查询数据库的间隔
+DEFAULT_KEEPALIVE_INTERVAL = 15.0  # 秒，空闲时发送注释行保持连接
+
+
+class TaskEventBroker:
+    """In-process publish/subscribe hub for task progress events"""
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, task_id: str) -> queue.Queue:
+        """订阅任务事件，返回接收事件的队列"""
+        subscription = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(task_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, task_id: str, subscription: queue.Queue):
+        """取消订阅"""
+        with self._lock:
+            subscriptions = self._subscribers.get(task_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscribers.pop(task_id, None)
+
+    def has_subscribers(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._subscribers
+
+    def publish(self, task_id: str, data: Dict[str, Any]):
+        """向所有订阅者发布事件（慢订阅者的队列满时丢弃最旧的事件）"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(task_id, []))
+
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(data)
+            except queue.Full:
+                try:
+                    subscription.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    subscription.put_nowait(data)
+                except queue.Full:
+                    pass
+
+
+# Global broker instance
+task_event_broker = TaskEventBroker()
+
+
+def publish_task_event(task_id: str, status: str, progress: Dict[str, Any],
+                       task_type: str = None, error_message: str = None):
+    """发布不经过数据库的任务进度事件（字段与 Task.to_dict() 保持一致）"""
+    if not task_event_broker.has_subscribers(task_id):
+        return
+    task_event_broker.publish(task_id, {
+        'task_id': task_id,
+        'task_type': task_type,
+        'status': status,
+        'progress': progress,
+        'error_message': error_message,
+    })
+
+
+# ---------------------------------------------------------------------------
+# 数据库提交钩子：Task 变更提交后自动发布
+# ---------------------------------------------------------------------------
+
+@event.listens_for(Session, 'after_flush')
+def _collect_task_changes(session, flush_context):
+    """记录本次 flush 中有订阅者的 Task 变更，提交后再发布"""
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Task) and obj.id and task_event_broker.has_subscribers(obj.id):
+            session.info.setdefault('task_events', {})[obj.id] = obj.to_dict()
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_task_changes(session):
+    pending = session.info.pop('task_events', None)
+    if not pending:
+        return
+    for task_id, data in pending.items():
+        task_event_broker.publish(task_id, data)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_task_changes(session):
+    session.info.pop('task_events', None)
+
+
+# ---------------------------------------------------------------------------
+# SSE 流
+# ---------------------------------------------------------------------------
+
+def format_sse(event_name: str, data: Any) -> str:
+    """格式化为 Server-Sent Events 文本"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event_name}\ndata: {payload}\n\n"
+
+
+def stream_task_events(task_id: str, load_snapshot: Callable[[], Optional[Dict[str, Any]]],
+                       transform: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+                       fallback_interval: float = DEFAULT_FALLBACK_INTERVAL,
+                       keepalive_interval: float = DEFAULT_KEEPALIVE_INTERVAL) -> Iterator[str]:
+    """
+    Generate an SSE stream for a task until it reaches a terminal status
+
+    Args:
+        task_id: Task ID
+        load_snapshot: Returns the current task dict from the database (None if missing)
+        transform: Optional function applied to every event before sending
+        fallback_interval: Seconds without in-process events before re-reading the database
+        keepalive_interval: Seconds of silence before sending a keepalive comment
+    """
+    transform = transform or (lambda data: data)
+    # 先订阅再读快照，避免两者之间的事件丢失
+    subscription = task_event_broker.subscribe(task_id)
+    try:
+        last_snapshot = load_snapshot()
+        if last_snapshot is None:
+            yield format_sse('error', {'message': 'Task not found'})
+            return
+
+        yield format_sse('progress', transform(last_snapshot))
+        if last_snapshot.get('status') in TERMINAL_STATUSES:
+            return
+
+        idle = 0.0
+        while True:
+            try:
+                data = subscription.get(timeout=fallback_interval)
+            except queue.Empty:
+                # 任务可能在其他进程中执行，回退到数据库查询
+                snapshot = load_snapshot()
+                if snapshot is None or snapshot == last_snapshot:
+                    idle += fallback_interval
+                    if idle >= keepalive_interval:
+                        idle = 0.0
+                        yield ': keepalive\n\n'
+                    continue
+                last_snapshot = data = snapshot
+
+            idle = 0.0
+            yield format_sse('progress', transform(data))
+            if data.get('status') in TERMINAL_STATUSES:
+                return
+    finally:
+        task_event_broker.unsubscribe(task_id, subscription)
+
+
+def _load_task_snapshot(task_id: str) -> Optional[Dict[str, Any]]:
+    """从数据库读取任务当前状态"""
+    db.session.expire_all()
+    task = Task.query.get(task_id)
+    data = task.to_dict() if task else None
+    # 结束只读事务，避免长连接一直持有 SQLite 读快照
+    db.session.rollback()
+    return data
+
+
+def task_event_stream_response(task_id: str,
+                               transform: Callable[[Dict[str, Any]], Dict[str, Any]] = None) -> Response:
+    """
+    Build a text/event-stream response for a task (must be called in a request context)
+
+    Args:
+        task_id: Task ID
+        transform: Optional function applied to every event before sending
+    """
+    stream = stream_task_events(
+        task_id,
+        lambda: _load_task_snapshot(task_id),
+        transform=transform,
+        fallback_interval=current_app.config.get('TASK_EVENTS_FALLBACK_INTERVAL', DEFAULT_FALLBACK_INTERVAL),
+        keepalive_interval=current_app.config.get('TASK_EVENTS_KEEPALIVE_INTERVAL', DEFAULT_KEEPALIVE_INTERVAL)
+    )
+    return Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # 禁用 Nginx 缓冲，保证事件实时推送
+        }
+    )
@@ -1,20 +1,40 @@
 """
 Task Manager - handles background tasks using ThreadPoolExecutor
 No need for Celery or Redis, uses in-memory task tracking
+
+长耗时任务（描述生成、图片生成、可编辑 PPT 导出）通过持久化任务队列（services.task_queue）
+提交，由队列消费线程领取后在 executor 中执行，进程重启或崩溃后任务不会丢失。
 """
+import os
+import time
+import uuid
+import socket
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, List, Dict, Any
 from datetime import datetime
 from models import db, Task, Page, Material
 from pathlib import Path
+from services.task_events import publish_task_event
+from services.task_progress import TaskProgressAggregator, iter_completed
+from services.image_pipeline import PageImageJob, run_page_image_pipeline
+from services.ai_scheduler import ai_scheduler, resolve_schedule_owner
+from services.export_cache import schedule_export_prerender
+from services.task_queue import (
+    TaskQueue, LeasedJob, create_task_queue,
+    DEFAULT_VISIBILITY_TIMEOUT, DEFAULT_MAX_ATTEMPTS
+)
 
 logger = logging.getLogger(__name__)
 
 # 默认 max_workers 值，可通过数据库配置覆盖
 DEFAULT_MAX_TASK_WORKERS = 4
 
+# 队列消费线程的默认轮询间隔（秒）
+DEFAULT_QUEUE_POLL_INTERVAL = 1.0
+
 
 class TaskManager:
     """Simple task manager using ThreadPoolExecutor"""
@@ -28,6 +48,17 @@ class TaskManager:
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.active_tasks = {}  # task_id -> Future
         self.lock = threading.Lock()
+
+        # 持久化队列相关状态
+        self.queue: TaskQueue = None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.visibility_timeout = DEFAULT_VISIBILITY_TIMEOUT
+        self.poll_interval = DEFAULT_QUEUE_POLL_INTERVAL
+        self.leased_jobs = {}  # job_id -> task_id
+        self.before_job: Callable = None  # 每个队列任务执行前调用 before_job(app)
+        self._consumer_thread = None
+        self._stop_event = threading.Event()
+        self._draining = False  # 停止领取新任务，但继续为执行中的任务续约
         logger.info(f"TaskManager initialized with max_workers={max_workers}")
 
     @staticmethod
@@ -49,6 +80,7 @@ class TaskManager:
         """
         重新配置 TaskManager（需要等待现有任务完成）
         注意：此方法会关闭旧的 executor 并创建新的
+        队列中尚未领取的任务保存在数据库中，不受影响
         """
         with self.lock:
             if max_workers == self._max_workers:
@@ -83,10 +115,161 @@ class TaskManager:
         """Check if task is still running"""
         with self.lock:
             return task_id in self.active_tasks
+
+    def configure_queue(self, app):
+        """根据 app.config 初始化持久化队列后端"""
+        self.queue = create_task_queue(
+            app.config.get('TASK_QUEUE_BACKEND', 'sqlite'),
+            max_attempts=app.config.get('TASK_QUEUE_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        )
+        self.visibility_timeout = app.config.get('TASK_QUEUE_VISIBILITY_TIMEOUT', DEFAULT_VISIBILITY_TIMEOUT)
+        self.poll_interval = app.config.get('TASK_QUEUE_POLL_INTERVAL', DEFAULT_QUEUE_POLL_INTERVAL)
+
+    def enqueue_task(self, task_id: str, job_type: str, payload: Dict[str, Any], commit: bool = True) -> str:
+        """
+        Submit a durable background task
+
+        Args:
+            task_id: Task ID
+            job_type: Handler name registered in QUEUE_JOB_HANDLERS
+            payload: JSON-serializable handler arguments
+            commit: False 时队列条目只加入当前会话，由调用方与 Task 在同一事务中提交
+                （入队失败时 Task 和项目状态一起回滚，不会留下永远 PENDING 的任务）
+
+        Returns:
+            Queue job ID
+        """
+        if job_type not in QUEUE_JOB_HANDLERS:
+            raise ValueError(f"Unknown job type: {job_type}")
+        if self.queue is None:
+            from flask import current_app
+            self.configure_queue(current_app)
+        return self.queue.enqueue(job_type, payload, task_id=task_id, commit=commit)
+
+    def start_queue_consumer(self, app, before_job: Callable = None):
+        """
+        启动队列消费线程（每个进程一个），领取任务并交给 executor 执行
+
+        Args:
+            app: Flask app instance
+            before_job: Optional hook called as before_job(app) inside the app context
+                before each queued job runs (e.g. to reload settings in a worker process)
+        """
+        if multiprocessing.parent_process() is not None:
+            # CPU 进程池的工作进程（forkserver/spawn）会以 __mp_main__ 重新执行入口模块（app.py），
+            # 其中的 create_app() 也会走到这里；子进程只执行 CPU 任务，不能领取队列任务
+            logger.debug("Skipping task queue consumer in multiprocessing child process")
+            return
+        if self.queue is None:
+            self.configure_queue(app)
+        if before_job is not None:
+            self.before_job = before_job
+
+        with self.lock:
+            if self._consumer_thread and self._consumer_thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._draining = False
+            self._consumer_thread = threading.Thread(
+                target=self._consume_loop, args=(app,),
+                name='task-queue-consumer', daemon=True
+            )
+            self._consumer_thread.start()
+        logger.info(f"Task queue consumer started: worker_id={self.worker_id}")
+
+    def stop_queue_consumer(self):
+        """停止队列消费线程（已领取的任务会继续执行到结束）"""
+        self._stop_event.set()
+        if self._consumer_thread:
+            self._consumer_thread.join(timeout=self.poll_interval * 2)
+
+    def _consume_loop(self, app):
+        """消费循环：崩溃恢复 -> 续约 -> 领取新任务"""
+        # 续约间隔为可见性超时的 1/3，保证一次续约失败时租约仍未过期
+        heartbeat_interval = max(self.visibility_timeout / 3, self.poll_interval)
+        last_heartbeat = 0.0
+        last_recovery = 0.0
+
+        with app.app_context():
+            while not self._stop_event.is_set():
+                try:
+                    now = time.monotonic()
+
+                    if now - last_recovery >= heartbeat_interval:
+                        self.queue.recover_expired()
+                        last_recovery = now
+
+                    if now - last_heartbeat >= heartbeat_interval:
+                        with self.lock:
+                            job_ids = list(self.leased_jobs.keys())
+                        for job_id in job_ids:
+                            if not self.queue.extend_lease(job_id, self.worker_id, self.visibility_timeout):
+                                logger.warning(f"Lost lease for job {job_id}")
+                        last_heartbeat = now
+
+                    with self.lock:
+                        free_slots = self._max_workers - len(self.leased_jobs)
+                    if free_slots > 0 and not self._draining:
+                        for job in self.queue.lease(self.worker_id, free_slots, self.visibility_timeout):
+                            self._dispatch_job(app, job)
+                except Exception as e:
+                    logger.error(f"Task queue consumer error: {e}", exc_info=True)
+                    db.session.rollback()
+
+                self._stop_event.wait(self.poll_interval)
+
+    def _dispatch_job(self, app, job: LeasedJob):
+        """将已领取的队列任务提交到 executor"""
+        with self.lock:
+            self.leased_jobs[job.job_id] = job.task_id
+            future = self.executor.submit(self._run_job, app, job)
+            if job.task_id:
+                self.active_tasks[job.task_id] = future
+
+        def _cleanup(f):
+            with self.lock:
+                self.leased_jobs.pop(job.job_id, None)
+                if job.task_id:
+                    self.active_tasks.pop(job.task_id, None)
+
+        future.add_done_callback(_cleanup)
+        logger.info(f"Dispatched job {job.job_id} ({job.job_type}), attempt {job.attempts}")
+
+    def _run_job(self, app, job: LeasedJob):
+        """在 executor 线程中执行队列任务，并根据结果确认或标记失败"""
+        with app.app_context():
+            try:
+                handler = QUEUE_JOB_HANDLERS.get(job.job_type)
+                if handler is None:
+                    raise ValueError(f"Unknown job type: {job.job_type}")
+                if self.before_job is not None:
+                    self.before_job(app)
+                handler(job.task_id, job.payload, app)
+                self.queue.ack(job.job_id, self.worker_id)
+            except Exception as e:
+                import traceback
+                logger.error(f"Job {job.job_id} FAILED: {traceback.format_exc()}")
+                db.session.rollback()
+
+                task = Task.query.get(job.task_id) if job.task_id else None
+                if task and task.status not in ('COMPLETED', 'FAILED'):
+                    task.status = 'FAILED'
+                    task.error_message = str(e)
+                    task.completed_at = datetime.utcnow()
+                    db.session.commit()
+
+                self.queue.fail(job.job_id, self.worker_id, str(e))
     
     def shutdown(self):
-        """Shutdown the executor"""
+        """
+        Shutdown the executor
+
+        先停止领取新任务，等待执行中的任务结束（期间消费线程继续续约，避免被其他进程重复领取），
+        最后停止消费线程
+        """
+        self._draining = True
         self.executor.shutdown(wait=True)
+        self.stop_queue_consumer()
 
 
 # Global task manager instance (使用默认值初始化，启动后可通过 reconfigure 调整)
@@ -118,6 +301,7 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
     
     # 在整个任务中保持应用上下文
     with app.app_context():
+        progress = None
         try:
             # 重要：在后台线程开始时就获取task和设置状态
             task = Task.query.get(task_id)
@@ -147,8 +331,10 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
             db.session.commit()
             
             # Generate descriptions in parallel
-            completed = 0
-            failed = 0
+            # 页面结果和进度在内存中缓冲，按间隔/批量合并为一次事务写入
+            progress = TaskProgressAggregator.from_config(app, task_id, len(pages))
+            # 页面级 AI 调用通过全局调度器按用户公平分配并发名额
+            owner = resolve_schedule_owner(project_id)
             
             def generate_single_desc(page_id, page_outline, page_index):
                 """
@@ -158,10 +344,11 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                 # 关键修复：在子线程中也需要应用上下文
                 with app.app_context():
                     try:
-                        desc_text = ai_service.generate_page_description(
-                            project_context, outline, page_outline, page_index,
-                            language=language
-                        )
+                        with ai_scheduler.slot(owner, ai_service.text_provider):
+                            desc_text = ai_service.generate_page_description(
+                                project_context, outline, page_outline, page_index,
+                                language=language
+                            )
                         
                         # Parse description into structured format
                         # This is a simplified version - you may want more sophisticated parsing
@@ -186,48 +373,41 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                 ]
                 
                 # Process results as they complete
-                for future in as_completed(futures):
-                    page_id, desc_content, error = future.result()
-                    
-                    db.session.expire_all()
-                    
-                    # Update page in database
-                    page = Page.query.get(page_id)
-                    if page:
+                for done in iter_completed(futures, progress.flush_interval):
+                    for future in done:
+                        page_id, desc_content, error = future.result()
+                        
                         if error:
-                            page.status = 'FAILED'
-                            failed += 1
+                            progress.record_failure(page_id)
                         else:
-                            page.set_description_content(desc_content)
-                            page.status = 'DESCRIPTION_GENERATED'
-                            completed += 1
-                        
-                        db.session.commit()
+                            def apply_description(page, desc_content=desc_content):
+                                page.set_description_content(desc_content)
+                                page.status = 'DESCRIPTION_GENERATED'
+                            progress.record_success(page_id, apply_description)
                     
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
+                    progress.maybe_flush()
             
-            # Mark task as completed
-            task = Task.query.get(task_id)
-            if task:
-                task.status = 'COMPLETED'
-                task.completed_at = datetime.utcnow()
-                db.session.commit()
-                logger.info(f"Task {task_id} COMPLETED - {completed} pages generated, {failed} failed")
+            # Write remaining results and mark task as completed in one transaction
+            progress.flush(status='COMPLETED')
+            logger.info(f"Task {task_id} COMPLETED - {progress.completed} pages generated, {progress.failed} failed")
             
             # Update project status
             from models import Project
             project = Project.query.get(project_id)
-            if project and failed == 0:
+            if project and progress.failed == 0:
                 project.status = 'DESCRIPTIONS_GENERATED'
                 db.session.commit()
                 logger.info(f"Project {project_id} status updated to DESCRIPTIONS_GENERATED")
         
         except Exception as e:
+            db.session.rollback()
+            # 保留已完成页面的结果
+            if progress is not None and progress.has_pending:
+                try:
+                    progress.flush()
+                except Exception:
+                    db.session.rollback()
+            
             # Mark task as failed
             task = Task.query.get(task_id)
             if task:
@@ -249,13 +429,18 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
     
     Note: app instance MUST be passed from the request context
     
+    IMAGE_PIPELINE_MODE=async（默认）时所有页面在一个事件循环中并发生成，
+    同时进行的数量由 IMAGE_ASYNC_MAX_IN_FLIGHT 限制；thread 模式使用 max_workers 个线程。
+    
     Args:
+        max_workers: Thread count (thread pipeline mode only)
         language: Output language (zh, en, ja, auto)
     """
     if app is None:
         raise ValueError("Flask app instance must be provided")
     
     with app.app_context():
+        progress = None
         try:
             # Update task status to PROCESSING
             task = Task.query.get(task_id)
@@ -285,161 +470,141 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             })
             db.session.commit()
             
-            # Generate images in parallel
-            completed = 0
-            failed = 0
+            # 一次性将所有页面标记为生成中（避免每个子线程单独提交）
+            Page.query.filter(Page.id.in_([page.id for page in pages])).update(
+                {'status': 'GENERATING'}, synchronize_session=False
+            )
+            db.session.commit()
             
-            def generate_single_image(page_id, page_data, page_index):
-                """
-                Generate image for a single page
-                注意：只传递 page_id（字符串），不传递 ORM 对象，避免跨线程会话问题
-                """
-                # 关键修复：在子线程中也需要应用上下文
-                with app.app_context():
+            # Generate images in parallel
+            # 页面结果和进度在内存中缓冲，按间隔/批量合并为一次事务写入
+            progress = TaskProgressAggregator.from_config(app, task_id, len(pages))
+            # 页面级 AI 调用通过全局调度器按用户公平分配并发名额
+            owner = resolve_schedule_owner(project_id)
+            
+            def record_result(result):
+                page_id, image_path, error = result
+                if error:
+                    progress.record_failure(page_id)
+                else:
+                    progress.record_success(
+                        page_id,
+                        lambda page, image_path=image_path: _set_current_image_version(page, image_path)
+                    )
+
+            if app.config.get('IMAGE_PIPELINE_MODE', 'async') == 'async':
+                # asyncio 调度：提示词在当前线程中一次性准备好，事件循环中并发等待生成结果
+                jobs = []
+                for i, (page, page_data) in enumerate(zip(pages, pages_data), 1):
                     try:
-                        logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
-                        # Get page from database in this thread
-                        page_obj = Page.query.get(page_id)
-                        if not page_obj:
-                            raise ValueError(f"Page {page_id} not found")
-                        
-                        # Update page status
-                        page_obj.status = 'GENERATING'
-                        db.session.commit()
-                        logger.debug(f"Page {page_id} status updated to GENERATING")
-                        
-                        # Get description content
-                        desc_content = page_obj.get_description_content()
-                        if not desc_content:
-                            raise ValueError("No description content for page")
-                        
-                        # 获取描述文本（可能是 text 字段或 text_content 数组）
-                        desc_text = desc_content.get('text', '')
-                        if not desc_text and desc_content.get('text_content'):
-                            # 如果 text 字段不存在，尝试从 text_content 数组获取
-                            text_content = desc_content.get('text_content', [])
-                            if isinstance(text_content, list):
-                                desc_text = '\n'.join(text_content)
-                            else:
-                                desc_text = str(text_content)
-                        
-                        logger.debug(f"Got description text for page {page_id}: {desc_text[:100]}...")
-                        
-                        # 从当前页面的描述内容中提取图片 URL
-                        page_additional_ref_images = []
-                        has_material_images = False
-                        
-                        # 从描述文本中提取图片
-                        if desc_text:
-                            image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
-                            if image_urls:
-                                logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
-                                page_additional_ref_images = image_urls
-                                has_material_images = True
-                        
-                        # Generate image prompt
-                        prompt = ai_service.generate_image_prompt(
-                            outline, page_data, desc_text, page_index,
-                            has_material_images=has_material_images,
-                            extra_requirements=extra_requirements,
-                            language=language
-                        )
-                        logger.debug(f"Generated image prompt for page {page_id}")
-                        
-                        # Generate image
-                        logger.info(f"🎨 Calling AI service to generate image for page {page_index}/{len(pages)}...")
-                        image = ai_service.generate_image(
-                            prompt, ref_image_path, aspect_ratio, resolution,
-                            additional_ref_images=page_additional_ref_images if page_additional_ref_images else None
-                        )
-                        logger.info(f"✅ Image generated successfully for page {page_index}")
-                        
-                        if not image:
-                            raise ValueError("Failed to generate image")
-                        
-                        # Save image
-                        image_path = file_service.save_generated_image(
-                            image, project_id, page_id
-                        )
-                        
-                        return (page_id, image_path, None)
-                        
+                        jobs.append(_build_page_image_job(
+                            ai_service, outline, page, page_data, i,
+                            extra_requirements=extra_requirements, language=language
+                        ))
                     except Exception as e:
-                        import traceback
-                        error_detail = traceback.format_exc()
-                        logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
-                        return (page_id, None, str(e))
-            
-            # Use ThreadPoolExecutor for parallel generation
-            # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_image, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
-                ]
+                        logger.error(f"Failed to prepare image prompt for page {page.id}: {e}")
+                        record_result((page.id, None, str(e)))
 
-                # Process results as they complete
-                for future in as_completed(futures):
-                    page_id, image_path, error = future.result()
+                async def generate(job):
+                    async with ai_scheduler.aslot(owner, ai_service.image_provider):
+                        return await ai_service.agenerate_image(
+                            job.prompt, ref_image_path, aspect_ratio, resolution,
+                            additional_ref_images=job.additional_ref_images
+                        )
+
+                run_page_image_pipeline(
+                    jobs,
+                    generate=generate,
+                    save=lambda page_id, image: file_service.save_generated_image(image, project_id, page_id),
+                    on_result=record_result,
+                    on_tick=progress.maybe_flush,
+                    max_in_flight=app.config.get('IMAGE_ASYNC_MAX_IN_FLIGHT', 32),
+                    tick_interval=progress.flush_interval
+                )
+            else:
+                def generate_single_image(page_id, page_data, page_index):
+                    """
+                    Generate image for a single page
+                    注意：只传递 page_id（字符串），不传递 ORM 对象，避免跨线程会话问题
+                    """
+                    # 关键修复：在子线程中也需要应用上下文
+                    with app.app_context():
+                        try:
+                            logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
+                            # Get page from database in this thread (read only)
+                            page_obj = Page.query.get(page_id)
+                            if not page_obj:
+                                raise ValueError(f"Page {page_id} not found")
 
+                            job = _build_page_image_job(
+                                ai_service, outline, page_obj, page_data, page_index,
+                                extra_requirements=extra_requirements, language=language
+                            )
 
-                    db.session.expire_all()
+                            # Generate image
+                            logger.info(f"🎨 Calling AI service to generate image for page {page_index}/{len(pages)}...")
+                            with ai_scheduler.slot(owner, ai_service.image_provider):
+                                image = ai_service.generate_image(
+                                    job.prompt, ref_image_path, aspect_ratio, resolution,
+                                    additional_ref_images=job.additional_ref_images
+                                )
+                            logger.info(f"✅ Image generated successfully for page {page_index}")
 
-                    # Update page in database
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = 'FAILED'
-                            failed += 1
-                        else:
-                            # 创建版本记录
-                            from models import PageImageVersion
-                            existing_versions = PageImageVersion.query.filter_by(page_id=page_id).all()
-                            next_version = len(existing_versions) + 1
-
-                            # 标记旧版本为非当前
-                            for version in existing_versions:
-                                version.is_current = False
-
-                            # 创建新版本记录
-                            new_version = PageImageVersion(
-                                page_id=page_id,
-                                image_path=image_path,
-                                version_number=next_version,
-                                is_current=True
+                            if not image:
+                                raise ValueError("Failed to generate image")
+
+                            # Save image
+                            image_path = file_service.save_generated_image(
+                                image, project_id, page_id
                             )
-                            db.session.add(new_version)
 
-                            page.generated_image_path = image_path
-                            page.status = 'COMPLETED'
-                            completed += 1
+                            return (page_id, image_path, None)
 
-                        db.session.commit()
-                    
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
+                        except Exception as e:
+                            import traceback
+                            error_detail = traceback.format_exc()
+                            logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
+                            return (page_id, None, str(e))
+
+                # Use ThreadPoolExecutor for parallel generation
+                # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(generate_single_image, page.id, page_data, i)
+                        for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
+                    ]
+
+                    # Process results as they complete
+                    for done in iter_completed(futures, progress.flush_interval):
+                        for future in done:
+                            record_result(future.result())
+
+                        progress.maybe_flush()
             
-            # Mark task as completed
-            task = Task.query.get(task_id)
-            if task:
-                task.status = 'COMPLETED'
-                task.completed_at = datetime.utcnow()
-                db.session.commit()
-                logger.info(f"Task {task_id} COMPLETED - {completed} images generated, {failed} failed")
+            # Write remaining results and mark task as completed in one transaction
+            progress.flush(status='COMPLETED')
+            logger.info(f"Task {task_id} COMPLETED - {progress.completed} images generated, {progress.failed} failed")
             
             # Update project status
             from models import Project
             project = Project.query.get(project_id)
-            if project and failed == 0:
+            if project and progress.failed == 0:
                 project.status = 'COMPLETED'
                 db.session.commit()
                 logger.info(f"Project {project_id} status updated to COMPLETED")
+
+                # 用户通常紧接着导出，后台预先生成 PPTX/PDF 并写入导出缓存
+                schedule_export_prerender(project_id, app)
         
         except Exception as e:
+            db.session.rollback()
+            # 保留已完成页面的结果
+            if progress is not None and progress.has_pending:
+                try:
+                    progress.flush()
+                except Exception:
+                    db.session.rollback()
+            
             # Mark task as failed
             task = Task.query.get(task_id)
             if task:
@@ -449,6 +614,75 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 db.session.commit()
 
 
+def _build_page_image_job(ai_service, outline: List[Dict], page_obj: Page, page_data: Dict,
+                          page_index: int, extra_requirements: str = None,
+                          language: str = None) -> PageImageJob:
+    """根据页面描述生成图片提示词，并提取描述中引用的素材图片"""
+    # Get description content
+    desc_content = page_obj.get_description_content()
+    if not desc_content:
+        raise ValueError("No description content for page")
+
+    # 获取描述文本（可能是 text 字段或 text_content 数组）
+    desc_text = desc_content.get('text', '')
+    if not desc_text and desc_content.get('text_content'):
+        # 如果 text 字段不存在，尝试从 text_content 数组获取
+        text_content = desc_content.get('text_content', [])
+        if isinstance(text_content, list):
+            desc_text = '\n'.join(text_content)
+        else:
+            desc_text = str(text_content)
+
+    logger.debug(f"Got description text for page {page_obj.id}: {desc_text[:100]}...")
+
+    # 从描述文本中提取图片 URL
+    page_additional_ref_images = []
+    if desc_text:
+        image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
+        if image_urls:
+            logger.info(f"Found {len(image_urls)} image(s) in page {page_obj.id} description")
+            page_additional_ref_images = image_urls
+
+    # Generate image prompt
+    prompt = ai_service.generate_image_prompt(
+        outline, page_data, desc_text, page_index,
+        has_material_images=bool(page_additional_ref_images),
+        extra_requirements=extra_requirements,
+        language=language
+    )
+    logger.debug(f"Generated image prompt for page {page_obj.id}")
+
+    return PageImageJob(
+        page_id=page_obj.id,
+        page_index=page_index,
+        prompt=prompt,
+        additional_ref_images=page_additional_ref_images or None
+    )
+
+
+def _set_current_image_version(page: Page, image_path: str):
+    """为页面创建新的图片版本记录并设为当前版本（不提交）"""
+    from models import PageImageVersion
+    existing_versions = PageImageVersion.query.filter_by(page_id=page.id).all()
+    next_version = len(existing_versions) + 1
+
+    # 标记旧版本为非当前
+    for version in existing_versions:
+        version.is_current = False
+
+    # 创建新版本记录
+    new_version = PageImageVersion(
+        page_id=page.id,
+        image_path=image_path,
+        version_number=next_version,
+        is_current=True
+    )
+    db.session.add(new_version)
+
+    page.generated_image_path = image_path
+    page.status = 'COMPLETED'
+
+
 def generate_single_page_image_task(task_id: str, project_id: str, page_id: str, 
                                     ai_service, file_service, outline: List[Dict],
                                     use_template: bool = True, aspect_ratio: str = "16:9",
@@ -529,10 +763,11 @@ def generate_single_page_image_task(task_id: str, project_id: str, page_id: str,
             
             # Generate image
             logger.info(f"🎨 Generating image for page {page_id}...")
-            image = ai_service.generate_image(
-                prompt, ref_image_path, aspect_ratio, resolution,
-                additional_ref_images=additional_ref_images if additional_ref_images else None
-            )
+            with ai_scheduler.slot(resolve_schedule_owner(project_id), ai_service.image_provider):
+                image = ai_service.generate_image(
+                    prompt, ref_image_path, aspect_ratio, resolution,
+                    additional_ref_images=additional_ref_images if additional_ref_images else None
+                )
             
             if not image:
                 raise ValueError("Failed to generate image")
@@ -640,14 +875,15 @@ def edit_page_image_task(task_id: str, project_id: str, page_id: str,
             # Edit image
             logger.info(f"🎨 Editing image for page {page_id}...")
             try:
-                image = ai_service.edit_image(
-                    edit_instruction,
-                    current_image_path,
-                    aspect_ratio,
-                    resolution,
-                    original_description=original_description,
-                    additional_ref_images=additional_ref_images if additional_ref_images else None
-                )
+                with ai_scheduler.slot(resolve_schedule_owner(project_id), ai_service.image_provider):
+                    image = ai_service.edit_image(
+                        edit_instruction,
+                        current_image_path,
+                        aspect_ratio,
+                        resolution,
+                        original_description=original_description,
+                        additional_ref_images=additional_ref_images if additional_ref_images else None
+                    )
             finally:
                 # Clean up temp directory if created
                 if temp_dir:
@@ -874,31 +1110,42 @@ def export_editable_ppt_task(
             converter = PPTConverter(
                 api_key=api_key,
                 secret_key=secret_key,
-                reference_text=reference_text
+                reference_text=reference_text,
+                max_workers=app.config.get('PPT_CONVERT_WORKERS')
             )
 
+            # 已完成页数（页内阶段回调不携带 completed 字段）
+            completed_pages = 0
+
             # 定义进度回调函数
             def progress_callback(progress_info: dict):
-                """更新任务进度到数据库"""
+                """
+                页面完成时更新任务进度到数据库；页内阶段（OCR、LLM 过滤等）只推送进程内事件，
+                不写数据库
+                """
+                nonlocal completed_pages
                 try:
+                    if 'completed' in progress_info:
+                        completed_pages = progress_info['completed']
+                    stage = progress_info.get('stage', 'processing')
+
+                    progress = {
+                        "total": progress_info.get('total', len(image_paths)),
+                        "completed": completed_pages,
+                        "failed": 0,
+                        "current_page": progress_info.get('current_page', 0),
+                        "stage": stage,
+                        "stage_name": progress_info.get('stage_name', '处理中...'),
+                        "text_blocks_count": progress_info.get('text_blocks_count', 0)
+                    }
+
+                    if stage not in ('page_done', 'generating'):
+                        publish_task_event(task_id, 'PROCESSING', progress, task_type='EXPORT_EDITABLE_PPTX')
+                        return
+
                     task = Task.query.get(task_id)
                     if task:
-                        current_page = progress_info.get('current_page', 0)
-                        total = progress_info.get('total', len(image_paths))
-                        completed = progress_info.get('completed', 0)
-                        stage = progress_info.get('stage', 'processing')
-                        stage_name = progress_info.get('stage_name', '处理中...')
-                        text_blocks = progress_info.get('text_blocks_count', 0)
-
-                        task.set_progress({
-                            "total": total,
-                            "completed": completed,
-                            "failed": 0,
-                            "current_page": current_page,
-                            "stage": stage,
-                            "stage_name": stage_name,
-                            "text_blocks_count": text_blocks
-                        })
+                        task.set_progress(progress)
                         db.session.commit()
                 except Exception as e:
                     logger.warning(f"更新进度失败: {e}")
@@ -910,6 +1157,9 @@ def export_editable_ppt_task(
                 progress_callback=progress_callback
             )
 
+            from services.file_service import FileService
+            FileService(app.config['UPLOAD_FOLDER']).publish_file(result.output_path)
+
             task.status = 'COMPLETED'
             task.completed_at = datetime.utcnow()
             task.set_progress({
@@ -940,3 +1190,65 @@ def export_editable_ppt_task(
                 task.error_message = str(e)
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
+
+
+def _run_generate_descriptions_job(task_id: str, payload: Dict[str, Any], app):
+    """队列任务入口：从 payload 重建服务对象后执行 generate_descriptions_task"""
+    from services.ai_service import AIService, ProjectContext
+
+    context_data = payload.get('project_context') or {}
+    project_context = ProjectContext(context_data, context_data.get('reference_files_content'))
+
+    generate_descriptions_task(
+        task_id,
+        payload['project_id'],
+        AIService(),
+        project_context,
+        payload['outline'],
+        payload.get('max_workers', 5),
+        app,
+        payload.get('language')
+    )
+
+
+def _run_generate_images_job(task_id: str, payload: Dict[str, Any], app):
+    """队列任务入口：从 payload 重建服务对象后执行 generate_images_task"""
+    from services.ai_service import AIService
+    from services.file_service import FileService
+
+    generate_images_task(
+        task_id,
+        payload['project_id'],
+        AIService(),
+        FileService(app.config['UPLOAD_FOLDER']),
+        payload['outline'],
+        payload.get('use_template', True),
+        payload.get('max_workers', 8),
+        payload.get('aspect_ratio', '16:9'),
+        payload.get('resolution', '2K'),
+        app,
+        payload.get('extra_requirements'),
+        payload.get('language')
+    )
+
+
+def _run_export_editable_ppt_job(task_id: str, payload: Dict[str, Any], app):
+    """队列任务入口：执行 export_editable_ppt_task（OCR 密钥从配置读取，不写入队列）"""
+    export_editable_ppt_task(
+        task_id,
+        project_id=payload['project_id'],
+        image_paths=payload['image_paths'],
+        output_path=payload['output_path'],
+        api_key=app.config.get('BAIDU_OCR_API_KEY'),
+        secret_key=app.config.get('BAIDU_OCR_SECRET_KEY'),
+        reference_text=payload.get('reference_text'),
+        app=app
+    )
+
+
+# 持久化队列任务类型 -> 处理函数（签名: handler(task_id, payload, app)）
+QUEUE_JOB_HANDLERS: Dict[str, Callable] = {
+    'GENERATE_DESCRIPTIONS': _run_generate_descriptions_job,
+    'GENERATE_IMAGES': _run_generate_images_job,
+    'EXPORT_EDITABLE_PPTX': _run_export_editable_ppt_job,
+}
@@ -0,0 +1,120 @@
+"""
+Task Progress - 批量合并后台任务的页面结果与进度写入
+
+并行生成描述/图片时，每完成一页都单独提交页面和任务进度会产生大量 SQLite 写事务。
+TaskProgressAggregator 在内存中缓冲页面结果和进度，按时间间隔或批量大小合并为一次事务写入，
+任务结束时强制写入最终状态。
+"""
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Set, Tuple
+
+from models import db, Task, Page
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0  # 秒
+DEFAULT_BATCH_SIZE = 5
+
+
+def iter_completed(futures: Iterable[Future], interval: float) -> Iterator[Set[Future]]:
+    """
+    类似 as_completed，但至少每 interval 秒产出一次（可能为空集合），
+    便于调用方在等待较慢的页面时也能按时间刷新缓冲区
+    """
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=interval, return_when=FIRST_COMPLETED)
+        yield done
+
+
+class TaskProgressAggregator:
+    """
+    Buffers per-page results and task progress, flushing them in one transaction
+
+    只能在创建它的线程中使用（通常是后台任务的主线程，子线程只负责生成内容）。
+    """
+
+    def __init__(self, task_id: str, total: int,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.task_id = task_id
+        self.total = total
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.completed = 0
+        self.failed = 0
+        self._pending: List[Tuple[str, Callable[[Page], None]]] = []
+        self._last_flush = time.monotonic()
+
+    @classmethod
+    def from_config(cls, app, task_id: str, total: int) -> 'TaskProgressAggregator':
+        """根据 app.config 中的 TASK_PROGRESS_* 配置创建"""
+        return cls(
+            task_id, total,
+            flush_interval=app.config.get('TASK_PROGRESS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+            batch_size=app.config.get('TASK_PROGRESS_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        )
+
+    def record_success(self, page_id: str, apply: Callable[[Page], None]):
+        """记录成功的页面，apply(page) 会在刷新时对页面对象执行"""
+        self.completed += 1
+        self._pending.append((page_id, apply))
+
+    def record_failure(self, page_id: str):
+        """记录失败的页面"""
+        self.failed += 1
+        self._pending.append((page_id, _mark_page_failed))
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def maybe_flush(self):
+        """缓冲区达到批量大小或距离上次刷新超过时间间隔时刷新"""
+        if not self._pending:
+            return
+        if (len(self._pending) >= self.batch_size or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self, status: str = None):
+        """
+        在一个事务中写入所有缓冲的页面结果和任务进度
+
+        Args:
+            status: 可选的任务最终状态（如 'COMPLETED'），与最后一批结果一起写入
+
+        提交失败时缓冲的结果保留在缓冲区中（调用方回滚后可再次 flush 重试）。
+        """
+        pending = list(self._pending)
+
+        db.session.expire_all()
+        for page_id, apply in pending:
+            page = Page.query.get(page_id)
+            if page:
+                apply(page)
+
+        task = Task.query.get(self.task_id)
+        if task:
+            task.update_progress(completed=self.completed, failed=self.failed)
+            if status:
+                task.status = status
+                task.completed_at = datetime.utcnow()
+
+        db.session.commit()
+        # 提交成功后才移出缓冲区
+        del self._pending[:len(pending)]
+        self._last_flush = time.monotonic()
+
+        if pending:
+            logger.info(
+                f"Task {self.task_id} progress: {self.completed}/{self.total} completed, "
+                f"{self.failed} failed ({len(pending)} page(s) written)"
+            )
+
+
+def _mark_page_failed(page: Page):
+    page.status = 'FAILED'
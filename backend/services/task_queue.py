@@ -0,0 +1,279 @@
+"""
+Task Queue - 持久化任务队列后端
+
+将后台任务写入数据库表，由一个或多个工作进程通过"租约"领取执行：
+- 领取（lease）时写入 lease_owner 和 lease_expires_at（可见性超时）
+- 执行期间由消费线程定期续约（heartbeat）
+- 工作进程崩溃后租约自然过期，条目被重新放回队列（崩溃恢复）
+
+队列后端可插拔，通过 TASK_QUEUE_BACKEND 配置选择，目前提供基于 SQLite 表的实现。
+"""
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from models import db, QueueJob, Task
+
+logger = logging.getLogger(__name__)
+
+# 默认可见性超时（秒）：超过该时间未续约的任务视为工作进程已崩溃
+DEFAULT_VISIBILITY_TIMEOUT = 120
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+@dataclass
+class LeasedJob:
+    """已领取的队列条目（与 ORM 会话解耦，可安全跨线程传递）"""
+    job_id: str
+    job_type: str
+    task_id: Optional[str]
+    attempts: int
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RecoveredJob:
+    """租约过期后被回收的队列条目"""
+    job_id: str
+    task_id: Optional[str]
+    requeued: bool
+
+
+class TaskQueue(ABC):
+    """Abstract base class for durable task queue backends"""
+
+    @abstractmethod
+    def enqueue(self, job_type: str, payload: Dict[str, Any], task_id: Optional[str] = None,
+                max_attempts: Optional[int] = None, commit: bool = True) -> str:
+        """
+        Add a job to the queue
+
+        Args:
+            job_type: Registered job handler name
+            payload: JSON-serializable job arguments
+            task_id: Associated Task ID (optional)
+            max_attempts: How many times the job may be leased before giving up
+            commit: False 时只加入当前数据库会话，由调用方与 Task 等记录在同一事务中提交
+
+        Returns:
+            Queue job ID
+        """
+        pass
+
+    @abstractmethod
+    def lease(self, owner: str, limit: int = 1,
+              visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT) -> List[LeasedJob]:
+        """Atomically claim up to `limit` available jobs for `owner`"""
+        pass
+
+    @abstractmethod
+    def extend_lease(self, job_id: str, owner: str,
+                     visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        """Extend the lease of a running job. Returns False if the lease was lost"""
+        pass
+
+    @abstractmethod
+    def ack(self, job_id: str, owner: str) -> None:
+        """Mark a leased job as done"""
+        pass
+
+    @abstractmethod
+    def fail(self, job_id: str, owner: str, error: str) -> None:
+        """Mark a leased job as permanently failed"""
+        pass
+
+    @abstractmethod
+    def recover_expired(self) -> List[RecoveredJob]:
+        """Re-queue (or fail, once attempts are exhausted) jobs whose lease has expired"""
+        pass
+
+
+class SQLiteTaskQueue(TaskQueue):
+    """
+    基于数据库表（queue_jobs）的任务队列
+
+    使用 "UPDATE ... WHERE status=..." 的条件更新实现原子领取，
+    多个工作进程共享同一个 SQLite 数据库即可分担负载。
+    所有方法都需要在 Flask 应用上下文中调用。
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], task_id: Optional[str] = None,
+                max_attempts: Optional[int] = None, commit: bool = True) -> str:
+        job = QueueJob(
+            job_type=job_type,
+            task_id=task_id,
+            status='QUEUED',
+            max_attempts=max_attempts or self.max_attempts,
+            available_at=datetime.utcnow()
+        )
+        job.set_payload(payload)
+        db.session.add(job)
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        logger.info(f"Enqueued job {job.id} ({job_type}) for task {task_id}")
+        return job.id
+
+    def lease(self, owner: str, limit: int = 1,
+              visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT) -> List[LeasedJob]:
+        if limit <= 0:
+            return []
+
+        now = datetime.utcnow()
+        candidates = QueueJob.query.filter(
+            QueueJob.status == 'QUEUED',
+            QueueJob.available_at <= now
+        ).order_by(QueueJob.created_at).limit(limit).all()
+
+        leased = []
+        for candidate in candidates:
+            # 提交后 ORM 对象会过期，先取出需要的字段
+            job_id, job_type, task_id = candidate.id, candidate.job_type, candidate.task_id
+            attempts, payload = candidate.attempts, candidate.get_payload()
+
+            # 条件更新：只有仍处于 QUEUED 状态时才能领取成功，避免多进程重复领取
+            claimed = QueueJob.query.filter(
+                QueueJob.id == job_id,
+                QueueJob.status == 'QUEUED'
+            ).update({
+                'status': 'LEASED',
+                'lease_owner': owner,
+                'lease_expires_at': now + timedelta(seconds=visibility_timeout),
+                'attempts': QueueJob.attempts + 1,
+                'updated_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+
+            if claimed:
+                leased.append(LeasedJob(
+                    job_id=job_id,
+                    job_type=job_type,
+                    task_id=task_id,
+                    attempts=attempts + 1,
+                    payload=payload
+                ))
+
+        db.session.expire_all()
+        return leased
+
+    def extend_lease(self, job_id: str, owner: str,
+                     visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        now = datetime.utcnow()
+        extended = QueueJob.query.filter(
+            QueueJob.id == job_id,
+            QueueJob.status == 'LEASED',
+            QueueJob.lease_owner == owner
+        ).update({
+            'lease_expires_at': now + timedelta(seconds=visibility_timeout),
+            'updated_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+        return bool(extended)
+
+    def ack(self, job_id: str, owner: str) -> None:
+        self._finish(job_id, owner, 'DONE')
+
+    def fail(self, job_id: str, owner: str, error: str) -> None:
+        self._finish(job_id, owner, 'FAILED', error)
+
+    def _finish(self, job_id: str, owner: str, status: str, error: str = None) -> None:
+        values = {
+            'status': status,
+            'lease_owner': None,
+            'lease_expires_at': None,
+            'updated_at': datetime.utcnow()
+        }
+        if error is not None:
+            values['last_error'] = error
+
+        finished = QueueJob.query.filter(
+            QueueJob.id == job_id,
+            QueueJob.status == 'LEASED',
+            QueueJob.lease_owner == owner
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+
+        if not finished:
+            logger.warning(f"Job {job_id} lease was lost before it could be marked {status}")
+
+    def recover_expired(self) -> List[RecoveredJob]:
+        now = datetime.utcnow()
+        expired = QueueJob.query.filter(
+            QueueJob.status == 'LEASED',
+            QueueJob.lease_expires_at < now
+        ).all()
+
+        # 提交后 ORM 对象会过期，先取出需要的字段
+        expired = [
+            (job.id, job.job_type, job.task_id, job.attempts, job.max_attempts, job.lease_owner)
+            for job in expired
+        ]
+
+        recovered = []
+        for job_id, job_type, task_id, attempts, max_attempts, lease_owner in expired:
+            requeue = attempts < max_attempts
+            values = {
+                'status': 'QUEUED' if requeue else 'FAILED',
+                'lease_owner': None,
+                'lease_expires_at': None,
+                'available_at': now,
+                'last_error': f"Lease held by {lease_owner} expired",
+                'updated_at': now
+            }
+            # 条件更新：只回收仍然过期的租约（期间可能已被续约或完成）
+            updated = QueueJob.query.filter(
+                QueueJob.id == job_id,
+                QueueJob.status == 'LEASED',
+                QueueJob.lease_expires_at < now
+            ).update(values, synchronize_session=False)
+            if not updated:
+                continue
+
+            # 同步 Task 状态：重新入队的任务回到 PENDING，耗尽重试次数的任务标记失败
+            task = Task.query.get(task_id) if task_id else None
+            if task and task.status not in ('COMPLETED', 'FAILED'):
+                if requeue:
+                    task.status = 'PENDING'
+                else:
+                    task.status = 'FAILED'
+                    task.error_message = '任务执行中断（工作进程异常退出），已超过最大重试次数'
+                    task.completed_at = now
+            db.session.commit()
+
+            recovered.append(RecoveredJob(job_id=job_id, task_id=task_id, requeued=requeue))
+            logger.warning(
+                f"Recovered expired job {job_id} ({job_type}), "
+                f"attempts={attempts}/{max_attempts}, requeued={requeue}"
+            )
+
+        db.session.expire_all()
+        return recovered
+
+
+# 可用的队列后端（TASK_QUEUE_BACKEND 配置项）
+_QUEUE_BACKENDS = {
+    'sqlite': SQLiteTaskQueue,
+}
+
+
+def create_task_queue(backend: str = 'sqlite', **kwargs) -> TaskQueue:
+    """
+    Factory function to create a task queue backend
+
+    Args:
+        backend: Backend name (see _QUEUE_BACKENDS)
+        **kwargs: Backend-specific options
+
+    Returns:
+        TaskQueue instance
+    """
+    backend_cls = _QUEUE_BACKENDS.get((backend or 'sqlite').lower())
+    if backend_cls is None:
+        raise ValueError(f"Unknown task queue backend: {backend}")
+    return backend_cls(**kwargs)
@@ -0,0 +1,303 @@
+"""
+Text Cache - 文本生成结果的内容寻址缓存（可选）
+
+以 hash(model, thinking_budget, prompt) 为键缓存 LLM 返回的原始文本，
+相同提示词的重复请求（失败页重试、"重新生成失败页面"、演示等）可直接命中，无需再次调用模型。
+
+- 默认关闭（TEXT_CACHE_ENABLED=false）：开启后同一提示词总是返回相同结果
+- 后端可选：sqlite（独立的缓存数据库文件）或 disk（每个条目一个文件）
+- 条目超过 TEXT_CACHE_TTL 秒后失效；条目数超过 TEXT_CACHE_MAX_ENTRIES 时淘汰最久未访问的条目
+- get_text_cache_stats() 返回命中 / 未命中统计
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 7 * 24 * 3600  # 7 天
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class TextCacheBackend(ABC):
+    """Abstract storage backend for cached text responses"""
+
+    def __init__(self, ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None if missing or expired"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store a value, evicting least recently used entries beyond max_entries"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class SQLiteTextCache(TextCacheBackend):
+    """缓存存放在独立的 SQLite 文件中（不占用业务数据库的写锁）"""
+
+    def __init__(self, path: str, ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(ttl, max_entries)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS text_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_text_cache_accessed ON text_cache(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM text_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM text_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE text_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO text_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            # 清理过期条目，并按访问时间淘汰超出上限的条目
+            self._conn.execute("DELETE FROM text_cache WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM text_cache WHERE key IN ("
+                "SELECT key FROM text_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM text_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM text_cache")
+            self._conn.commit()
+
+
+class DiskTextCache(TextCacheBackend):
+    """每个条目一个 JSON 文件（按键前两位分目录），适合多进程共享同一目录"""
+
+    def __init__(self, directory: str, ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(ttl, max_entries)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get('created_at', 0) > self.ttl:
+            self.delete(key)
+            return None
+        try:
+            # 用文件修改时间记录最近访问，供淘汰使用
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get('value')
+
+    def set(self, key: str, value: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'value': value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes_since_prune += 1
+            # 扫描目录开销较大，按写入次数间隔清理
+            if self._writes_since_prune < max(1, self.max_entries // 10):
+                return
+            self._writes_since_prune = 0
+        self._prune()
+
+    def _prune(self):
+        entries = []
+        now = time.time()
+        for path in self.directory.glob('*/*.json'):
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((mtime, path))
+        entries.sort(reverse=True)
+        for index, (mtime, path) in enumerate(entries):
+            # 超出数量上限的最久未访问条目，以及长期未访问（必然已过期）的条目
+            if index >= self.max_entries or now - mtime > self.ttl:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for path in self.directory.glob('*/*.json'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+class TextGenerationCache:
+    """Content-addressed cache in front of TextProvider.generate_text"""
+
+    def __init__(self, backend: TextCacheBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, thinking_budget: int) -> str:
+        raw = json.dumps([model or '', int(thinking_budget or 0), prompt], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get_or_generate(self, model: str, prompt: str, thinking_budget: int,
+                        generate: Callable[[], str]) -> str:
+        """命中则直接返回缓存文本，否则调用 generate() 并写入缓存（缓存读写失败不影响生成）"""
+        key = self.make_key(model, prompt, thinking_budget)
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Text cache read failed: {e}")
+            self._count('errors')
+            cached = None
+
+        if cached is not None:
+            self._count('hits')
+            logger.debug(f"Text cache hit: {key[:12]}")
+            return cached
+
+        self._count('misses')
+        result = generate()
+        if result:
+            try:
+                self.backend.set(key, result)
+            except Exception as e:
+                logger.warning(f"Text cache write failed: {e}")
+                self._count('errors')
+        return result
+
+    def invalidate(self, model: str, prompt: str, thinking_budget: int):
+        """删除某个提示词的缓存（如返回内容无法解析时）"""
+        try:
+            self.backend.delete(self.make_key(model, prompt, thinking_budget))
+        except Exception as e:
+            logger.warning(f"Text cache delete failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, errors = self.hits, self.misses, self.errors
+        total = hits + misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': hits,
+            'misses': misses,
+            'errors': errors,
+            'hit_ratio': round(hits / total, 3) if total else 0.0,
+        }
+
+
+# 可用的缓存后端（TEXT_CACHE_BACKEND 配置项）
+_CACHE_BACKENDS = {
+    'sqlite': SQLiteTextCache,
+    'disk': DiskTextCache,
+}
+
+_cache: Optional[TextGenerationCache] = None
+_cache_lock = threading.Lock()
+
+
+def _default_cache_path(backend: str) -> str:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    name = 'text_cache.db' if backend == 'sqlite' else 'text_cache'
+    return os.path.join(backend_dir, 'instance', name)
+
+
+def get_text_cache() -> Optional[TextGenerationCache]:
+    """获取全局文本缓存（TEXT_CACHE_ENABLED=false 时返回 None）"""
+    global _cache
+    from config import get_config
+    config = get_config()
+    if not getattr(config, 'TEXT_CACHE_ENABLED', False):
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend_name = (getattr(config, 'TEXT_CACHE_BACKEND', 'sqlite') or 'sqlite').lower()
+                backend_cls = _CACHE_BACKENDS.get(backend_name)
+                if backend_cls is None:
+                    raise ValueError(f"Unknown text cache backend: {backend_name}")
+                path = getattr(config, 'TEXT_CACHE_PATH', '') or _default_cache_path(backend_name)
+                _cache = TextGenerationCache(backend_cls(
+                    path,
+                    ttl=getattr(config, 'TEXT_CACHE_TTL', DEFAULT_TTL),
+                    max_entries=getattr(config, 'TEXT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+                ))
+                logger.info(f"Text generation cache enabled ({backend_name}: {path})")
+    return _cache
+
+
+def get_text_cache_stats() -> Optional[Dict[str, Any]]:
+    """文本缓存命中统计（未启用时返回 None）"""
+    cache = get_text_cache()
+    return cache.stats() if cache else None
@@ -10,7 +10,7 @@ from .response import (
 )
 from .validators import validate_project_status, validate_page_status, allowed_file, validate_password
 from .path_utils import convert_mineru_path_to_local, find_mineru_file_with_prefix, find_file_with_prefix
-from .auth import login_required, admin_required, get_client_ip, get_token_from_request
+from .auth import login_required, admin_required, get_client_ip, get_token_from_request, check_project_permission
 
 __all__ = [
     'success_response',
@@ -30,6 +30,7 @@ __all__ = [
     'admin_required',
     'get_client_ip',
     'get_token_from_request',
+    'check_project_permission',
     'validate_password'
 ]
 
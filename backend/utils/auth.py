@@ -6,7 +6,7 @@ from flask import request, g
 from .response import error_response
 from services.auth_service import AuthService
 from services.membership_service import MembershipService
-from models import User, FeaturePermission
+from models import User, FeaturePermission, Project
 
 
 def get_token_from_request() -> str:
@@ -144,6 +144,37 @@ def feature_required(feature_code: str, consume_quota: bool = True):
     return decorator
 
 
+def check_project_permission(project: Project, user, write_access: bool = False) -> bool:
+    """
+    检查用户是否有权限访问项目
+
+    Args:
+        project: 项目对象
+        user: 当前用户
+        write_access: 是否需要写权限（修改项目内容）
+
+    Returns:
+        bool: 是否有权限
+
+    权限规则：
+    - 管理员可以查看和删除所有项目，但不能修改其他用户的项目
+    - 普通用户只能访问自己的项目
+    """
+    # 项目所有者拥有所有权限
+    if project.user_id == user.id:
+        return True
+
+    # 管理员权限检查
+    if user.role == 'admin':
+        # 管理员需要写权限时，只能操作自己的项目
+        if write_access:
+            return False
+        # 管理员可以查看和删除其他用户的项目
+        return True
+
+    return False
+
+
 def get_client_ip() -> str:
     """获取客户端 IP 地址"""
     # 优先从 X-Forwarded-For 获取（反向代理场景）
@@ -0,0 +1,78 @@
+"""
+HTTP caching helpers for served files
+
+- ETag 使用文件内容的 SHA-256（按 路径 + mtime + 大小 缓存摘要，文件不变时不重复计算）
+- 保证唯一的文件名（带随机后缀的版本号 / 毫秒时间戳）内容永不改变，返回 Cache-Control: immutable，
+  浏览器和 CDN 无需再验证
+- 可能被覆盖的文件（模板、导出文件）返回 no-cache，由 ETag 验证后返回 304
+- 由 send_file 的 conditional 模式处理 If-None-Match / If-Modified-Since（304）和 Range（206）请求
+"""
+import os
+import re
+import hashlib
+from functools import lru_cache
+
+from flask import send_file
+from werkzeug.security import safe_join
+
+from .response import not_found
+
+# 一年（immutable 资源的 max-age）
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# 保证唯一的文件名，如 {page_id}_v3_1a2b3c4d.png、{page_id}_1718000000000.png、
+# material_1718000000000.png，以及对应的衍生图 {page_id}_v3_1a2b3c4d.thumb.webp。
+# 旧的 {page_id}_v3.png 不在其中：版本号可能重复，同名文件会被覆盖
+_VERSIONED_NAME = re.compile(r'_(v\d+_[0-9a-f]{8}|\d{13})(\.[a-z]+)?\.[A-Za-z0-9]+$')
+
+
+def is_versioned_filename(filename: str) -> bool:
+    """文件名是否保证唯一（带随机后缀的版本号 / 时间戳，内容不会再改变）"""
+    return bool(_VERSIONED_NAME.search(filename))
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_etag(path: str) -> str:
+    """文件内容的 SHA-256 摘要（作为强 ETag）"""
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size)
+
+
+def send_cached_file(directory: str, filename: str, immutable: bool = False, private: bool = False):
+    """
+    Send a file with a content-hash ETag and cache headers
+
+    Args:
+        directory: Directory containing the file
+        filename: File name (joined safely, like send_from_directory)
+        immutable: File content never changes for this URL (cache for a year without revalidation)
+        private: Response must not be stored by shared caches (e.g. files requiring login)
+
+    Returns:
+        File response, or a 404 error response if the file does not exist or the path escapes the directory
+    """
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        return not_found('File')
+
+    response = send_file(path, etag=file_etag(path), conditional=True, max_age=None)
+
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    return response
@@ -0,0 +1,75 @@
+"""
+Background Worker Entry Point
+
+独立的后台任务进程：只加载配置、数据库模型和服务，不注册任何 blueprint，
+从持久化任务队列领取并执行描述生成、图片生成、可编辑 PPT 导出等重任务。
+Web 进程可设置 TASK_QUEUE_EMBEDDED_WORKER=false，只负责入队，工作进程可独立扩容。
+
+Usage:
+    python -m backend.worker                 # 在项目根目录运行
+    python worker.py --concurrency 8         # 在 backend 目录运行
+"""
+import os
+import sys
+import signal
+import logging
+import argparse
+import threading
+
+# 与 app.py 一致，backend 内部模块使用绝对导入（from models import ...）
+_backend_dir = os.path.dirname(os.path.abspath(__file__))
+if _backend_dir not in sys.path:
+    sys.path.insert(0, _backend_dir)
+
+from app_core import create_base_app, load_settings_to_config
+from services.task_manager import task_manager
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Banana Slides background worker')
+    parser.add_argument(
+        '--concurrency', type=int, default=None,
+        help='Number of queued tasks to run in parallel (default: MAX_TASK_WORKERS setting)'
+    )
+    return parser.parse_args(argv)
+
+
+def _reload_settings(app):
+    """每个任务执行前同步数据库中的最新设置（设置页的修改只发生在 Web 进程）"""
+    load_settings_to_config(app)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    app = create_base_app(__name__)
+
+    with app.app_context():
+        max_workers = args.concurrency or app.config.get('MAX_TASK_WORKERS', 4)
+        if task_manager.max_workers != max_workers:
+            task_manager.reconfigure(max_workers)
+        task_manager.configure_queue(app)
+
+    stop_event = threading.Event()
+
+    def _handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, finishing running tasks before exit...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+    task_manager.start_queue_consumer(app, before_job=_reload_settings)
+    logger.info(
+        f"🍌 Banana Slides worker started: worker_id={task_manager.worker_id}, "
+        f"concurrency={task_manager.max_workers}"
+    )
+
+    stop_event.wait()
+    task_manager.shutdown()
+    logger.info("Worker stopped")
+
+
+if __name__ == '__main__':
+    main()
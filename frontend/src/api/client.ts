@@ -83,9 +83,12 @@ apiClient.interceptors.response.use(
   }
 );
 
+// 页面图片的衍生尺寸（后端生成的 WebP 缩略图 / 预览图）
+export type ImageSize = 'thumb' | 'preview';
+
 // 图片URL处理工具
 // 使用相对路径，通过代理转发到后端
-export const getImageUrl = (path?: string, timestamp?: string | number): string => {
+export const getImageUrl = (path?: string, timestamp?: string | number, size?: ImageSize): string => {
   if (!path) return '';
   // 如果已经是完整URL，直接返回
   if (path.startsWith('http://') || path.startsWith('https://')) {
@@ -93,16 +96,22 @@ export const getImageUrl = (path?: string, timestamp?: string | number): string
   }
   // 使用相对路径（确保以 / 开头）
   let url = path.startsWith('/') ? path : '/' + path;
+  const params: string[] = [];
   
   // 添加时间戳参数避免浏览器缓存（仅在提供时间戳时添加）
   if (timestamp) {
     const ts = typeof timestamp === 'string' 
       ? new Date(timestamp).getTime() 
       : timestamp;
-    url += `?v=${ts}`;
+    params.push(`v=${ts}`);
+  }
+
+  // 缩略图等场景请求小尺寸衍生图（仅页面图片支持）
+  if (size && url.includes('/pages/')) {
+    params.push(`size=${size}`);
   }
   
-  return url;
+  return params.length ? `${url}?${params.join('&')}` : url;
 };
 
 export default apiClient;
@@ -1,6 +1,7 @@
 import { apiClient } from './client';
 import type { Project, Task, ApiResponse, CreateProjectRequest, Page } from '@/types';
 import type { Settings } from '../types/index';
+import { appendTokenToUrl } from '@/utils';
 
 // ===== 项目相关 API =====
 
@@ -417,6 +418,32 @@ export const getTaskStatus = async (projectId: string, taskId: string): Promise<
   return response.data;
 };
 
+/**
+ * 订阅任务进度事件（Server-Sent Events）
+ * 返回取消订阅函数；浏览器不支持 EventSource 时返回 null，调用方应回退到轮询
+ */
+export const subscribeTaskEvents = (
+  projectId: string,
+  taskId: string,
+  onTask: (task: Task) => void,
+  onError: () => void
+): (() => void) | null => {
+  if (typeof EventSource === 'undefined') {
+    return null;
+  }
+
+  // EventSource 无法设置 Authorization header，通过 URL 携带 token
+  const source = new EventSource(appendTokenToUrl(`/api/projects/${projectId}/tasks/${taskId}/events`));
+  source.addEventListener('progress', (event) => {
+    onTask(JSON.parse((event as MessageEvent).data) as Task);
+  });
+  source.onerror = () => {
+    source.close();
+    onError();
+  };
+  return () => source.close();
+};
+
 // ===== 导出 =====
 
 /**
@@ -921,7 +921,7 @@ export const SlidePreview: React.FC = () => {
                   >
                     {page.generated_image_path ? (
                       <img
-                        src={getImageUrl(page.generated_image_path, page.updated_at)}
+                        src={getImageUrl(page.generated_image_path, page.updated_at, 'thumb')}
                         alt={`Slide ${index + 1}`}
                         className="w-full h-full object-cover rounded"
                       />
@@ -401,6 +401,51 @@ const debouncedUpdatePage = debounce(
       return;
     }
 
+    // 处理一次任务状态，返回是否需要继续等待
+    const handleTask = async (task: Task): Promise<boolean> => {
+      // 更新进度
+      if (task.progress) {
+        set({ taskProgress: task.progress });
+      }
+
+      console.log(`[轮询] Task ${taskId} 状态: ${task.status}`, task);
+
+      // 检查任务状态
+      if (task.status === 'COMPLETED') {
+        console.log(`[轮询] Task ${taskId} 已完成，刷新项目数据`);
+        set({ 
+          activeTaskId: null, 
+          taskProgress: null, 
+          isGlobalLoading: false 
+        });
+        // 刷新项目数据
+        await get().syncProject();
+        return false;
+      } else if (task.status === 'FAILED') {
+        console.error(`[轮询] Task ${taskId} 失败:`, task.error_message || task.error);
+        set({ 
+          error: normalizeErrorMessage(task.error_message || task.error || '任务失败'),
+          activeTaskId: null,
+          taskProgress: null,
+          isGlobalLoading: false
+        });
+        return false;
+      } else if (task.status === 'PENDING' || task.status === 'PROCESSING') {
+        // 继续等待（PENDING 或 PROCESSING）
+        return true;
+      } else {
+        // 未知状态，停止轮询
+        console.warn(`[轮询] Task ${taskId} 未知状态: ${task.status}，停止轮询`);
+        set({ 
+          error: `未知任务状态: ${task.status}`,
+          activeTaskId: null,
+          taskProgress: null,
+          isGlobalLoading: false
+        });
+        return false;
+      }
+    };
+
     const poll = async () => {
       try {
         console.log(`[轮询] 查询任务状态: ${taskId}`);
@@ -412,44 +457,9 @@ const debouncedUpdatePage = debounce(
           return;
         }
 
-        // 更新进度
-        if (task.progress) {
-          set({ taskProgress: task.progress });
-        }
-
-        console.log(`[轮询] Task ${taskId} 状态: ${task.status}`, task);
-
-        // 检查任务状态
-        if (task.status === 'COMPLETED') {
-          console.log(`[轮询] Task ${taskId} 已完成，刷新项目数据`);
-          set({ 
-            activeTaskId: null, 
-            taskProgress: null, 
-            isGlobalLoading: false 
-          });
-          // 刷新项目数据
-          await get().syncProject();
-        } else if (task.status === 'FAILED') {
-          console.error(`[轮询] Task ${taskId} 失败:`, task.error_message || task.error);
-          set({ 
-            error: normalizeErrorMessage(task.error_message || task.error || '任务失败'),
-            activeTaskId: null,
-            taskProgress: null,
-            isGlobalLoading: false
-          });
-        } else if (task.status === 'PENDING' || task.status === 'PROCESSING') {
-          // 继续轮询（PENDING 或 PROCESSING）
+        if (await handleTask(task)) {
           console.log(`[轮询] Task ${taskId} 处理中，2秒后继续轮询...`);
           setTimeout(poll, 2000);
-        } else {
-          // 未知状态，停止轮询
-          console.warn(`[轮询] Task ${taskId} 未知状态: ${task.status}，停止轮询`);
-          set({ 
-            error: `未知任务状态: ${task.status}`,
-            activeTaskId: null,
-            taskProgress: null,
-            isGlobalLoading: false
-          });
         }
       } catch (error: any) {
         console.error('任务轮询错误:', error);
@@ -461,7 +471,31 @@ const debouncedUpdatePage = debounce(
       }
     };
 
-    await poll();
+    // 优先通过 SSE 接收进度推送，连接失败时回退到轮询
+    let finished = false;
+    const unsubscribe = api.subscribeTaskEvents(
+      currentProject.id!,
+      taskId,
+      async (task) => {
+        if (finished) return;
+        // 服务端在终态事件后会关闭连接，需在异步处理前标记结束，避免误触发回退轮询
+        if (task.status !== 'PENDING' && task.status !== 'PROCESSING') {
+          finished = true;
+          unsubscribe?.();
+        }
+        await handleTask(task);
+      },
+      () => {
+        if (finished) return;
+        finished = true;
+        console.warn(`[轮询] Task ${taskId} 事件流中断，回退到轮询`);
+        poll();
+      }
+    );
+
+    if (!unsubscribe) {
+      await poll();
+    }
   },
 
   // 生成大纲（同步操作，不需要轮询）
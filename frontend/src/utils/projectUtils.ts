@@ -39,7 +39,7 @@ export const getFirstPageImage = (project: Project): string | null => {
   // 找到第一页有图片的页面
   const firstPageWithImage = project.pages.find(p => p.generated_image_path);
   if (firstPageWithImage?.generated_image_path) {
-    return getImageUrl(firstPageWithImage.generated_image_path, firstPageWithImage.updated_at);
+    return getImageUrl(firstPageWithImage.generated_image_path, firstPageWithImage.updated_at, 'thumb');
   }
   
   return null;
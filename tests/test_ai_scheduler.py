@@ -0,0 +1,192 @@
+"""
+全局公平调度测试：按会员等级加权分配名额、与 provider 限流器的配合、等待取消
+"""
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from services.ai_providers.rate_limiter import (
+    AIMDConcurrencyLimiter, ProviderRateController, RateLimitedTextProvider
+)
+from services.ai_providers.text.base import TextProvider
+from services.ai_scheduler import FairShareScheduler, ScheduleOwner
+
+FREE = ScheduleOwner('free-user', 'free')
+PREMIUM = ScheduleOwner('premium-user', 'premium')
+BLOCKER = ScheduleOwner('blocker', 'free')
+
+
+class _EchoProvider(TextProvider):
+    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        return prompt
+
+
+def _limited_provider(limit: int) -> RateLimitedTextProvider:
+    limiter = AIMDConcurrencyLimiter(initial=limit, maximum=limit)
+    return RateLimitedTextProvider(_EchoProvider(), ProviderRateController('test', limiter))
+
+
+async def _grant_order(scheduler, waiters, provider=None, hold=None):
+    """按 waiters 顺序排队，依次执行并记录获得名额的顺序（每个调用拿到名额后立即归还）"""
+    order = []
+
+    async def call(owner):
+        async with scheduler.aslot(owner, provider):
+            order.append(owner.level)
+            await asyncio.sleep(0)
+
+    tasks = []
+    for owner in waiters:
+        tasks.append(asyncio.create_task(call(owner)))
+        await asyncio.sleep(0)
+    if hold is not None:
+        hold()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_weighted_share_by_level():
+    scheduler = FairShareScheduler(max_concurrency=1)
+
+    async def run():
+        await scheduler.aacquire(BLOCKER)
+        # 免费用户先提交大量页面，付费用户后到
+        return await _grant_order(
+            scheduler, [FREE] * 10 + [PREMIUM] * 10,
+            hold=lambda: scheduler.release(BLOCKER)
+        )
+
+    order = asyncio.run(run())
+    assert len(order) == 20
+    # 权重 free:1 / premium:4，付费用户后到也能拿到前 10 个名额中的大部分
+    assert order[:10].count('premium') >= 7
+    assert scheduler.stats()['in_flight'] == 0
+
+
+def test_provider_limiter_gates_dispatch_in_fair_order():
+    scheduler = FairShareScheduler(max_concurrency=16)
+    provider = _limited_provider(1)
+    limiter = provider.controller.limiter
+
+    async def run():
+        await scheduler.aacquire(BLOCKER, limiter)
+        order = await _grant_order(
+            scheduler, [FREE] * 8 + [PREMIUM] * 4, provider=provider,
+            hold=lambda: scheduler.release(BLOCKER, limiter)
+        )
+        return order
+
+    order = asyncio.run(run())
+    # 调度器名额充足，但上游只允许 1 个并发：执行顺序仍由公平调度决定，而不是限流器的先到先得队列
+    assert order[:5].count('premium') >= 3
+    assert limiter.stats()['in_flight'] == 0
+    assert limiter.stats()['waiting'] == 0
+
+
+def test_held_permit_is_not_acquired_twice():
+    scheduler = FairShareScheduler(max_concurrency=4)
+    provider = _limited_provider(1)
+
+    with scheduler.slot(FREE, provider):
+        assert provider.controller.limiter.stats()['in_flight'] == 1
+        # 调度器已为当前线程取得名额，provider 调用不会再次排队（否则在上限 1 时死锁）
+        assert provider.generate_text('hello') == 'hello'
+        assert provider.controller.limiter.stats()['in_flight'] == 1
+
+    assert provider.controller.limiter.stats()['in_flight'] == 0
+
+
+def test_unscheduled_release_wakes_scheduler():
+    scheduler = FairShareScheduler(max_concurrency=4)
+    provider = _limited_provider(1)
+    limiter = provider.controller.limiter
+    limiter.acquire()  # 不经过调度器的调用（如大纲生成）占用了唯一的名额
+
+    granted = threading.Event()
+
+    def waiter():
+        with scheduler.slot(FREE, provider):
+            granted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not granted.wait(0.2)
+
+    limiter.release()
+    assert granted.wait(2)
+    thread.join(2)
+    assert scheduler.stats()['in_flight'] == 0
+    assert limiter.stats()['in_flight'] == 0
+
+
+def test_cancel_waiting_aacquire():
+    scheduler = FairShareScheduler(max_concurrency=1)
+
+    async def run():
+        await scheduler.aacquire(BLOCKER)
+        waiting = asyncio.create_task(scheduler.aacquire(FREE))
+        await asyncio.sleep(0)
+        assert scheduler.stats()['waiting'] == 1
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.stats()['waiting'] == 0
+
+        scheduler.release(BLOCKER)
+        assert scheduler.stats()['in_flight'] == 0
+        # 名额没有泄漏：之后的请求可以立即获得
+        await asyncio.wait_for(scheduler.aacquire(PREMIUM), 1)
+        scheduler.release(PREMIUM)
+
+    asyncio.run(run())
+    assert scheduler.stats() == {'max_concurrency': 1, 'in_flight': 0, 'waiting': 0, 'active_users': 0}
+
+
+def test_cancel_after_grant_returns_slot():
+    scheduler = FairShareScheduler(max_concurrency=1)
+    provider = _limited_provider(1)
+    limiter = provider.controller.limiter
+
+    async def run():
+        await scheduler.aacquire(BLOCKER, limiter)
+        waiting = asyncio.create_task(scheduler.aacquire(FREE, limiter))
+        await asyncio.sleep(0)
+
+        # 名额已移交给等待者，但它恢复执行前被取消
+        scheduler.release(BLOCKER, limiter)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert scheduler.stats()['in_flight'] == 0
+    assert limiter.stats()['in_flight'] == 0
+
+
+def test_cancel_inside_aslot_releases_both_slots():
+    scheduler = FairShareScheduler(max_concurrency=2)
+    provider = _limited_provider(1)
+    limiter = provider.controller.limiter
+    entered = None
+
+    async def call():
+        async with scheduler.aslot(FREE, provider):
+            entered.set()
+            await asyncio.sleep(10)
+
+    async def run():
+        nonlocal entered
+        entered = asyncio.Event()
+        task = asyncio.create_task(call())
+        await entered.wait()
+        assert scheduler.stats()['in_flight'] == 1
+        assert limiter.stats()['in_flight'] == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert scheduler.stats()['in_flight'] == 0
+    assert limiter.stats()['in_flight'] == 0
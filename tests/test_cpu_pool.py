@@ -0,0 +1,29 @@
+"""
+CPU 进程池测试：工作进程会重新执行入口模块，不能在其中启动任务队列消费线程
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from flask import Flask
+
+from services.cpu_pool import _mp_context
+from services.task_manager import TaskManager
+
+
+def _start_consumer_in_child():
+    """在进程池工作进程中模拟 app.py 的 create_app()：尝试启动内嵌队列消费线程"""
+    manager = TaskManager(max_workers=1)
+    manager.start_queue_consumer(Flask(__name__))
+    try:
+        return manager._consumer_thread is not None
+    finally:
+        manager.stop_queue_consumer()
+
+
+def test_pool_worker_starts_no_queue_consumer():
+    with ProcessPoolExecutor(max_workers=1, mp_context=_mp_context()) as pool:
+        started = pool.submit(_start_consumer_in_child).result(timeout=120)
+    assert started is False
@@ -0,0 +1,42 @@
+"""
+导出缓存测试：同名导出并发写出时互不干扰
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from services.export_cache import ExportCache
+from services.export_service import ExportService
+
+
+def test_concurrent_materialize_same_filename(tmp_path):
+    artifact = tmp_path / 'cached.pdf'
+    artifact.write_bytes(b'%PDF-1.4 cached')
+    output_path = str(tmp_path / 'slides.pdf')
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for future in [pool.submit(ExportCache.materialize, artifact, output_path) for _ in range(32)]:
+            future.result()
+
+    assert (tmp_path / 'slides.pdf').read_bytes() == b'%PDF-1.4 cached'
+    assert sorted(os.listdir(tmp_path)) == ['cached.pdf', 'slides.pdf']
+
+
+def test_concurrent_pdf_export_same_filename(tmp_path):
+    from PIL import Image
+    image_path = str(tmp_path / 'page.png')
+    Image.new('RGB', (64, 36), 'white').save(image_path)
+    output_path = str(tmp_path / 'slides.pdf')
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(ExportService.create_pdf_from_images, [image_path], output_path, 1)
+            for _ in range(8)
+        ]
+        for future in futures:
+            future.result()
+
+    assert (tmp_path / 'slides.pdf').read_bytes().startswith(b'%PDF')
+    assert sorted(os.listdir(tmp_path)) == ['page.png', 'slides.pdf']
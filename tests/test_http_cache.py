@@ -0,0 +1,23 @@
+"""
+HTTP 缓存测试：只有保证唯一的文件名才长期缓存
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from utils.http_cache import is_versioned_filename
+
+
+def test_unique_filenames_are_immutable():
+    assert is_versioned_filename('3f2c_v3_1a2b3c4d.png')
+    assert is_versioned_filename('3f2c_v3_1a2b3c4d.thumb.webp')
+    assert is_versioned_filename('3f2c_1718000000000.png')
+    assert is_versioned_filename('material_1718000000000.jpg')
+
+
+def test_reusable_filenames_are_revalidated():
+    # 版本号按已有版本数分配，可能被并发任务或删除版本后的新版本覆盖
+    assert not is_versioned_filename('3f2c_v3.png')
+    assert not is_versioned_filename('3f2c_v3.preview.webp')
+    assert not is_versioned_filename('template.png')
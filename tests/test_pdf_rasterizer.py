@@ -0,0 +1,76 @@
+"""
+PDF 栅格化测试：预先渲染的区间受窗口限制，进程池损坏时在当前线程渲染
+"""
+import os
+import sys
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from services.pdf_converter import rasterizer
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / 'scan.pdf'
+    with fitz.open() as doc:
+        for i in range(40):
+            doc.new_page(width=200, height=100).insert_text((20, 50), f"page {i + 1}")
+        doc.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """进程池只有 1 个工作进程（窗口 2 段），提交的区间在当前线程渲染并记录"""
+    calls = []
+
+    def fake_submit(func, *args):
+        calls.append(args[1:3])
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+    monkeypatch.setattr(rasterizer, 'get_cpu_pool_workers', lambda: 1)
+    monkeypatch.setattr(rasterizer, 'submit_cpu_task', fake_submit)
+    return calls
+
+
+def test_prefetch_is_bounded_by_window(pdf_path, submitted):
+    pages = rasterizer.rasterize_pdf(pdf_path, 40, dpi=36)
+    assert len(pages) == 40
+    assert len(submitted) == 2
+
+    first_range = [page for page in pages if page.source is pages[0].source]
+    for page in first_range:
+        assert page.load().shape == (50, 100, 3)
+        page.release()
+
+    # 第一段全部释放后才提交下一段，且已释放页面的数组被丢弃
+    assert len(submitted) == 3
+    assert pages[0].source._pages is None
+
+
+def test_needed_range_is_submitted_outside_window(pdf_path, submitted):
+    pages = rasterizer.rasterize_pdf(pdf_path, 40, dpi=36)
+    assert pages[-1].load().shape == (50, 100, 3)
+    assert submitted[-1][1] == 40
+    assert len(submitted) == 3
+
+
+def test_broken_pool_renders_inline(pdf_path, monkeypatch):
+    def broken_submit(func, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool('worker died'))
+        return future
+
+    monkeypatch.setattr(rasterizer, 'get_cpu_pool_workers', lambda: 1)
+    monkeypatch.setattr(rasterizer, 'submit_cpu_task', broken_submit)
+    monkeypatch.setattr(rasterizer, 'reset_cpu_pool', lambda *args: None)
+
+    pages = rasterizer.rasterize_pdf(pdf_path, 40, dpi=36)
+    assert pages[5].load().shape == (50, 100, 3)
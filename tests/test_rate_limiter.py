@@ -0,0 +1,152 @@
+"""
+AI 调用自适应限流测试：限流错误识别、初始并发数、AIMD 名额移交与取消
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from flask import Flask
+
+from config import get_config
+from services.ai_providers.rate_limiter import AIMDConcurrencyLimiter, _create_controller, is_throttle_error
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"upstream error {status_code}")
+        self.status_code = status_code
+
+
+def test_throttle_errors():
+    assert is_throttle_error(_StatusError(429))
+    assert is_throttle_error(_StatusError(503))
+    assert is_throttle_error(Exception("429 RESOURCE_EXHAUSTED: quota exceeded"))
+    assert is_throttle_error(Exception("Rate limit reached for requests"))
+    assert is_throttle_error(Exception("Error generating image: status_code=502"))
+
+    # 包装后的异常沿异常链识别
+    try:
+        try:
+            raise _StatusError(429)
+        except _StatusError as e:
+            raise Exception("Error generating image") from e
+    except Exception as wrapped:
+        assert is_throttle_error(wrapped)
+
+
+def test_client_timeouts_are_not_throttling():
+    assert not is_throttle_error(httpx.ReadTimeout("The read operation timed out"))
+    assert not is_throttle_error(TimeoutError())
+    assert not is_throttle_error(asyncio.TimeoutError())
+    assert not is_throttle_error(Exception("Request timed out."))
+    assert not is_throttle_error(_StatusError(400))
+
+
+def test_initial_concurrency_follows_worker_settings(monkeypatch):
+    monkeypatch.setattr(get_config(), 'AI_CONCURRENCY_INITIAL', 0)
+    app = Flask(__name__)
+    app.config.update(MAX_DESCRIPTION_WORKERS=5, MAX_IMAGE_WORKERS=8)
+    with app.app_context():
+        assert _create_controller('text', 'text:test').limiter.limit == 5
+        assert _create_controller('image', 'image:test').limiter.limit == 8
+
+    monkeypatch.setattr(get_config(), 'AI_CONCURRENCY_INITIAL', 3)
+    assert _create_controller('image', 'image:test').limiter.limit == 3
+
+
+def test_aimd_adjustment():
+    limiter = AIMDConcurrencyLimiter(initial=8, maximum=16, cooldown=60)
+    limiter.record_throttle()
+    assert limiter.limit == 4
+    # 冷却期内同一波失败只收缩一次
+    limiter.record_throttle()
+    assert limiter.limit == 4
+
+    # 加性增长：约 limit 次成功后上限 +1
+    for _ in range(5):
+        limiter.record_success()
+    assert limiter.limit == 5
+
+
+def test_handoff_from_thread_to_event_loop():
+    limiter = AIMDConcurrencyLimiter(initial=1)
+    limiter.acquire()
+
+    async def run():
+        waiter = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        assert limiter.stats()['waiting'] == 1
+
+        threading.Thread(target=limiter.release).start()
+        await asyncio.wait_for(waiter, 2)
+        assert limiter.stats()['in_flight'] == 1
+        limiter.release()
+
+    asyncio.run(run())
+    assert limiter.stats()['in_flight'] == 0
+
+
+def test_handoff_from_event_loop_to_thread():
+    limiter = AIMDConcurrencyLimiter(initial=1)
+    acquired = threading.Event()
+
+    def worker():
+        limiter.acquire()
+        acquired.set()
+        limiter.release()
+
+    async def run():
+        await limiter.aacquire()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not acquired.wait(0.1)
+        limiter.release()
+        assert acquired.wait(2)
+        thread.join(2)
+
+    asyncio.run(run())
+    assert limiter.stats() == {'limit': 1, 'in_flight': 0, 'waiting': 0, 'successes': 0, 'throttles': 0}
+
+
+def test_cancelled_waiter_is_removed():
+    limiter = AIMDConcurrencyLimiter(initial=1)
+
+    async def run():
+        await limiter.aacquire()
+        waiter = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.stats()['waiting'] == 0
+        limiter.release()
+
+    asyncio.run(run())
+    assert limiter.stats()['in_flight'] == 0
+
+
+def test_cancel_after_handoff_passes_permit_on():
+    limiter = AIMDConcurrencyLimiter(initial=1)
+
+    async def run():
+        await limiter.aacquire()
+        first = asyncio.create_task(limiter.aacquire())
+        second = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+
+        # 名额已移交给 first，但 first 恢复执行前被取消：名额继续移交给 second
+        limiter.release()
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, 2)
+        assert limiter.stats()['in_flight'] == 1
+        limiter.release()
+
+    asyncio.run(run())
+    assert limiter.stats()['in_flight'] == 0
@@ -0,0 +1,65 @@
+"""
+任务进度批量写入测试：提交失败时缓冲的页面结果不丢失
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from flask import Flask
+
+from models import db, Page, Task
+from services.task_progress import TaskProgressAggregator
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'progress.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def _mark_completed(page):
+    page.status = 'COMPLETED'
+    page.generated_image_path = f"p1/pages/{page.id}_1718000000000.png"
+
+
+def test_failed_commit_keeps_pending_results(app, monkeypatch):
+    task = Task(task_type='GENERATE_IMAGES', status='PROCESSING')
+    pages = [Page(project_id='p1', order_index=i, status='GENERATING') for i in range(2)]
+    db.session.add_all([task, *pages])
+    db.session.commit()
+    task_id, page_ids = task.id, [page.id for page in pages]
+
+    progress = TaskProgressAggregator(task_id, total=2, batch_size=1)
+    progress.record_success(page_ids[0], _mark_completed)
+    progress.record_failure(page_ids[1])
+
+    real_commit = db.session.commit
+
+    def locked_commit():
+        raise OperationalError('COMMIT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(db.session, 'commit', locked_commit)
+    with pytest.raises(OperationalError):
+        progress.flush()
+    db.session.rollback()
+    assert progress.has_pending
+
+    # 与 task_manager 中的恢复分支一致：回滚后再次 flush
+    monkeypatch.setattr(db.session, 'commit', real_commit)
+    progress.flush()
+    assert not progress.has_pending
+
+    db.session.expire_all()
+    assert Page.query.get(page_ids[0]).status == 'COMPLETED'
+    assert Page.query.get(page_ids[1]).status == 'FAILED'
+    assert Task.query.get(task_id).get_progress()['completed'] == 1
+    assert Task.query.get(task_id).get_progress()['failed'] == 1
@@ -0,0 +1,163 @@
+"""
+持久化任务队列测试：租约独占、租约过期后的崩溃恢复、重试与失败
+"""
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from flask import Flask
+
+from models import db, QueueJob, Task
+from services.task_queue import SQLiteTaskQueue
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'queue.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def queue(app):
+    return SQLiteTaskQueue(max_attempts=2)
+
+
+def _create_task() -> str:
+    task = Task(task_type='GENERATE_IMAGES', status='PENDING')
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+
+def _expire_leases():
+    """模拟工作进程崩溃：让所有租约立即过期"""
+    QueueJob.query.filter_by(status='LEASED').update(
+        {'lease_expires_at': datetime.utcnow() - timedelta(minutes=1)}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+def test_lease_is_exclusive(queue):
+    job_id = queue.enqueue('GENERATE_IMAGES', {'page_ids': ['p1']})
+
+    leased = queue.lease('worker-a')
+    assert [job.job_id for job in leased] == [job_id]
+    assert leased[0].payload == {'page_ids': ['p1']}
+    assert leased[0].attempts == 1
+    assert queue.lease('worker-b') == []
+
+    assert queue.extend_lease(job_id, 'worker-a')
+    assert not queue.extend_lease(job_id, 'worker-b')
+
+
+def test_concurrent_lease_claims_each_job_once(app, queue):
+    job_ids = {queue.enqueue('GENERATE_IMAGES', {'n': i}) for i in range(20)}
+    claimed = []
+    lock = threading.Lock()
+
+    def consume(owner):
+        with app.app_context():
+            while True:
+                leased = queue.lease(owner, limit=3)
+                if not leased:
+                    break
+                with lock:
+                    claimed.extend(job.job_id for job in leased)
+            db.session.remove()
+
+    threads = [threading.Thread(target=consume, args=(f'worker-{i}',)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job_ids)
+
+
+def test_expired_lease_is_requeued_and_retried(queue):
+    task_id = _create_task()
+    job_id = queue.enqueue('GENERATE_IMAGES', {}, task_id=task_id)
+    queue.lease('crashed-worker')
+    Task.query.get(task_id).status = 'PROCESSING'
+    db.session.commit()
+
+    # 租约未过期时不回收
+    assert queue.recover_expired() == []
+
+    _expire_leases()
+    recovered = queue.recover_expired()
+    assert [(job.job_id, job.requeued) for job in recovered] == [(job_id, True)]
+    assert Task.query.get(task_id).status == 'PENDING'
+
+    retried = queue.lease('worker-b')
+    assert [(job.job_id, job.attempts) for job in retried] == [(job_id, 2)]
+
+    # 崩溃的工作进程已失去租约，不能再确认该任务
+    assert not queue.extend_lease(job_id, 'crashed-worker')
+    queue.ack(job_id, 'crashed-worker')
+    assert QueueJob.query.get(job_id).status == 'LEASED'
+
+    queue.ack(job_id, 'worker-b')
+    assert QueueJob.query.get(job_id).status == 'DONE'
+
+
+def test_expired_lease_fails_after_max_attempts(queue):
+    task_id = _create_task()
+    job_id = queue.enqueue('GENERATE_IMAGES', {}, task_id=task_id)
+
+    for _ in range(2):
+        assert queue.lease('worker-a')
+        _expire_leases()
+        queue.recover_expired()
+
+    job = QueueJob.query.get(job_id)
+    assert job.status == 'FAILED'
+    assert job.attempts == 2
+    assert queue.lease('worker-a') == []
+
+    task = Task.query.get(task_id)
+    assert task.status == 'FAILED'
+    assert task.completed_at is not None
+
+
+def test_fail_marks_job_failed(queue):
+    job_id = queue.enqueue('EXPORT_EDITABLE_PPTX', {})
+    queue.lease('worker-a')
+
+    queue.fail(job_id, 'worker-a', 'boom')
+
+    job = QueueJob.query.get(job_id)
+    assert job.status == 'FAILED'
+    assert job.last_error == 'boom'
+    assert job.lease_owner is None
+    assert queue.recover_expired() == []
+
+
+def test_enqueue_without_commit_rolls_back_with_task(queue):
+    task = Task(task_type='GENERATE_IMAGES', status='PENDING')
+    db.session.add(task)
+    db.session.flush()
+    queue.enqueue('GENERATE_IMAGES', {'page_ids': ['p1']}, task_id=task.id, commit=False)
+    db.session.rollback()
+
+    assert Task.query.count() == 0
+    assert QueueJob.query.count() == 0
+
+    task = Task(task_type='GENERATE_IMAGES', status='PENDING')
+    db.session.add(task)
+    db.session.flush()
+    job_id = queue.enqueue('GENERATE_IMAGES', {'page_ids': ['p1']}, task_id=task.id, commit=False)
+    db.session.commit()
+
+    leased = queue.lease('worker-a')
+    assert [job.job_id for job in leased] == [job_id]